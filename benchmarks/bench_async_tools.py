@@ -0,0 +1,132 @@
+"""
+Concurrency check for the async tool variants (`campus_connect.tools.async_tools`).
+
+Runs each async tool many times concurrently on one event loop against the fakes (with simulated
+BigQuery and Firestore latency) and checks two things:
+
+* the event loop keeps ticking: the p99 lag of a 10 ms ticker stays under --max-lag-ms;
+* the calls overlap: a concurrent run finishes at least --min-speedup times faster than the same calls
+  made one after another.
+
+"sync on loop" calls the sync tool directly from a coroutine, which is what the runner did before the
+async variants existed; it is the control that shows the check catches a blocked loop (it is expected
+to fail and does not affect the exit status). Exits non-zero when an async tool fails either check.
+
+    python benchmarks/bench_async_tools.py
+    python benchmarks/bench_async_tools.py --concurrency 32 --requests 64 --max-lag-ms 25
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List
+
+import _offline
+
+_offline.setup()
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from campus_connect.tools import async_tools, clients, get_bq_courses, profile_cache  # noqa: E402
+
+import harness  # noqa: E402
+from fakes import FakeBigQueryClient, FakeFirestore  # noqa: E402
+
+Call = Callable[[int], Awaitable[Any]]
+
+
+def scenarios(emails: List[str], fresh_email: Callable[[], str]) -> Dict[str, Call]:
+    run_id = uuid.uuid4().hex[:8]
+    search = dict(use_local_index=False, totals_mode="skip", destination_countries=["Canada"])
+    patch = {"academicProfile": {"cgpa": 3.6, "cgpaScale": 4.0}, "preferences": {"studyLevel": "masters"}}
+
+    async def search_and_count(i: int) -> Any:
+        return await async_tools.search_and_count(f"data science {run_id}-{i}", **search)
+
+    async def get_fs_user_profile(i: int) -> Any:
+        email = emails[i % len(emails)]
+        profile_cache.invalidate(email)
+        return await async_tools.get_fs_user_profile(email)
+
+    async def update_profile_from_resume(i: int) -> Any:
+        return await async_tools.update_profile_from_resume(fresh_email(), patch)
+
+    async def get_recommendations(i: int) -> Any:
+        return await async_tools.get_recommendations(emails[i % len(emails)])
+
+    async def sync_on_loop(i: int) -> Any:
+        return get_bq_courses.search_and_count(f"data science {run_id}-sync-{i}", **search)
+
+    return {
+        "search_and_count": search_and_count,
+        "get_fs_user_profile": get_fs_user_profile,
+        "update_profile_from_resume": update_profile_from_resume,
+        "get_recommendations": get_recommendations,
+        "sync on loop (control)": sync_on_loop,
+    }
+
+
+async def check(name: str, call: Call, args: argparse.Namespace) -> Dict[str, Any]:
+    started = time.perf_counter()
+    await harness.run_load(name, call, args.requests, 1)
+    sequential = time.perf_counter() - started
+    started = time.perf_counter()
+    result = await harness.run_load(name, call, args.requests, args.concurrency)
+    concurrent = time.perf_counter() - started
+    result["speedup"] = sequential / concurrent if concurrent else 0.0
+    result["ok"] = (
+        result["errors"] == 0
+        and result["loop_lag_p99_ms"] <= args.max_lag_ms
+        and result["speedup"] >= args.min_speedup
+    )
+    return result
+
+
+async def run(args: argparse.Namespace) -> int:
+    bq = FakeBigQueryClient(programs=args.programs, latency_ms={"embed": 40, "search": 80, "count": 0, "estimate": 0})
+    store = FakeFirestore(latency_ms=args.fs_latency_ms)
+    clients.override("bigquery", bq)
+    clients.override("firestore", store.client())
+    clients.override("firestore_async", store.async_client())
+    emails = store.seed_users(args.users)
+    seeded = [args.users]
+
+    def fresh_email() -> str:
+        # Updates only fill empty fields, so every call gets a user it has not touched yet.
+        seeded[0] += 1
+        return store.seed_users(1, start=seeded[0])[0]
+
+    failures = 0
+    print(f"{'tool':<30}{'p50 ms':>9}{'p99 ms':>9}{'lag99 ms':>10}{'speedup':>9}{'err':>5}  result")
+    for name, call in scenarios(emails, fresh_email).items():
+        result = await check(name, call, args)
+        control = name.endswith("(control)")
+        if not result["ok"] and not control:
+            failures += 1
+        verdict = "ok" if result["ok"] else ("blocks the loop (expected)" if control else "FAIL")
+        print(
+            f"{name:<30}{result['p50_ms']:>9.1f}{result['p99_ms']:>9.1f}{result['loop_lag_p99_ms']:>10.1f}"
+            f"{result['speedup']:>9.1f}{result['errors']:>5}  {verdict}"
+        )
+        if result["first_error"]:
+            print(f"  first error: {result['first_error']}")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--programs", type=int, default=2000)
+    parser.add_argument("--fs-latency-ms", type=float, default=15.0)
+    parser.add_argument("--max-lag-ms", type=float, default=50.0, help="allowed p99 event-loop lag")
+    parser.add_argument("--min-speedup", type=float, default=2.0, help="required concurrent vs sequential speedup")
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(run(args)) else 0)
+
+
+if __name__ == "__main__":
+    main()
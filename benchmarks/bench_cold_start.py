@@ -0,0 +1,126 @@
+"""
+Cold-start cost of the runner: import time, startup warm-up and the first two requests.
+
+Each run is a fresh interpreter, so module imports and client construction are really cold. GCP clients
+are replaced through the client registry with the offline fakes and Firebase is stubbed, as in
+run_benchmarks.py; the numbers therefore cover this process's own work, not network round trips.
+
+    python benchmarks/bench_cold_start.py --runs 5
+    python benchmarks/bench_cold_start.py --save-baseline
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+import harness
+
+BASELINE_PATH = Path(__file__).resolve().parent / "cold_start_baseline.json"
+
+# Runs inside the child interpreter; prints one JSON line of timings in milliseconds.
+_CHILD = r"""
+import asyncio, json, time
+import _offline
+_offline.setup()
+
+timings = {}
+started = time.perf_counter()
+import campus_connect.agent
+timings["import_agent"] = (time.perf_counter() - started) * 1000.0
+started = time.perf_counter()
+from campus_connect_runner import main
+timings["import_runner"] = (time.perf_counter() - started) * 1000.0
+
+import firebase_admin.auth
+import httpx
+from campus_connect.tools import clients
+from fakes import FakeBigQueryClient, FakeFirestore, ScriptedLlm, use_scripted_llm
+
+fs = FakeFirestore(latency_ms=0)
+fs.seed_users(1)
+clients.override("bigquery", FakeBigQueryClient(programs=2000, latency_ms={s: 0 for s in ("embed", "search", "count", "estimate")}))
+clients.override("firestore", fs.client())
+clients.override("firestore_async", fs.async_client())
+use_scripted_llm(main.campus_connect_agent, ScriptedLlm(latency_ms=0))
+firebase_admin.auth.verify_id_token = lambda token, check_revoked=False: {"uid": token, "email": token + "@example.com"}
+main.initialize_firebase_app = lambda: None
+main.firebase_ready = True
+
+
+async def requests():
+    started = time.perf_counter()
+    await main.warm_up()
+    timings["warm_up"] = (time.perf_counter() - started) * 1000.0
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench") as http:
+        for label in ("first_request", "second_request"):
+            started = time.perf_counter()
+            response = await http.post(
+                "/grestok-agent/",
+                json={"message": "Find me programs that fit my profile.", "session_id": label},
+                headers={"Authorization": "Bearer student0"},
+            )
+            response.raise_for_status()
+            timings[label] = (time.perf_counter() - started) * 1000.0
+
+asyncio.run(requests())
+print("TIMINGS " + json.dumps(timings))
+"""
+
+
+def _run_child() -> Dict[str, float]:
+    result = subprocess.run(
+        [sys.executable, "-c", _CHILD],
+        cwd=Path(__file__).resolve().parent,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "LOG_LEVEL": "WARNING"},
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith("TIMINGS "):
+            return json.loads(line[len("TIMINGS "):])
+    raise RuntimeError(f"cold-start child failed:\n{result.stderr[-2000:]}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    samples: Dict[str, List[float]] = {}
+    for _ in range(args.runs):
+        for stage, value in _run_child().items():
+            samples.setdefault(stage, []).append(value)
+
+    results = [
+        {
+            "name": f"cold_start.{stage}",
+            "requests": len(values),
+            "concurrency": 1,
+            "errors": 0,
+            "p50_ms": round(harness.percentile(values, 50), 1),
+            "p95_ms": round(harness.percentile(values, 95), 1),
+            "p99_ms": round(harness.percentile(values, 99), 1),
+            "throughput_rps": 0.0,
+            "loop_lag_p99_ms": 0.0,
+        }
+        for stage, values in samples.items()
+    ]
+    settings = {"runs": args.runs}
+    _, baseline = harness.load_baseline(args.baseline)
+    regressed = harness.print_report(results, {} if args.save_baseline else baseline, args.tolerance)
+    if args.save_baseline:
+        harness.save_results(args.baseline, results, settings)
+        print(f"baseline written to {args.baseline}")
+    sys.exit(1 if regressed and args.fail_on_regression else 0)
+
+
+if __name__ == "__main__":
+    main()
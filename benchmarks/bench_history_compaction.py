@@ -0,0 +1,92 @@
+"""
+Prompt size against conversation length, with and without history compaction.
+
+Builds a synthetic chat where every turn searches courses and every fifth turn re-reads the full
+profile (with resume text), then reports the estimated tokens ADK would send on the next model call.
+
+    python benchmarks/bench_history_compaction.py --turns 5 10 20 40 80
+"""
+
+import argparse
+import time
+
+import _offline
+
+_offline.setup()
+
+from google.genai import types  # noqa: E402
+
+from campus_connect import history  # noqa: E402
+
+
+def _hit(turn: int, rank: int) -> dict:
+    return {
+        "program_id": f"p{turn}-{rank}",
+        "school_id": f"s{rank}",
+        "name": f"MSc Data Science {turn}-{rank}",
+        "currency": "CAD",
+        "programLevel": "Master",
+        "program_category": "Computer Science",
+        "tuition": 24000.0 + rank,
+        "school_name": f"University {rank}",
+        "school_city": "Toronto",
+        "school_province": "ON",
+        "school_countryCode": "CA",
+        "similarity": 0.8 - rank / 100,
+    }
+
+
+def _profile_dump() -> dict:
+    return {
+        "found": True,
+        "email": "student@example.com",
+        "doc_id": "abc123",
+        "profile": {
+            "email": "student@example.com",
+            "firstName": "Sam",
+            "preferences": {"destinationCountries": ["Canada"], "studyLevel": "masters", "budget": None},
+            "resumeExtracted": {"rawText": "Experienced analyst. " * 400, "skills": ["python", "sql"] * 10},
+            "wizardSnapshot": None,
+        },
+    }
+
+
+def build_conversation(turns: int) -> list:
+    contents = []
+    for turn in range(turns):
+        contents.append(types.Content(role="user", parts=[types.Part(text=f"Show me more data science masters, turn {turn}. " * 3)]))
+        contents.append(types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(
+            name="search_and_count", args={"query_text": "data science masters", "use_cursor": True}))]))
+        contents.append(types.Content(role="user", parts=[types.Part(function_response=types.FunctionResponse(
+            name="search_and_count",
+            response={"hits": [_hit(turn, rank) for rank in range(15)], "next_cursor": f"c{turn}",
+                      "totals": {"programs": 120, "schools": 40, "countries": 1, "status": "exact"}}))]))
+        if turn % 5 == 0:
+            contents.append(types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(
+                name="get_fs_user_profile", args={"email": "student@example.com"}))]))
+            contents.append(types.Content(role="user", parts=[types.Part(function_response=types.FunctionResponse(
+                name="get_fs_user_profile", response=_profile_dump()))]))
+        contents.append(types.Content(role="model", parts=[types.Part(text="Here are fifteen more programs that fit. " * 15)]))
+    return contents
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, nargs="+", default=[5, 10, 20, 40, 80])
+    parser.add_argument("--budget", type=int, default=history.HISTORY_TOKEN_BUDGET)
+    parser.add_argument("--keep-turns", type=int, default=history.HISTORY_KEEP_TURNS)
+    args = parser.parse_args()
+
+    print(f"{'turns':>6} {'raw_tokens':>11} {'compacted':>10} {'ratio':>6} {'contents':>9} {'ms':>7}")
+    for turns in args.turns:
+        contents = build_conversation(turns)
+        raw = history.estimate_tokens(contents)
+        started = time.perf_counter()
+        compacted = history.compact_contents(contents, token_budget=args.budget, keep_turns=args.keep_turns)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        after = history.estimate_tokens(compacted)
+        print(f"{turns:>6} {raw:>11} {after:>10} {after / raw:>6.2f} {len(compacted):>9} {elapsed_ms:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
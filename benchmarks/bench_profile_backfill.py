@@ -0,0 +1,109 @@
+"""
+Throughput of the profile backfill job (`campus_connect_runner.profile_backfill`) over a seeded `/Users`
+collection in which a share of the documents has legacy shapes: fieldOfStudy as a string, skills as a
+dict of lists or a single string, cgpa stored as strings.
+
+Every run starts from a fresh copy of the collection and drives the job against the in-memory Firestore
+fake, whose simulated latency applies per query page and per 20-write BulkWriter batch. The report shows
+documents per second, documents changed, artifacts written (with --migrate-resumes), write operations and
+how many documents a second dry run still finds to change (it should be none). "interrupted + resumed"
+stops after half of the collection and continues from the checkpoint state.
+
+    python benchmarks/bench_profile_backfill.py
+    python benchmarks/bench_profile_backfill.py --users 20000 --workers 1 4 8 --latency-ms 20
+"""
+
+import argparse
+import copy
+import logging
+import time
+from typing import Any, Dict, List
+
+import _offline
+
+_offline.setup()
+
+from campus_connect_runner.profile_backfill import Backfill, logger, parse_args  # noqa: E402
+from bench_profile_merge import stored_profile  # noqa: E402
+from fakes import FakeFirestore  # noqa: E402
+
+RUNS = (
+    ("dry run", ["--dry-run"]),
+    ("write", []),
+    ("write + migrate resumes", ["--migrate-resumes"]),
+    ("interrupted + resumed", []),
+)
+
+
+def legacy(doc: Dict[str, Any], i: int) -> Dict[str, Any]:
+    """`doc` in one of the shapes older clients wrote."""
+    kind = i % 4
+    if kind == 0:
+        doc["preferences"]["fieldOfStudy"] = "Data Science"
+    elif kind == 1:
+        doc["resumeExtracted"]["skills"] = {"languages": ["Python", "SQL"], "tools": ["dbt", "Airflow"]}
+    elif kind == 2:
+        doc["resumeExtracted"]["skills"] = "Python"
+    else:
+        doc["academicProfile"] = {"cgpa": "3.7", "cgpaScale": "4"}
+    return doc
+
+
+def seed(users: int, legacy_share: float, raw_text_kb: int) -> Dict[str, Dict[str, Any]]:
+    base = stored_profile(raw_text_kb, 20, 2, 4)
+    collection = {}
+    legacy_count = 0
+    for i in range(users):
+        doc = copy.deepcopy(base)
+        doc["email"] = f"student{i}@example.com"
+        if legacy_count < (i + 1) * legacy_share:
+            doc = legacy(doc, legacy_count)
+            legacy_count += 1
+        collection[f"user-{i:07d}"] = doc
+    return collection
+
+
+def run(store: FakeFirestore, argv: List[str], interrupt_after: int = 0) -> Backfill:
+    job = Backfill(store.client(), parse_args([*argv, "--limit", str(interrupt_after)]))
+    job.run()
+    if interrupt_after:
+        state = job.state()
+        job = Backfill(store.client(), parse_args(argv))
+        job.resume_from(state)
+        job.run()
+    return job
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--legacy-share", type=float, default=0.3, help="share of documents in a legacy shape")
+    parser.add_argument("--raw-text-kb", type=int, default=8)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=10.0)
+    args = parser.parse_args()
+    logger.setLevel(logging.WARNING)   # per-page progress lines
+
+    collection = seed(args.users, args.legacy_share, args.raw_text_kb)
+    print(f"{'run':<26}{'workers':>8}{'docs/s':>9}{'changed':>9}{'artifacts':>10}{'writes':>8}{'left':>6}")
+    for workers in args.workers:
+        for label, extra in RUNS:
+            store = FakeFirestore(latency_ms=args.latency_ms)
+            store.collections["Users"] = copy.deepcopy(collection)
+            argv = ["--workers", str(workers), "--page-size", str(args.page_size), *extra]
+            interrupt_after = args.users // 2 if label.startswith("interrupted") else 0
+
+            started = time.perf_counter()
+            job = run(store, argv, interrupt_after)
+            elapsed = time.perf_counter() - started
+            writes = store.writes
+
+            second = run(store, ["--dry-run", "--workers", "1", "--page-size", str(args.page_size)])
+            totals = job.totals
+            print(f"{label:<26}{workers:>8}{totals['scanned'] / elapsed:>9.0f}{totals['changed']:>9}"
+                  f"{totals['artifacts']:>10}{writes:>8}{second.totals['changed']:>6}")
+
+
+if __name__ == "__main__":
+    main()
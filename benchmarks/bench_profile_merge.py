@@ -0,0 +1,189 @@
+"""
+Profile updates on large profiles: the schema-aware merge (`profile_merge`) against the recursive_update
+it replaced.
+
+Each case seeds one `/Users` document, applies the same resume update with both implementations and
+reports bytes read, bytes written, field paths written, resume entries that reached the document, and the
+per-update time (read + diff + write against the in-memory Firestore fake with no simulated latency). The
+"modelled" column adds a Firestore round trip per call plus transfer time at --mbps, which is where the
+read and write sizes turn into latency on a real network.
+
+    python benchmarks/bench_profile_merge.py
+    python benchmarks/bench_profile_merge.py --raw-text-kb 200 --iterations 500
+"""
+
+import argparse
+import copy
+import json
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import _offline
+
+_offline.setup()
+
+from campus_connect.schema.user_profile import GrestokUser  # noqa: E402
+from campus_connect.tools import profile_cache, profile_merge, update_profile_from_resume  # noqa: E402
+from fakes import FakeFirestore  # noqa: E402
+
+EMAIL = "large@example.com"
+
+
+def legacy_compute_updated_fields(existing_data: Dict[str, Any], grestok_user: GrestokUser) -> Dict[str, Any]:
+    """update_profile_from_resume's diff before profile_merge, kept verbatim as the reference."""
+    updated_fields: Dict[str, Any] = {}
+    new_data = grestok_user.model_dump(by_alias=True, exclude_none=True)
+
+    def recursive_update(existing: Dict[str, Any], new: Dict[str, Any], path: str = ""):
+        for key, value in new.items():
+            current_path = f"{path}.{key}" if path else key
+            if isinstance(value, dict):
+                if key not in existing or not isinstance(existing.get(key), dict):
+                    updated_fields[current_path] = value
+                else:
+                    recursive_update(existing[key], value, current_path)
+            else:
+                if key not in existing or existing[key] in (None, "", [], {}):
+                    updated_fields[current_path] = value
+
+    recursive_update(existing_data, new_data)
+    return updated_fields
+
+
+def _education(i: int) -> Dict[str, Any]:
+    return {"institution": f"University {i}", "degree": ("BSc", "MSc", "PhD")[i % 3], "year": 2010 + i,
+            "fieldOfStudy": "Computer Science", "grade": "First class"}
+
+
+def _job(i: int) -> Dict[str, Any]:
+    return {"company": f"Company {i}", "title": f"Engineer {i % 4}", "startDate": f"{2012 + i}-01",
+            "endDate": f"{2013 + i}-01", "description": "Built data pipelines and dashboards. " * 6}
+
+
+def stored_profile(raw_text_kb: int, skills: int, education: int, jobs: int) -> Dict[str, Any]:
+    return {
+        "email": EMAIL,
+        "firstName": "Large",
+        "lastName": "Profile",
+        "preferences": {
+            "destinationCountries": ["Canada", "Germany"],
+            "studyLevel": "masters",
+            "fieldOfStudy": {"category": "Computer Science", "focus": "Data Science"},
+        },
+        "academicProfile": {"cgpa": 3.4, "cgpaScale": 4.0},
+        "resumeExtracted": {
+            "rawText": ("Data analyst with Python and SQL experience. " * 23)[:1024] * raw_text_kb,
+            "skills": [f"Skill {i}" for i in range(skills)],
+            "education": [_education(i) for i in range(education)],
+            "workExperience": [_job(i) for i in range(jobs)],
+        },
+    }
+
+
+def resume_update(stored: Dict[str, Any], with_raw_text: bool) -> Dict[str, Any]:
+    """A re-uploaded resume: mostly what is stored (case and spacing differ), plus a few new entries."""
+    resume = stored["resumeExtracted"]
+    update = {
+        "firstName": "Large",
+        "phoneNumber": "+1 555 0100",
+        "academicProfile": {
+            "cgpa": 3.4,
+            "highestQualification": "Masters",
+            "englishScores": {"ieltsOverall": 7.5},
+            "standardizedTests": {"greTotal": 320, "greQuant": 165},
+        },
+        "resumeExtracted": {
+            "skills": [skill.upper() for skill in resume["skills"]] + ["Rust", "Kubernetes", "dbt"],
+            "education": [dict(entry, institution=f" {entry['institution'].lower()} ") for entry in resume["education"]]
+            + [_education(len(resume["education"]))],
+            "workExperience": [dict(job, location="Remote") for job in resume["workExperience"][:3]]
+            + [_job(len(resume["workExperience"]) + k) for k in range(2)],
+        },
+    }
+    if with_raw_text:
+        update["resumeExtracted"]["rawText"] = resume["rawText"]
+    return update
+
+
+def _size(value: Any) -> int:
+    return len(json.dumps(value, default=str, separators=(",", ":")))
+
+
+def _entries(doc: Dict[str, Any]) -> int:
+    resume = doc.get("resumeExtracted") or {}
+    return sum(len(resume.get(key) or []) for key in ("skills", "education", "workExperience"))
+
+
+Loader = Callable[[Any, GrestokUser], Tuple[str, Dict[str, Any]]]
+
+
+def legacy_load(users_ref, user: GrestokUser) -> Tuple[str, Dict[str, Any]]:
+    return update_profile_from_resume._load_existing(users_ref, EMAIL)
+
+
+def masked_load(users_ref, user: GrestokUser) -> Tuple[str, Dict[str, Any]]:
+    return update_profile_from_resume._load_existing(users_ref, EMAIL, profile_merge.read_mask(user))
+
+
+IMPLEMENTATIONS: List[Tuple[str, Loader, Callable[[Dict[str, Any], GrestokUser], Dict[str, Any]]]] = [
+    ("legacy", legacy_load, legacy_compute_updated_fields),
+    ("merge", masked_load, profile_merge.compute_update),
+]
+
+
+def run_case(name: str, stored: Dict[str, Any], payload: Dict[str, Any], args: argparse.Namespace) -> None:
+    store = FakeFirestore(latency_ms=0)
+    users_ref = store.client().collection("Users")
+    _, user = update_profile_from_resume._prepare_update(EMAIL, payload)
+
+    for impl, load, diff in IMPLEMENTATIONS:
+        timings: List[float] = []
+        for _ in range(args.iterations):
+            store.collections["Users"] = {"user-large": copy.deepcopy(stored)}
+            profile_cache.invalidate(EMAIL)
+            profile_cache.remember_doc_id(EMAIL, "user-large")   # both read by doc id, as after the first call
+            started = time.perf_counter()
+            doc_id, existing = load(users_ref, user)
+            updated_fields = diff(existing, user)
+            if updated_fields:
+                users_ref.document(doc_id).update(updated_fields)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        read_bytes, write_bytes = _size(existing), _size(updated_fields)
+        added = _entries(store.collections["Users"]["user-large"]) - _entries(stored)
+        cpu_ms = statistics.median(timings)
+        transfer_ms = (read_bytes + write_bytes) * 8 / (args.mbps * 1000)
+        modelled_ms = cpu_ms + 2 * args.rtt_ms + transfer_ms
+        print(f"{name:<26}{impl:<8}{read_bytes:>11}{write_bytes:>11}{len(updated_fields):>7}{added:>8}"
+              f"{cpu_ms:>9.2f}{modelled_ms:>13.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--raw-text-kb", type=int, default=60)
+    parser.add_argument("--skills", type=int, default=120)
+    parser.add_argument("--education", type=int, default=6)
+    parser.add_argument("--jobs", type=int, default=25)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--rtt-ms", type=float, default=15.0, help="Firestore round trip per call")
+    parser.add_argument("--mbps", type=float, default=50.0, help="network throughput for the modelled column")
+    args = parser.parse_args()
+
+    stored = stored_profile(args.raw_text_kb, args.skills, args.education, args.jobs)
+    bare = {key: value for key, value in stored.items() if key not in ("academicProfile", "resumeExtracted")}
+    bare["resumeExtracted"] = {"rawText": stored["resumeExtracted"]["rawText"]}
+    cases = [
+        ("large, resume re-upload", stored, resume_update(stored, with_raw_text=False)),
+        ("large, with rawText", stored, resume_update(stored, with_raw_text=True)),
+        ("first resume", bare, resume_update(stored, with_raw_text=False)),
+    ]
+
+    print(f"{'case':<26}{'impl':<8}{'read B':>11}{'write B':>11}{'paths':>7}{'entries':>8}{'cpu ms':>9}"
+          f"{'modelled ms':>13}")
+    for name, doc, payload in cases:
+        run_case(name, doc, payload, args)
+
+
+if __name__ == "__main__":
+    main()
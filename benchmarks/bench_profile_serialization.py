@@ -0,0 +1,78 @@
+"""
+Validate/dump throughput for profile payloads: the per-view TypeAdapters in `profile_format` against
+`GrestokUser.model_validate(...).model_dump(...)`, which get_fs_user_profile ran on every call before.
+
+Documents range from the seeded benchmark user to a large profile with a long resume; "missing" is the
+all-null payload for a user without a document. For each document and path the report shows calls per
+second, microseconds per call and the size of the payload (JSON characters) that goes to the caller.
+
+    python benchmarks/bench_profile_serialization.py
+    python benchmarks/bench_profile_serialization.py --number 5000 --raw-text-kb 200
+"""
+
+import argparse
+import json
+import statistics
+import timeit
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import _offline
+
+_offline.setup()
+
+from campus_connect.schema.user_profile import GrestokUser  # noqa: E402
+from campus_connect.tools import profile_format  # noqa: E402
+from campus_connect.tools.projection import project  # noqa: E402
+from bench_profile_merge import stored_profile  # noqa: E402
+from fakes import FakeFirestore  # noqa: E402
+
+REST_FIELDS = ["preferences", "academicProfile.cgpa", "academicProfile.englishScores"]
+
+
+def documents(raw_text_kb: int) -> List[Tuple[str, Optional[Dict[str, Any]]]]:
+    store = FakeFirestore(latency_ms=0)
+    store.seed_users(1)
+    return [
+        ("seeded", store.collections["Users"]["user-0"]),
+        ("medium", stored_profile(max(1, raw_text_kb // 6), 30, 3, 6)),
+        ("large", stored_profile(raw_text_kb, 120, 6, 25)),
+        ("missing", None),
+    ]
+
+
+def paths(doc: Optional[Dict[str, Any]]) -> List[Tuple[str, Callable[[], Dict[str, Any]]]]:
+    if doc is None:
+        return [
+            ("model skeleton", lambda: GrestokUser(email="x@example.com").model_dump(by_alias=True, exclude_none=False)),
+            ("cached skeleton", lambda: profile_format.empty_profile("x@example.com")),
+        ]
+    return [
+        ("model_validate+dump", lambda: GrestokUser.model_validate(doc).model_dump(by_alias=True, exclude_none=False)),
+        ("view full", lambda: profile_format.dump_profile(doc, "full")),
+        ("view standard", lambda: profile_format.dump_profile(doc, "standard")),
+        ("view preferences_academics", lambda: profile_format.dump_profile(doc, "preferences_academics")),
+        ("REST fields, dump+project", lambda: project(
+            GrestokUser.model_validate(doc).model_dump(by_alias=True, exclude_none=False, mode="json"), REST_FIELDS)),
+        ("REST fields, adapter", lambda: profile_format.dump_profile(doc, fields=REST_FIELDS, mode="json")),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=2000, help="calls per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs; the median is reported")
+    parser.add_argument("--raw-text-kb", type=int, default=60)
+    args = parser.parse_args()
+
+    print(f"{'document':<10}{'path':<30}{'calls/s':>11}{'us/call':>10}{'payload':>10}")
+    for name, doc in documents(args.raw_text_kb):
+        for label, call in paths(doc):
+            call()  # builds and caches the adapter outside the timed runs
+            runs = timeit.repeat(call, number=args.number, repeat=args.repeat)
+            per_call = statistics.median(runs) / args.number
+            payload = len(json.dumps(call(), default=str, separators=(",", ":")))
+            print(f"{name:<10}{label:<30}{1 / per_call:>11.0f}{per_call * 1e6:>10.1f}{payload:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Precomputed recommendations (`campus_connect.tools.recommendations`) against the fakes.
+
+* "live search" is what the agent did before: build a query from the profile and run search_and_count
+  with the student's filters, paying for embedding, vector search and totals on every question.
+  "precomputed" is get_recommendations reading the stored result (first from Firestore, then from the
+  process cache).
+* "rapid edits" saves each profile `--edits` times in quick succession; the debounce coalesces them so
+  each user is refreshed once.
+* "burst" schedules more users than the queue holds at once; the overflow is dropped (and picked up
+  again the next time their recommendations are read) instead of growing without bound.
+
+    python benchmarks/bench_recommendations.py
+    python benchmarks/bench_recommendations.py --users 200 --edits 20 --queue-size 50
+"""
+
+import argparse
+import logging
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+import _offline
+
+_offline.setup()
+
+from campus_connect.tools import clients, get_bq_courses, recommendations  # noqa: E402
+from campus_connect.tools.get_recommendations import get_recommendations  # noqa: E402
+from fakes import FakeBigQueryClient, FakeFirestore  # noqa: E402
+
+
+def _timed(calls: List[Callable[[], Any]]) -> float:
+    """Median milliseconds per call."""
+    samples = []
+    for call in calls:
+        started = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - started) * 1000.0)
+    return statistics.median(samples)
+
+
+def _queue(args: argparse.Namespace, maxsize: int) -> recommendations.RefreshQueue:
+    queue = recommendations.RefreshQueue(
+        recommendations.refresh, args.workers, maxsize, args.debounce_ms / 1000.0, args.debounce_ms * 6 / 1000.0
+    )
+    recommendations._queue = queue
+    return queue
+
+
+def _live(store: FakeFirestore, email: str) -> Dict[str, Any]:
+    data = next(iter(d for d in store.collections["Users"].values() if d["email"] == email))
+    texts, _, filter_args = recommendations.profile_query(data)
+    return get_bq_courses.search_and_count(" ".join(texts), limit=recommendations.RECOMMENDATIONS_TOP_N, **filter_args)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=40)
+    parser.add_argument("--edits", type=int, default=10, help="saves per user in the rapid-edit scenario")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--queue-size", type=int, default=16)
+    parser.add_argument("--debounce-ms", type=float, default=50.0)
+    parser.add_argument("--fs-latency-ms", type=float, default=15.0)
+    args = parser.parse_args()
+    for logger in (recommendations.logger, get_bq_courses.logger):
+        logger.setLevel(logging.WARNING)   # one line per refresh otherwise
+
+    bq = FakeBigQueryClient(programs=5000)
+    store = FakeFirestore(latency_ms=args.fs_latency_ms)
+    clients.override("bigquery", bq)
+    clients.override("firestore", store.client())
+    clients.override("firestore_async", store.async_client())
+    emails = store.seed_users(args.users)
+    doc_ids = {email: f"user-{i}" for i, email in enumerate(emails)}
+
+    # Live search versus reading precomputed results.
+    queue = _queue(args, args.users)
+    for email in emails:
+        queue.schedule(doc_ids[email], email)
+    queue.wait_idle()
+    live_ms = _timed([lambda email=email: _live(store, email) for email in emails])
+    recommendations._documents.clear()
+    cold_ms = _timed([lambda email=email: get_recommendations(email) for email in emails])
+    warm_ms = _timed([lambda email=email: get_recommendations(email) for email in emails])
+    statuses = {get_recommendations(email)["status"] for email in emails}
+    print(f"{'read path':<26}{'median ms':>10}")
+    print(f"{'live search':<26}{live_ms:>10.1f}")
+    print(f"{'precomputed (Firestore)':<26}{cold_ms:>10.1f}")
+    print(f"{'precomputed (cached)':<26}{warm_ms:>10.1f}")
+    print(f"statuses after precompute: {sorted(statuses)}")
+
+    # Rapid edits: every save changes the inputs; the debounce keeps one refresh per user.
+    queue = _queue(args, args.users)
+    jobs_before = dict(bq.jobs)
+    started = time.perf_counter()
+    for edit in range(args.edits):
+        for email in emails:
+            doc = store.collections["Users"][doc_ids[email]]
+            doc["preferences"]["fieldOfStudy"]["focus"] = f"Data Science {edit}"
+            recommendations.schedule(email, doc_ids[email], doc)
+    queue.wait_idle()
+    elapsed = time.perf_counter() - started
+    searches = bq.jobs["search"] - jobs_before["search"]
+    counts = queue.stats()
+    print()
+    print(f"{'rapid edits':<26}{'saves':>7}{'refreshes':>11}{'coalesced':>11}{'searches':>10}{'s':>7}")
+    print(f"{'':<26}{args.edits * args.users:>7}{counts['completed']:>11}{counts['coalesced']:>11}{searches:>10}{elapsed:>7.2f}")
+    fresh = sum(get_recommendations(email)["status"] == "fresh" for email in emails)
+    print(f"fresh after the queue drained: {fresh}/{len(emails)}")
+
+    # Burst: more users than the queue holds.
+    queue = _queue(args, args.queue_size)
+    for email in emails:
+        store.collections["Users"][doc_ids[email]]["preferences"]["studyLevel"] = "phd"
+        recommendations.schedule(email, doc_ids[email])
+    queue.wait_idle()
+    counts = queue.stats()
+    pending = sum(get_recommendations(email)["pending"] for email in emails)
+    queue.wait_idle()
+    fresh = sum(get_recommendations(email)["status"] == "fresh" for email in emails)
+    print()
+    print(f"{'burst':<26}{'users':>7}{'queue':>7}{'dropped':>9}{'requeued on read':>18}{'fresh after':>13}")
+    print(f"{'':<26}{len(emails):>7}{args.queue_size:>7}{counts['dropped']:>9}{pending:>18}{fresh:>13}")
+    queue.stop()
+
+
+if __name__ == "__main__":
+    main()
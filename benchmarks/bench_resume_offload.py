@@ -0,0 +1,103 @@
+"""
+Profile reads against resume size, with the resume inline in the `/Users` document (as before) and moved
+into a resume artifact (`resume_store`).
+
+For each resume size one user is stored both ways. The report shows the bytes of the user document that
+every profile read transfers, the size of the artifact, and the median time of an uncached
+get_fs_user_profile in the default view, in the full view (which loads the artifact; its decoded content
+is cached, so the second column is the warm case) and of a preferences update, all against the
+in-memory Firestore fake with no simulated latency. "modelled" adds a Firestore round trip and the
+transfer time of the user document at --mbps to the default-view read.
+
+    python benchmarks/bench_resume_offload.py
+    python benchmarks/bench_resume_offload.py --sizes-kb 10 100 400 --iterations 200
+"""
+
+import argparse
+import json
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+import _offline
+
+_offline.setup()
+
+from campus_connect.tools import clients, get_fs_user_profile, profile_cache, resume_store  # noqa: E402
+from campus_connect.tools import update_profile_from_resume  # noqa: E402
+from bench_profile_merge import stored_profile  # noqa: E402
+from fakes import FakeFirestore  # noqa: E402
+
+EMAIL = "large@example.com"
+
+
+def _median_ms(call: Callable[[], Any], iterations: int, before: Callable[[], None]) -> float:
+    timings: List[float] = []
+    for _ in range(iterations):
+        before()
+        started = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def _size(value: Any) -> int:
+    return len(json.dumps(value, default=str, separators=(",", ":")))
+
+
+def offloaded(doc: Dict[str, Any], store: FakeFirestore, doc_id: str) -> Dict[str, Any]:
+    """`doc` as it looks once its resume fields live in an artifact (what the backfill job produces)."""
+    writes, artifact = resume_store.plan_writes(doc, {}, migrate=True)
+    store.collections.setdefault(f"Users/{doc_id}/{resume_store.RESUME_COLLECTION}", {})[artifact[0]] = artifact[1]
+    store.collections["Users"][doc_id] = doc
+    store._update("Users", doc_id, writes)
+    return store.collections["Users"][doc_id]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-kb", type=int, nargs="+", default=[4, 20, 60, 200], help="rawText sizes")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--rtt-ms", type=float, default=15.0, help="Firestore round trip per call")
+    parser.add_argument("--mbps", type=float, default=50.0, help="network throughput for the modelled column")
+    args = parser.parse_args()
+
+    print(f"{'resume':>7}  {'layout':<9}{'doc B':>9}{'artifact B':>12}{'read ms':>9}{'full cold':>11}"
+          f"{'full warm':>11}{'update ms':>11}{'modelled':>10}")
+    for size_kb in args.sizes_kb:
+        for layout in ("inline", "artifact"):
+            store = FakeFirestore(latency_ms=0)
+            clients.override("firestore", store.client())
+            doc = stored_profile(size_kb, 120, 6, 25)
+            store.collections["Users"] = {"user-large": doc}
+            artifact_bytes = 0
+            if layout == "artifact":
+                doc = offloaded(doc, store, "user-large")
+                artifact_bytes = resume_store.artifact_ref(doc)["compressedBytes"]
+
+            def uncached() -> None:
+                profile_cache.invalidate(EMAIL)
+
+            def cold() -> None:
+                uncached()
+                resume_store._artifacts.pop((resume_store.artifact_ref(doc) or {}).get("id"))
+
+            read_ms = _median_ms(lambda: get_fs_user_profile.get_fs_user_profile(EMAIL), args.iterations, uncached)
+            full = lambda: get_fs_user_profile.get_fs_user_profile(EMAIL, view="full")  # noqa: E731
+            cold_ms = _median_ms(full, args.iterations, cold)
+            warm_ms = _median_ms(full, args.iterations, uncached)
+            update_ms = _median_ms(
+                lambda: update_profile_from_resume.update_profile_from_resume(
+                    EMAIL, {"preferences": {"intake": {"month": "September", "year": 2027}}}
+                ),
+                args.iterations,
+                uncached,
+            )
+            doc_bytes = _size(store.collections["Users"]["user-large"])
+            modelled_ms = read_ms + args.rtt_ms + doc_bytes * 8 / (args.mbps * 1000)
+            print(f"{size_kb:>5}KB  {layout:<9}{doc_bytes:>9}{artifact_bytes:>12}{read_ms:>9.2f}{cold_ms:>11.2f}"
+                  f"{warm_ms:>11.2f}{update_ms:>11.2f}{modelled_ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
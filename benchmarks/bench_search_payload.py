@@ -0,0 +1,105 @@
+"""
+Size of the search_and_count payload the model sees, per output shape.
+
+Runs representative queries against the offline catalog and reports the function-response size in
+characters and tokens for each output_format (and a typical field projection), relative to the shape
+search_and_count returned before output formats existed ("original": records with full-precision
+similarity). Tokens are the character-based estimate history compaction uses; with --count-tokens and
+Gemini credentials they are also counted by the model's tokenizer.
+
+    python benchmarks/bench_search_payload.py
+    python benchmarks/bench_search_payload.py --limit 30 --count-tokens
+"""
+
+import argparse
+import json
+from typing import Any, Dict, List, Optional
+
+import _offline
+
+_offline.setup()
+
+from google.genai import types  # noqa: E402
+
+from campus_connect import history  # noqa: E402
+from campus_connect.tools import clients, get_bq_courses, result_format  # noqa: E402
+from fakes import FakeBigQueryClient  # noqa: E402
+
+QUERIES = [
+    ("data science masters with machine learning", {"destination_countries": ["Canada"], "study_level": "masters"}),
+    ("mechanical engineering bachelor", {"study_level": "bachelors"}),
+    ("MBA in finance", {"max_tuition": 40000, "tuition_currency": "GBP"}),
+    ("nursing diploma", {}),
+    ("computer science phd artificial intelligence", {"destination_countries": ["Germany", "Ireland"]}),
+]
+
+SHAPES = [
+    ("original", "records", None),
+    ("records", "records", None),
+    ("compact", "compact", None),
+    ("columnar", "columnar", None),
+    ("columnar+fields", "columnar", ["name", "school_name", "school_countryCode", "tuition", "currency", "similarity"]),
+]
+
+
+def _content(response: Dict[str, Any]) -> types.Content:
+    return types.Content(role="user", parts=[types.Part(function_response=types.FunctionResponse(
+        name="search_and_count", response=response))])
+
+
+def _model_tokens(client: Optional[Any], model: str, content: types.Content) -> Optional[int]:
+    if client is None:
+        return None
+    return client.models.count_tokens(model=model, contents=[content]).total_tokens
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=15)
+    parser.add_argument("--programs", type=int, default=5000)
+    parser.add_argument("--count-tokens", action="store_true", help="also count tokens with the Gemini API")
+    parser.add_argument("--model", default="gemini-2.5-flash")
+    args = parser.parse_args()
+
+    clients.override("bigquery", FakeBigQueryClient(
+        programs=args.programs, latency_ms={stage: 0 for stage in ("embed", "search", "count", "estimate")}
+    ))
+    genai_client = None
+    if args.count_tokens:
+        from google import genai
+
+        genai_client = genai.Client()
+
+    digits = result_format.SIMILARITY_DIGITS
+    totals: Dict[str, List[int]] = {name: [0, 0, 0] for name, _, _ in SHAPES}
+    print(f"{'query':<46}{'shape':<17}{'chars':>8}{'est tok':>9}{'model tok':>11}{'ratio':>7}")
+    for query, filters in QUERIES:
+        baseline = None
+        for name, output_format, fields in SHAPES:
+            result_format.SIMILARITY_DIGITS = 17 if name == "original" else digits
+            response = get_bq_courses.search_and_count(
+                query, limit=args.limit, use_cursor=True, use_local_index=False, totals_mode="estimate",
+                output_format=output_format, fields=fields, **filters,
+            )
+            response.pop("timings_ms", None)  # varies run to run and is not what this measures
+            content = _content(response)
+            chars = len(json.dumps(response, ensure_ascii=False, separators=(",", ":")))
+            estimated = history.estimate_tokens([content])
+            counted = _model_tokens(genai_client, args.model, content)
+            baseline = baseline or (counted or estimated)
+            ratio = (counted or estimated) / baseline
+            totals[name][0] += chars
+            totals[name][1] += estimated
+            totals[name][2] += counted or 0
+            print(f"{query[:44]:<46}{name:<17}{chars:>8}{estimated:>9}{counted if counted is not None else '-':>11}"
+                  f"{ratio:>7.2f}")
+
+    print()
+    original = totals["original"]
+    for name, (chars, estimated, counted) in totals.items():
+        reduction = (original[2] / counted) if counted else (original[1] / estimated)
+        print(f"{'all queries':<46}{name:<17}{chars:>8}{estimated:>9}{counted or '-':>11}  {reduction:.1f}x smaller")
+
+
+if __name__ == "__main__":
+    main()
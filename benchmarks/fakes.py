@@ -0,0 +1,676 @@
+"""
+Offline stand-ins for BigQuery, Firestore and Gemini.
+
+* FakeBigQueryClient answers the statements get_bq_courses issues (ML.GENERATE_EMBEDDING, VECTOR_SEARCH
+  hits, batched VECTOR_SEARCH, ML.DISTANCE counts, VECTOR_SEARCH estimates) from a synthetic clustered catalog with NumPy, so
+  neighbours, paging and totals behave like the real index.
+* FakeFirestore keeps `/Users` documents in memory behind the sync `Client` and async `AsyncClient` call
+  shapes the tools use, counting reads, queries and writes; the sync client also has a BulkWriter that
+  honours last-update-time preconditions, for the backfill job.
+* ScriptedLlm is a BaseLlm that plays a fixed conversation: profile lookup, course search, final answer,
+  and a profile update when the message mentions a resume.
+
+Each fake can sleep to simulate service latency, so concurrency effects show up in the numbers.
+"""
+
+import asyncio
+import copy
+import datetime
+import hashlib
+import json
+import re
+import threading
+import time
+from typing import Any, AsyncGenerator, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.api_core import exceptions
+from google.cloud.firestore import DELETE_FIELD
+from google.genai import types
+
+from campus_connect.tools.projection import project
+from campus_connect.tools.result_format import hit_count
+
+COUNTRIES = ("CA", "GB", "DE", "AU", "US", "IE")
+LEVELS = ("Bachelor of Science", "Master of Science", "Master of Business Administration", "PhD", "Diploma")
+CURRENCIES = {"CA": "CAD", "GB": "GBP", "DE": "EUR", "AU": "AUD", "US": "USD", "IE": "EUR"}
+
+
+# ---------- BigQuery ----------
+
+class FakeJob:
+    def __init__(self, rows: List[Dict[str, Any]], latency: float, bytes_processed: int):
+        self._rows = rows
+        self._latency = latency
+        self._ready_at = time.perf_counter() + latency  # jobs run concurrently once submitted
+        self.total_bytes_processed = bytes_processed
+        self.total_bytes_billed = bytes_processed
+        self.slot_millis = int(latency * 1000)
+        self.cache_hit = False
+
+    def result(self) -> List[Dict[str, Any]]:
+        remaining = self._ready_at - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+        return self._rows
+
+
+class FakeBigQueryClient:
+    def __init__(
+        self,
+        programs: int = 5000,
+        dim: int = 768,
+        topics: int = 40,
+        latency_ms: Optional[Dict[str, float]] = None,
+        seed: int = 7,
+    ):
+        rng = np.random.default_rng(seed)
+        self.dim = dim
+        self.topics = topics
+        self.latency = {"embed": 0.08, "search": 0.15, "count": 0.3, "estimate": 0.12}
+        for stage, value in (latency_ms or {}).items():
+            self.latency[stage] = value / 1000.0
+        self.jobs: Dict[str, int] = {stage: 0 for stage in self.latency}
+        self._lock = threading.Lock()
+
+        self._centers = self._unit(rng.standard_normal((topics, dim)))
+        topic_of = rng.integers(0, topics, size=programs)
+        noise = self._unit(rng.standard_normal((programs, dim))) * 0.5
+        self._vectors = self._unit(self._centers[topic_of] + noise).astype(np.float32)
+        self._rows = []
+        for i in range(programs):
+            country = COUNTRIES[i % len(COUNTRIES)]
+            self._rows.append({
+                "gt_program_id": i,
+                "gt_school_id": i % 400,
+                "name": f"Program {i} (topic {topic_of[i]})",
+                "currency": CURRENCIES[country],
+                "programLevel": LEVELS[i % len(LEVELS)],
+                "program_category": f"Category {topic_of[i] % 12}",
+                "tuition": float(8000 + (i * 37) % 40000),
+                "school_name": f"University {i % 400}",
+                "school_city": f"City {i % 400 % 90}",
+                "school_province": f"Province {i % 400 % 20}",
+                "school_countryCode": country,
+            })
+        self._countries = np.array([row["school_countryCode"] for row in self._rows])
+        self._tuition = np.array([row["tuition"] for row in self._rows])
+        self._currency = np.array([row["currency"] for row in self._rows])
+        self._levels = [row["programLevel"].lower() for row in self._rows]
+
+    @staticmethod
+    def _unit(matrix: np.ndarray) -> np.ndarray:
+        return matrix / np.linalg.norm(matrix, axis=-1, keepdims=True)
+
+    def embed(self, text: str) -> List[float]:
+        digest = hashlib.sha1(text.casefold().encode("utf-8")).digest()
+        rng = np.random.default_rng(int.from_bytes(digest[:8], "big"))
+        center = self._centers[int.from_bytes(digest[8:12], "big") % self.topics]
+        return self._unit(center + self._unit(rng.standard_normal(self.dim)) * 0.5).tolist()
+
+    def _mask(self, params: Dict[str, Any]) -> np.ndarray:
+        mask = np.ones(len(self._rows), dtype=bool)
+        if params.get("f_countries"):
+            mask &= np.isin(self._countries, [c.upper() for c in params["f_countries"]])
+        if params.get("f_max_tuition") is not None:
+            mask &= self._tuition <= params["f_max_tuition"]
+        if params.get("f_cap_currencies"):
+            # Budget converted per program currency; currencies without a cap are kept.
+            caps = dict(zip(params["f_cap_currencies"], params["f_caps"]))
+            limit = np.array([caps.get(currency, np.inf) for currency in self._currency])
+            mask &= self._tuition <= limit
+        if params.get("f_level"):
+            pattern = re.compile(params["f_level"])
+            mask &= np.array([bool(pattern.search(level)) for level in self._levels])
+        return mask
+
+    def _distances(self, qvec: List[float], mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        idx = np.flatnonzero(mask)
+        sims = self._vectors[idx] @ np.asarray(qvec, dtype=np.float32)
+        return idx, 1.0 - sims
+
+    def _batch_rows(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        queries = {}
+        for struct in params["queries"]:
+            fields = struct.struct_values
+            queries[fields["qid"]] = getattr(fields["qvec"], "values", fields["qvec"])
+        rows = []
+        for name, qids in params.items():
+            match = re.fullmatch(r"(g\d+_)qids", name)
+            if not match:
+                continue
+            prefix = match.group(1)
+            group = {key[len(prefix):]: value for key, value in params.items() if key.startswith(prefix)}
+            mask = self._mask(group)
+            for qid in qids:
+                idx, dist = self._distances(queries[qid], mask)
+                order = np.argsort(dist)[: params["topk"]]
+                totals = {}
+                if "thresh" in params:
+                    within = dist[order] <= params["thresh"]
+                    totals = {
+                        "programs_total": int(within.sum()),
+                        "schools_total": len({self._rows[i]["gt_school_id"] for i in idx[order][within]}),
+                        "countries_total": len({self._rows[i]["school_countryCode"] for i in idx[order][within]}),
+                    }
+                for rank, i in enumerate(order[: params["limit"]], start=1):
+                    rows.append(dict(self._rows[idx[i]], qid=qid, distance=float(dist[i]), hit_rank=rank, **totals))
+        return sorted(rows, key=lambda row: (row["qid"], row["hit_rank"]))
+
+    def query(self, sql: str, job_config=None, location: Optional[str] = None) -> FakeJob:
+        params: Dict[str, Any] = {}
+        for param in getattr(job_config, "query_parameters", None) or []:
+            params[param.name] = getattr(param, "values", None) if hasattr(param, "values") else param.value
+
+        if "ML.GENERATE_EMBEDDING" in sql and "texts" in params:
+            stage, rows = "embed", [{"content": text, "qvec": self.embed(text)} for text in params["texts"]]
+        elif "ML.GENERATE_EMBEDDING" in sql:
+            stage, rows = "embed", [{"qvec": self.embed(params["q"])}]
+        elif "UNNEST(@queries)" in sql:
+            stage, rows = "search", self._batch_rows(params)
+        elif "programs_total" in sql:
+            idx, dist = self._distances(params["qvec"], self._mask(params))
+            if "VECTOR_SEARCH" in sql:
+                stage = "estimate"
+                order = np.argsort(dist)[: params["topk"]]
+                idx, dist = idx[order], dist[order]
+            else:
+                stage = "count"
+            within = dist <= params["thresh"]
+            rows = [{
+                "programs_total": int(within.sum()),
+                "schools_total": len({self._rows[i]["gt_school_id"] for i in idx[within]}),
+                "countries_total": len({self._rows[i]["school_countryCode"] for i in idx[within]}),
+            }]
+        elif "VECTOR_SEARCH" in sql:
+            stage = "search"
+            idx, dist = self._distances(params["qvec"], self._mask(params))
+            order = np.argsort(dist)[: params["topk"]]
+            window = order[params["offset"]: params["offset"] + params["limit"]]
+            rows = [dict(self._rows[idx[i]], distance=float(dist[i])) for i in window]
+        else:
+            raise NotImplementedError(f"FakeBigQueryClient cannot answer: {sql[:120]}")
+
+        with self._lock:
+            self.jobs[stage] += 1
+        return FakeJob(rows, self.latency[stage], bytes_processed=len(self._rows) * self.dim * 8)
+
+
+# ---------- Firestore ----------
+
+class _WriteResult:
+    def __init__(self) -> None:
+        self.update_time = datetime.datetime.now(datetime.timezone.utc)
+
+
+class FakeSnapshot:
+    def __init__(self, doc_id: str, data: Optional[Dict[str, Any]], update_time: Optional[datetime.datetime] = None):
+        self.id = doc_id
+        self._data = data
+        self.exists = data is not None
+        self.update_time = update_time
+        self.reference: Any = None   # set by the query that returned it
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+
+class FakeFirestore:
+    """Shared in-memory store; `client()` and `async_client()` expose it through the two client shapes."""
+
+    def __init__(self, latency_ms: float = 15.0):
+        self.latency = latency_ms / 1000.0
+        self.collections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.update_times: Dict[Tuple[str, str], datetime.datetime] = {}
+        self.reads = 0
+        self.queries = 0
+        self.writes = 0
+        self._lock = threading.Lock()
+
+    def seed_users(self, count: int, start: int = 0) -> List[str]:
+        emails = []
+        users = self.collections.setdefault("Users", {})
+        for i in range(start, start + count):
+            email = f"student{i}@example.com"
+            users[f"user-{i}"] = {
+                "email": email,
+                "firstName": f"Student{i}",
+                "preferences": {
+                    "destinationCountries": [("Canada", "Germany", "UK")[i % 3]],
+                    "studyLevel": "masters",
+                    "fieldOfStudy": {"category": "Computer Science", "focus": "Data Science"},
+                },
+                "resumeExtracted": {"rawText": "Data analyst with Python and SQL experience. " * 80},
+            }
+            self.update_times[("Users", f"user-{i}")] = datetime.datetime.now(datetime.timezone.utc)
+            self.collections[f"Users/user-{i}/Shortlist"] = {
+                f"item-{rank}": {
+                    "programId": str(i * 10 + rank),
+                    "name": f"MSc Data Science {rank}",
+                    "schoolName": f"University {rank}",
+                    "schoolCountryCode": "CA",
+                    "tuition": 24000.0 + rank,
+                    "currency": "CAD",
+                    "status": "saved",
+                    "savedAt": datetime.datetime(2026, 1, 1 + rank, tzinfo=datetime.timezone.utc),
+                }
+                for rank in range(8)
+            }
+            emails.append(email)
+        return emails
+
+    def client(self) -> "FakeFirestoreClient":
+        return FakeFirestoreClient(self)
+
+    def async_client(self) -> "FakeAsyncFirestoreClient":
+        return FakeAsyncFirestoreClient(self)
+
+    # Store operations (latency is applied by the client wrappers).
+    def _get(self, collection: str, doc_id: str, field_paths: Optional[List[str]] = None) -> FakeSnapshot:
+        with self._lock:
+            self.reads += 1
+            data = self.collections.get(collection, {}).get(doc_id)
+            if data is not None and field_paths is not None:
+                data = project(data, field_paths) if field_paths else {}
+            return FakeSnapshot(doc_id, copy.deepcopy(data), self.update_times.get((collection, doc_id)))
+
+    def _query(
+        self,
+        collection: str,
+        filters: List[Tuple[str, str, Any]],
+        limit: Optional[int],
+        field_paths: Optional[List[str]] = None,
+        ordered: bool = False,
+        after: Optional[str] = None,
+    ) -> List[FakeSnapshot]:
+        with self._lock:
+            self.queries += 1
+            matches = []
+            documents = self.collections.get(collection, {})
+            items = sorted(documents.items()) if ordered else documents.items()
+            for doc_id, data in items:
+                if after is not None and doc_id <= after:
+                    continue
+                if all(op == "==" and data.get(field) == value for field, op, value in filters):
+                    if field_paths is not None:
+                        data = project(data, field_paths) if field_paths else {}
+                    matches.append(FakeSnapshot(doc_id, copy.deepcopy(data), self.update_times.get((collection, doc_id))))
+                    if limit is not None and len(matches) >= limit:
+                        break
+            self.reads += len(matches)
+            return matches
+
+    def _update(
+        self,
+        collection: str,
+        doc_id: str,
+        fields: Dict[str, Any],
+        last_update_time: Optional[datetime.datetime] = None,
+    ) -> _WriteResult:
+        with self._lock:
+            doc = self.collections.get(collection, {}).get(doc_id)
+            if doc is None:
+                raise exceptions.NotFound(f"No document to update: {collection}/{doc_id}")
+            if last_update_time is not None and self.update_times.get((collection, doc_id)) != last_update_time:
+                raise exceptions.FailedPrecondition(f"{collection}/{doc_id} was updated after it was read")
+            for path, value in fields.items():
+                node = doc
+                parts = path.split(".")
+                for part in parts[:-1]:
+                    node = node.setdefault(part, {})
+                if value is DELETE_FIELD:
+                    node.pop(parts[-1], None)
+                else:
+                    node[parts[-1]] = copy.deepcopy(value)
+            self.writes += 1
+            result = _WriteResult()
+            self.update_times[(collection, doc_id)] = result.update_time
+            return result
+
+    def _set(self, collection: str, doc_id: str, data: Dict[str, Any]) -> _WriteResult:
+        with self._lock:
+            self.collections.setdefault(collection, {})[doc_id] = copy.deepcopy(data)
+            self.writes += 1
+            result = _WriteResult()
+            self.update_times[(collection, doc_id)] = result.update_time
+            return result
+
+    def _delete(self, collection: str, doc_id: str) -> _WriteResult:
+        with self._lock:
+            self.collections.get(collection, {}).pop(doc_id, None)
+            self.update_times.pop((collection, doc_id), None)
+            self.writes += 1
+            return _WriteResult()
+
+
+class _Query:
+    def __init__(
+        self,
+        store: FakeFirestore,
+        collection: str,
+        filters=(),
+        limit: Optional[int] = None,
+        field_paths: Optional[List[str]] = None,
+        ordered: bool = False,
+        after: Optional[str] = None,
+    ):
+        self._store = store
+        self._collection = collection
+        self._filters = list(filters)
+        self._limit = limit
+        self._field_paths = field_paths
+        self._ordered = ordered   # only ordering by document id is supported
+        self._after = after
+
+    def _copy(self, **changes: Any) -> "_Query":
+        state = {
+            "filters": self._filters,
+            "limit": self._limit,
+            "field_paths": self._field_paths,
+            "ordered": self._ordered,
+            "after": self._after,
+        }
+        return type(self)(self._store, self._collection, **{**state, **changes})
+
+    def where(self, field: str, op: str, value: Any) -> "_Query":
+        return self._copy(filters=self._filters + [(field, op, value)])
+
+    def limit(self, count: int) -> "_Query":
+        return self._copy(limit=count)
+
+    def select(self, field_paths: List[str]) -> "_Query":
+        return self._copy(field_paths=list(field_paths))
+
+    def order_by(self, field_path: str, **kwargs: Any) -> "_Query":
+        if field_path != "__name__":
+            raise NotImplementedError("the fake only orders by document id")
+        return self._copy(ordered=True)
+
+    def start_after(self, cursor: Dict[str, Any]) -> "_Query":
+        return self._copy(after=cursor["__name__"])
+
+    def _reference(self, doc_id: str) -> "_DocumentRef":
+        return _DocumentRef(self._store, self._collection, doc_id)
+
+    def _results(self) -> List[FakeSnapshot]:
+        snapshots = self._store._query(
+            self._collection, self._filters, self._limit, self._field_paths, self._ordered, self._after
+        )
+        for snapshot in snapshots:
+            snapshot.reference = self._reference(snapshot.id)
+        return snapshots
+
+
+class _DocumentRef:
+    def __init__(self, store: FakeFirestore, collection: str, doc_id: str):
+        self._store = store
+        self._collection = collection
+        self.id = doc_id
+        self.path = f"{collection}/{doc_id}"
+
+    def get(self, field_paths: Optional[List[str]] = None, **kwargs: Any) -> FakeSnapshot:
+        time.sleep(self._store.latency)
+        return self._store._get(self._collection, self.id, field_paths)
+
+    def update(self, fields: Dict[str, Any], option: Any = None) -> _WriteResult:
+        time.sleep(self._store.latency)
+        return self._store._update(self._collection, self.id, fields, getattr(option, "last_update_time", None))
+
+    def set(self, data: Dict[str, Any]) -> _WriteResult:
+        time.sleep(self._store.latency)
+        return self._store._set(self._collection, self.id, data)
+
+    def collection(self, name: str) -> "_CollectionRef":
+        return _CollectionRef(self._store, f"{self._collection}/{self.id}/{name}")
+
+
+class _CollectionRef(_Query):
+    def document(self, doc_id: str) -> _DocumentRef:
+        return _DocumentRef(self._store, self._collection, doc_id)
+
+    def stream(self) -> Iterator[FakeSnapshot]:
+        return _Query.stream(self)
+
+
+def _sync_stream(self: _Query) -> Iterator[FakeSnapshot]:
+    time.sleep(self._store.latency)
+    yield from self._results()
+
+
+_Query.stream = _sync_stream
+
+
+class _LastUpdateOption:
+    def __init__(self, last_update_time: datetime.datetime):
+        self.last_update_time = last_update_time
+
+
+class _BulkOperation:
+    def __init__(self, reference: _DocumentRef, kind: str, data: Dict[str, Any], option: Any):
+        self.reference = reference
+        self.kind = kind
+        self.data = data
+        self.option = option
+        self.attempts = 0
+
+
+class _BulkFailure:
+    def __init__(self, operation: _BulkOperation, code: int, message: str):
+        self.operation = operation
+        self.code = code
+        self.message = message
+        self.attempts = operation.attempts
+
+
+class FakeBulkWriter:
+    """
+    Queues writes and applies them on flush in batches of 20 (one simulated round trip each), paced to
+    `max_ops_per_second`, with the result/error callbacks and retry protocol of the real BulkWriter.
+    """
+
+    BATCH_SIZE = 20
+    _CODES = {exceptions.NotFound: 5, exceptions.FailedPrecondition: 9}
+
+    def __init__(self, store: FakeFirestore, options: Any = None):
+        self._store = store
+        self._max_ops = getattr(options, "max_ops_per_second", None)
+        self._pending: List[_BulkOperation] = []
+        self._on_result = lambda reference, result, writer: None
+        self._on_error = lambda failure, writer: failure.attempts < 10
+        self.batches = 0
+
+    def on_write_result(self, callback) -> None:
+        self._on_result = callback
+
+    def on_write_error(self, callback) -> None:
+        self._on_error = callback
+
+    def set(self, reference: _DocumentRef, data: Dict[str, Any]) -> None:
+        self._pending.append(_BulkOperation(reference, "set", data, None))
+
+    def update(self, reference: _DocumentRef, fields: Dict[str, Any], option: Any = None) -> None:
+        self._pending.append(_BulkOperation(reference, "update", fields, option))
+
+    def delete(self, reference: _DocumentRef) -> None:
+        self._pending.append(_BulkOperation(reference, "delete", {}, None))
+
+    def _apply(self, operation: _BulkOperation) -> _WriteResult:
+        collection, doc_id = operation.reference._collection, operation.reference.id
+        if operation.kind == "delete":
+            return self._store._delete(collection, doc_id)
+        if operation.kind == "set":
+            return self._store._set(collection, doc_id, operation.data)
+        last_update_time = getattr(operation.option, "last_update_time", None)
+        return self._store._update(collection, doc_id, operation.data, last_update_time)
+
+    def flush(self) -> None:
+        while self._pending:
+            batch, self._pending = self._pending[: self.BATCH_SIZE], self._pending[self.BATCH_SIZE:]
+            started = time.perf_counter()
+            time.sleep(self._store.latency)
+            self.batches += 1
+            for operation in batch:
+                operation.attempts += 1
+                try:
+                    result = self._apply(operation)
+                except tuple(self._CODES) as exc:
+                    if self._on_error(_BulkFailure(operation, self._CODES[type(exc)], str(exc)), self):
+                        self._pending.append(operation)
+                    continue
+                self._on_result(operation.reference, result, self)
+            if self._max_ops:
+                time.sleep(max(0.0, len(batch) / self._max_ops - (time.perf_counter() - started)))
+
+    def close(self) -> None:
+        self.flush()
+
+
+class FakeFirestoreClient:
+    def __init__(self, store: FakeFirestore):
+        self._store = store
+
+    def collection(self, name: str) -> _CollectionRef:
+        return _CollectionRef(self._store, name)
+
+    def write_option(self, last_update_time: datetime.datetime) -> _LastUpdateOption:
+        return _LastUpdateOption(last_update_time)
+
+    def bulk_writer(self, options: Any = None) -> FakeBulkWriter:
+        return FakeBulkWriter(self._store, options)
+
+
+class _AsyncQuery(_Query):
+    async def stream(self) -> AsyncGenerator[FakeSnapshot, None]:
+        await asyncio.sleep(self._store.latency)
+        for snapshot in self._results():
+            yield snapshot
+
+
+class _AsyncDocumentRef(_DocumentRef):
+    async def get(self, field_paths: Optional[List[str]] = None, **kwargs: Any) -> FakeSnapshot:
+        await asyncio.sleep(self._store.latency)
+        return self._store._get(self._collection, self.id, field_paths)
+
+    async def update(self, fields: Dict[str, Any], option: Any = None) -> _WriteResult:
+        await asyncio.sleep(self._store.latency)
+        return self._store._update(self._collection, self.id, fields, getattr(option, "last_update_time", None))
+
+    async def set(self, data: Dict[str, Any]) -> _WriteResult:
+        await asyncio.sleep(self._store.latency)
+        return self._store._set(self._collection, self.id, data)
+
+    def collection(self, name: str) -> "_AsyncCollectionRef":
+        return _AsyncCollectionRef(self._store, f"{self._collection}/{self.id}/{name}")
+
+
+class _AsyncCollectionRef(_AsyncQuery):
+    def document(self, doc_id: str) -> _AsyncDocumentRef:
+        return _AsyncDocumentRef(self._store, self._collection, doc_id)
+
+    def _reference(self, doc_id: str) -> _AsyncDocumentRef:
+        return self.document(doc_id)
+
+
+class FakeAsyncFirestoreClient:
+    def __init__(self, store: FakeFirestore):
+        self._store = store
+
+    def collection(self, name: str) -> _AsyncCollectionRef:
+        return _AsyncCollectionRef(self._store, name)
+
+
+# ---------- Gemini ----------
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+")
+
+
+class ScriptedLlm(BaseLlm):
+    """
+    Deterministic model for every agent in the tree. The root agent looks up the profile, searches
+    courses with the profile's preferences and answers; a message containing "resume" is transferred to
+    profile_update_agent, which writes one field through update_profile_from_resume.
+    """
+
+    model: str = "scripted-llm"
+    latency_ms: float = 250.0
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        await asyncio.sleep(self.latency_ms / 1000.0)
+        agent = (llm_request.config.labels or {}).get("adk_agent_name") if llm_request.config else None
+        part = self._next_part(agent or "", llm_request.contents or [])
+        chars = sum(len(json.dumps(c.model_dump(exclude_none=True), default=str)) for c in llm_request.contents or [])
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[part]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=chars // 4, candidates_token_count=20
+            ),
+        )
+
+    @staticmethod
+    def _user_text(contents: List[types.Content]) -> str:
+        for content in reversed(contents):
+            if content.role == "user":
+                texts = [part.text for part in content.parts or [] if part.text]
+                if texts:
+                    return " ".join(texts)
+        return ""
+
+    def _next_part(self, agent: str, contents: List[types.Content]) -> types.Part:
+        last = contents[-1].parts[-1] if contents and contents[-1].parts else None
+        response = last.function_response if last is not None else None
+        message = self._user_text(contents)
+        match = _EMAIL.search(message)
+        email = match.group(0) if match else "student0@example.com"
+
+        if agent == "profile_update_agent":
+            if response is None:
+                return types.Part(function_call=types.FunctionCall(
+                    name="update_profile_from_resume",
+                    args={"email": email, "user_data": {"academicProfile": {"cgpa": 3.6, "cgpaScale": 4.0}}},
+                ))
+            return types.Part(text="Profile updated from the resume.")
+
+        if agent and agent != "campus_connect_root_agent":
+            return types.Part(text="{}")
+
+        if response is None:
+            if "resume" in message.lower():
+                return types.Part(function_call=types.FunctionCall(
+                    name="transfer_to_agent", args={"agent_name": "profile_update_agent"}
+                ))
+            return types.Part(function_call=types.FunctionCall(name="get_fs_user_profile", args={"email": email}))
+        if response.name == "get_fs_user_profile":
+            prefs = ((response.response or {}).get("profile") or {}).get("preferences") or {}
+            return types.Part(function_call=types.FunctionCall(
+                name="search_and_count",
+                args={
+                    "query_text": "data science masters with machine learning",
+                    "use_cursor": True,
+                    "destination_countries": prefs.get("destinationCountries"),
+                    "study_level": prefs.get("studyLevel"),
+                },
+            ))
+        hits = hit_count(response.response or {})
+        return types.Part(text=f"I found {hits} programs that match your profile.")
+
+
+def use_scripted_llm(agent, llm: ScriptedLlm) -> None:
+    """Points `agent` and every sub-agent (including AgentTool-wrapped ones) at the scripted model."""
+    from google.adk.tools.agent_tool import AgentTool
+
+    seen = set()
+    stack = [agent]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        if hasattr(current, "model"):
+            current.model = llm
+        stack.extend(getattr(current, "sub_agents", []) or [])
+        stack.extend(tool.agent for tool in getattr(current, "tools", []) or [] if isinstance(tool, AgentTool))
@@ -0,0 +1,158 @@
+"""
+Load generator and report helpers for run_benchmarks.py.
+
+`run_load` drives an async callable with a fixed number of requests at a fixed concurrency and reports
+latency percentiles, throughput, errors and event-loop lag. Memory is measured in a separate, shorter
+tracemalloc pass (`measure_memory`) so tracing overhead does not distort the latency numbers.
+"""
+
+import asyncio
+import json
+import math
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+Call = Callable[[int], Awaitable[Any]]
+
+MIN_DELTA_MS = 1.0
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, math.ceil(pct / 100.0 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+async def _loop_lag(stop: asyncio.Event, interval: float, lags: List[float]) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - started - interval) * 1000.0)
+
+
+async def run_load(name: str, call: Call, requests: int, concurrency: int) -> Dict[str, Any]:
+    """Runs `call(i)` for i in range(requests) with at most `concurrency` in flight."""
+    latencies: List[float] = []
+    errors: List[str] = []
+    next_index = iter(range(requests))
+
+    async def worker() -> None:
+        for index in next_index:
+            started = time.perf_counter()
+            try:
+                await call(index)
+            except Exception as exc:  # counted, not fatal: a benchmark should finish and report
+                errors.append(f"{type(exc).__name__}: {exc}")
+            latencies.append((time.perf_counter() - started) * 1000.0)
+
+    lags: List[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_loop_lag(stop, 0.01, lags))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, requests))))
+    wall = time.perf_counter() - started
+    stop.set()
+    await ticker
+
+    return {
+        "name": name,
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+        "throughput_rps": round(requests / wall, 2) if wall else 0.0,
+        "loop_lag_p99_ms": round(percentile(lags, 99), 2),
+    }
+
+
+async def measure_memory(call: Call, requests: int, concurrency: int) -> Dict[str, float]:
+    """Peak Python heap growth (tracemalloc) over a short run, plus the process max RSS so far."""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    try:
+        await run_load("memory", call, requests, concurrency)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        max_rss *= 1024  # Linux reports KiB
+    return {"peak_heap_mb": round((peak - baseline) / 2**20, 2), "max_rss_mb": round(max_rss / 2**20, 1)}
+
+
+def load_baseline(path: Path) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """Returns (settings, results by scenario name) from a saved run, or empty dicts when there is none."""
+    if not path.exists():
+        return {}, {}
+    with path.open() as handle:
+        saved = json.load(handle)
+    return saved.get("settings", {}), {result["name"]: result for result in saved.get("results", [])}
+
+
+def save_results(path: Path, results: List[Dict[str, Any]], settings: Dict[str, Any]) -> None:
+    with path.open("w") as handle:
+        json.dump({"settings": settings, "results": results}, handle, indent=2)
+        handle.write("\n")
+
+
+def compare(
+    result: Dict[str, Any], baseline: Optional[Dict[str, Any]], tolerance: float
+) -> List[str]:
+    """Regressions of `result` against `baseline`: p95 latency or throughput worse by more than `tolerance`."""
+    if not baseline:
+        return []
+    regressions = []
+    # Sub-millisecond scenarios (cache hits) swing by large ratios on scheduler noise alone.
+    slower = result["p95_ms"] - baseline.get("p95_ms", 0.0)
+    if baseline.get("p95_ms") and result["p95_ms"] > baseline["p95_ms"] * (1 + tolerance) and slower > MIN_DELTA_MS:
+        regressions.append(f"p95 {baseline['p95_ms']} -> {result['p95_ms']} ms")
+    if (
+        baseline.get("throughput_rps")
+        and baseline.get("p50_ms", 0.0) > MIN_DELTA_MS
+        and result["throughput_rps"] < baseline["throughput_rps"] * (1 - tolerance)
+    ):
+        regressions.append(f"throughput {baseline['throughput_rps']} -> {result['throughput_rps']} rps")
+    if result["errors"] > baseline.get("errors", 0):
+        regressions.append(f"errors {baseline.get('errors', 0)} -> {result['errors']}")
+    return regressions
+
+
+def _delta(current: float, previous: Optional[float]) -> str:
+    if not previous:
+        return ""
+    return f" ({(current - previous) / previous:+.0%})"
+
+
+def print_report(results: List[Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float) -> int:
+    """Prints one line per scenario and returns the number of scenarios that regressed."""
+    header = f"{'scenario':<34}{'p50 ms':>10}{'p95 ms':>18}{'p99 ms':>10}{'rps':>18}{'err':>5}{'lag99':>8}{'heap MB':>9}"
+    print(header)
+    print("-" * len(header))
+    regressed = 0
+    for result in results:
+        previous = baseline.get(result["name"], {})
+        p95 = f"{result['p95_ms']:.1f}{_delta(result['p95_ms'], previous.get('p95_ms'))}"
+        rps = f"{result['throughput_rps']:.1f}{_delta(result['throughput_rps'], previous.get('throughput_rps'))}"
+        print(
+            f"{result['name']:<34}{result['p50_ms']:>10.1f}{p95:>18}{result['p99_ms']:>10.1f}{rps:>18}"
+            f"{result['errors']:>5}{result['loop_lag_p99_ms']:>8.1f}{result.get('peak_heap_mb', 0.0):>9.1f}"
+        )
+        problems = compare(result, previous, tolerance)
+        if problems:
+            regressed += 1
+            print(f"  REGRESSION: {'; '.join(problems)}")
+        if result.get("first_error"):
+            print(f"  first error: {result['first_error']}")
+    return regressed
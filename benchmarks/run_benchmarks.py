@@ -0,0 +1,299 @@
+"""
+Offline load benchmarks for the tools and the `/grestok-agent/` endpoint.
+
+BigQuery, Firestore and Gemini are replaced by the fakes in `fakes.py` (with simulated service latency),
+Firebase token checks are stubbed, and everything else (caches, thread pools, ADK runner, session store,
+callbacks, FastAPI app) runs for real. Each scenario reports p50/p95/p99 latency, throughput, errors,
+event-loop lag and peak heap growth, and is compared against a stored baseline.
+
+    python benchmarks/run_benchmarks.py                       # compare against benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --only search_and_count --concurrency 32
+    python benchmarks/run_benchmarks.py --save-baseline       # record a new baseline
+    python benchmarks/run_benchmarks.py --fail-on-regression  # exit 1 when a scenario regressed
+
+Numbers are only comparable between runs on the same machine with the same latency settings.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+import _offline
+
+_offline.setup()
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import firebase_admin.auth  # noqa: E402
+import httpx  # noqa: E402
+
+from campus_connect.tools import async_tools, clients, get_fs_user_profile, profile_cache  # noqa: E402
+from campus_connect.tools import update_profile_from_resume  # noqa: E402
+from campus_connect_runner import main  # noqa: E402
+
+import harness  # noqa: E402
+from fakes import FakeBigQueryClient, FakeFirestore, ScriptedLlm, use_scripted_llm  # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+QUERIES = [
+    "data science masters with machine learning",
+    "mechanical engineering bachelor",
+    "MBA in finance",
+    "nursing diploma",
+    "computer science phd artificial intelligence",
+    "environmental science masters",
+    "business analytics",
+    "civil engineering with project management",
+]
+
+Scenario = Callable[[int], Awaitable[Any]]
+
+
+class Bench:
+    """Installs the fakes and builds one async callable per scenario."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.run_id = uuid.uuid4().hex[:8]
+        self.bq = FakeBigQueryClient(
+            programs=args.programs,
+            latency_ms={
+                "embed": args.bq_latency_ms * 0.5,
+                "search": args.bq_latency_ms,
+                "count": args.bq_latency_ms * 2,
+                "estimate": args.bq_latency_ms * 0.8,
+            },
+        )
+        self.fs = FakeFirestore(latency_ms=args.fs_latency_ms)
+        self.emails = self.fs.seed_users(args.users)
+        self.fresh_users = 0
+        self.setup: Dict[str, Callable[[], Awaitable[None]]] = {}
+
+        clients.override("bigquery", self.bq)
+        clients.override("firestore", self.fs.client())
+        clients.override("firestore_async", self.fs.async_client())
+        use_scripted_llm(main.campus_connect_agent, ScriptedLlm(latency_ms=args.llm_latency_ms))
+
+        # Tokens are "student<i>"; the stub decodes them into the matching seeded user.
+        firebase_admin.auth.verify_id_token = lambda token, check_revoked=False: {
+            "uid": token,
+            "email": f"{token}@example.com",
+        }
+        main.firebase_ready = True
+
+    def _fresh_email(self) -> str:
+        # Updates only fill empty fields, so each write benchmark call gets a user it has not touched yet.
+        self.fresh_users += 1
+        return self.fs.seed_users(1, start=self.args.users + self.fresh_users)[0]
+
+    async def scenarios(self) -> Dict[str, Scenario]:
+        search = dict(use_cursor=True, use_local_index=False, destination_countries=["Canada"], study_level="masters")
+
+        async def search_cold(i: int) -> Any:
+            # A query text never seen before misses the embedding, window and totals caches.
+            return await async_tools.search_and_count(f"{QUERIES[i % len(QUERIES)]} {self.run_id}-{i}", **search)
+
+        async def search_warm(i: int) -> Any:
+            return await async_tools.search_and_count(QUERIES[i % len(QUERIES)], **search)
+
+        cursors: Dict[str, str] = {}
+
+        async def open_cursors() -> None:
+            # Opened right before the run: earlier scenarios can push these windows out of the cache.
+            for query in QUERIES:
+                cursors[query] = (await async_tools.search_and_count(query, **search))["next_cursor"]
+
+        async def search_cursor(i: int) -> Any:
+            query = QUERIES[i % len(QUERIES)]
+            return await async_tools.search_and_count(query, cursor=cursors[query], **search)
+
+        self.setup["search_and_count.cursor"] = open_cursors
+
+        filters = dict(use_local_index=False, destination_countries=["Canada"], study_level="masters")
+
+        def comparison(tag: str, i: int) -> List[str]:
+            # Unseen texts, so both scenarios pay for embedding as well as searching.
+            return [f"{QUERIES[(i + k) % len(QUERIES)]} {tag}-{self.run_id}-{i}" for k in range(5)]
+
+        async def search_five_sequential(i: int) -> Any:
+            # What a five-way comparison cost before batching: one embed and one search job per query.
+            return [
+                await async_tools.search_and_count(text, limit=10, totals_mode="estimate", **filters)
+                for text in comparison("sequential", i)
+            ]
+
+        async def search_batch(i: int) -> Any:
+            return await async_tools.search_and_count_batch(comparison("batch", i), limit=10, **filters)
+
+        async def profile_uncached(i: int) -> Any:
+            email = self.emails[i % len(self.emails)]
+            profile_cache.invalidate(email)
+            return await async_tools.get_fs_user_profile(email)
+
+        async def profile_cached(i: int) -> Any:
+            return await async_tools.get_fs_user_profile(self.emails[i % 8])
+
+        async def profile_sync(i: int) -> Any:
+            email = self.emails[i % len(self.emails)]
+            profile_cache.invalidate(email)
+            return await asyncio.to_thread(get_fs_user_profile.get_fs_user_profile, email)
+
+        patch = {"academicProfile": {"cgpa": 3.6, "cgpaScale": 4.0}, "preferences": {"studyLevel": "masters"}}
+
+        async def update_async(i: int) -> Any:
+            return await async_tools.update_profile_from_resume(self._fresh_email(), patch)
+
+        async def update_sync(i: int) -> Any:
+            return await asyncio.to_thread(
+                update_profile_from_resume.update_profile_from_resume, self._fresh_email(), patch
+            )
+
+        await main.ensure_runner_ready()
+        transport = httpx.ASGITransport(app=main.app)
+        self.http = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120)
+
+        async def endpoint(i: int) -> Any:
+            # Search turns only: a chat message does not satisfy profile_update_agent's GrestokUser
+            # input_schema, so ADK rejects the transfer before the sub-agent runs.
+            user = f"student{i % len(self.emails)}"
+            response = await self.http.post(
+                "/grestok-agent/",
+                json={"message": "Find me programs that fit my profile.", "session_id": f"bench-{self.run_id}-{i}"},
+                headers={"Authorization": f"Bearer {user}"},
+            )
+            response.raise_for_status()
+            return response.json()
+
+        etags: Dict[str, str] = {}
+
+        async def profile_api(i: int) -> Any:
+            user = f"student{i % len(self.emails)}"
+            response = await self.http.get("/profile", headers={"Authorization": f"Bearer {user}"})
+            response.raise_for_status()
+            etags[user] = response.headers["ETag"]
+            return response.json()
+
+        async def profile_api_not_modified(i: int) -> Any:
+            user = f"student{i % len(self.emails)}"
+            headers = {"Authorization": f"Bearer {user}", "If-None-Match": etags.get(user, "")}
+            response = await self.http.get("/profile", headers=headers)
+            if response.status_code not in (200, 304):
+                response.raise_for_status()
+            return response.status_code
+
+        async def shortlist_api(i: int) -> Any:
+            user = f"student{i % len(self.emails)}"
+            response = await self.http.get(
+                "/profile/shortlist", params={"fields": "name,schoolName,tuition"}, headers={"Authorization": f"Bearer {user}"}
+            )
+            response.raise_for_status()
+            return response.json()
+
+        async def recommendations_api(i: int) -> Any:
+            # The first read for a user finds nothing stored and queues a background refresh.
+            user = f"student{i % len(self.emails)}"
+            response = await self.http.get(
+                "/profile/recommendations", params={"fields": "name,school_name,tuition", "limit": 10},
+                headers={"Authorization": f"Bearer {user}"},
+            )
+            response.raise_for_status()
+            return response.json()
+
+        async def ensure_session(i: int) -> Any:
+            # Many concurrent turns for a handful of sessions: exercises the striped locks.
+            return await main.ensure_session(f"user{i % 16}", f"bench-{self.run_id}-{i % 64}")
+
+        return {
+            "search_and_count.cold": search_cold,
+            "search_and_count.warm": search_warm,
+            "search_and_count.cursor": search_cursor,
+            "search_and_count.five_sequential": search_five_sequential,
+            "search_and_count_batch": search_batch,
+            "get_fs_user_profile.uncached": profile_uncached,
+            "get_fs_user_profile.cached": profile_cached,
+            "get_fs_user_profile.sync": profile_sync,
+            "update_profile_from_resume": update_async,
+            "update_profile_from_resume.sync": update_sync,
+            "grestok_agent": endpoint,
+            "profile_api": profile_api,
+            "profile_api.not_modified": profile_api_not_modified,
+            "shortlist_api": shortlist_api,
+            "recommendations_api": recommendations_api,
+            "session.ensure": ensure_session,
+        }
+
+    async def close(self) -> None:
+        await self.http.aclose()
+
+
+def _requests_for(name: str, args: argparse.Namespace) -> int:
+    # Full agent turns are an order of magnitude slower than single tool calls.
+    return max(1, args.requests // 5) if name == "grestok_agent" else args.requests
+
+
+async def run(args: argparse.Namespace) -> int:
+    bench = Bench(args)
+    scenarios = await bench.scenarios()
+    selected = [name for name in scenarios if not args.only or any(name.startswith(prefix) for prefix in args.only)]
+
+    results: List[Dict[str, Any]] = []
+    try:
+        for name in selected:
+            if name in bench.setup:
+                await bench.setup[name]()
+            requests = _requests_for(name, args)
+            result = await harness.run_load(name, scenarios[name], requests, args.concurrency)
+            if args.memory:
+                result.update(await harness.measure_memory(scenarios[name], max(1, requests // 4), args.concurrency))
+            results.append(result)
+    finally:
+        await bench.close()
+
+    settings = {
+        key: getattr(args, key)
+        for key in ("concurrency", "requests", "programs", "bq_latency_ms", "fs_latency_ms", "llm_latency_ms")
+    }
+    baseline_settings, baseline = harness.load_baseline(args.baseline)
+    print(f"settings: {settings}")
+    if args.save_baseline:
+        baseline = {}
+    elif baseline and baseline_settings != settings:
+        print(f"baseline was recorded with {baseline_settings}; not comparing")
+        baseline = {}
+    print(f"fake calls: bigquery={bench.bq.jobs} firestore reads={bench.fs.reads} queries={bench.fs.queries} "
+          f"writes={bench.fs.writes}")
+    regressed = harness.print_report(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        harness.save_results(args.baseline, results, settings)
+        print(f"baseline written to {args.baseline}")
+    if args.output:
+        harness.save_results(args.output, results, settings)
+    return 1 if regressed and args.fail_on_regression else 0
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", help="scenario name prefixes to run")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario (agent turns use a fifth)")
+    parser.add_argument("--users", type=int, default=200, help="seeded Firestore users")
+    parser.add_argument("--programs", type=int, default=5000, help="programs in the fake catalog")
+    parser.add_argument("--bq-latency-ms", type=float, default=150.0, help="VECTOR_SEARCH job latency; other jobs scale from it")
+    parser.add_argument("--fs-latency-ms", type=float, default=15.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=250.0)
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="skip the tracemalloc pass")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--output", type=Path, help="also write this run's results as JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95/throughput regression (0.2 = 20%%)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main_cli()
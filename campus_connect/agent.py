@@ -1,8 +1,15 @@
 from google.adk.agents import Agent
 from google.adk.tools.agent_tool import AgentTool
-from .tools.get_bq_courses import search_and_count
-from .tools.get_fs_user_profile import get_fs_user_profile
-from .tools.update_profile_from_resume import update_profile_from_resume
+from . import tracing
+from .history import compact_history
+from .tools.async_tools import ASYNC_TOOLS_ENABLED
+
+if ASYNC_TOOLS_ENABLED:
+    from .tools.async_tools import get_fs_user_profile, get_recommendations, search_and_count, search_and_count_batch
+else:
+    from .tools.get_bq_courses import search_and_count, search_and_count_batch
+    from .tools.get_fs_user_profile import get_fs_user_profile
+    from .tools.get_recommendations import get_recommendations
 from .sub_agents.profile_update_agent.agent import profile_update_agent
 from .sub_agents.document_analysis_agent.agent import resume_extractor_agent
 from .sub_agents.course_college_websearch_agent.agent import course_college_websearch_agent
@@ -16,14 +23,20 @@ root_agent = Agent(
     Then, use the profile_update_agent to update the user profile in Firestore based on the extracted information.
     Goal:
 Help prospective students create a complete admissions profile with minimal friction and generate a transparent, ranked shortlist of programs/universities that match eligibility, budget, preferences, and goals—then convert that shortlist into an application plan. As a first step, you will focus on getting course details.
-Tooling note: when you call search_and_count, craft a detailed natural-language query that embeds filters (country, level, budget, etc.) because the tool now performs pure vector search with no server-side keyword filters. Use get_fs_user_profile to pull the existing student profile from Firestore by email before tailoring recommendations. Ask for the latest resume, run the profile_update_agent to reason about schema-aligned patches, then call update_profile_from_resume (with resume text and/or the patch) to persist only the missing fields—never overwrite stronger Firestore data.
+Tooling note: when you call search_and_count, describe the desired programs in query_text and pass the student's hard constraints as structured filters taken from their profile preferences: destination_countries (preferences.destinationCountries), study_level (preferences.studyLevel), max_tuition and tuition_currency (preferences.budget). These filters are enforced by the search itself, so there is no need to re-query to remove out-of-country or over-budget results. Call search_and_count with use_cursor=True; when the student asks for more results, call it again with the same query_text and cursor set to the previous next_cursor instead of changing the offset. When you need to compare several alternatives (different fields, countries or study levels), make one search_and_count_batch call with all the query_texts, using per_query_filters for constraints that differ between them, instead of calling search_and_count once per alternative. Search hits come back as a table: "columns" names each value in "rows", "shared" holds values common to every row, and school details sit in the "schools" table joined on school_id; pass fields (e.g. ["name", "school_name", "tuition", "currency", "similarity"]) when you only need some of them. Use get_fs_user_profile to pull the existing student profile from Firestore by email before tailoring recommendations; view="preferences_academics" is enough for course searches, and the default view summarizes the resume in resumeExtracted.summary (ask for view="full" only when you need its raw text, work experience or education entries). When the student asks which programs suit them, call get_recommendations first: it returns programs precomputed from their saved profile without running a search; if its status is "stale" or "missing" a refresh is already running in the background, so use what it returns (or search_and_count when it is empty) rather than waiting. Use search_and_count for anything beyond the saved preferences. Ask for the latest resume, run the profile_update_agent to reason about schema-aligned patches, then call update_profile_from_resume (with resume text and/or the patch) to persist only the missing fields—never overwrite stronger Firestore data.
     """,
-    tools=[search_and_count, get_fs_user_profile,
+    tools=[search_and_count, search_and_count_batch, get_fs_user_profile, get_recommendations,
            AgentTool(agent=course_college_websearch_agent)],
     sub_agents=[
         resume_extractor_agent,
         profile_update_agent
-    ]
+    ],
+    before_agent_callback=tracing.before_agent,
+    after_agent_callback=tracing.after_agent,
+    before_model_callback=[compact_history, tracing.before_model],
+    after_model_callback=tracing.after_model,
+    before_tool_callback=tracing.before_tool,
+    after_tool_callback=tracing.after_tool,
 )
 
 # Other Sub-agents to be added
@@ -0,0 +1,268 @@
+"""
+Prompt-side compaction of the conversation history.
+
+ADK replays the whole session into every model call, including bulky function responses (search
+hits, full GrestokUser dumps, resume text) and uploaded documents. `compact_history` is a
+before_model_callback that rewrites only the outgoing request; the stored session keeps every event.
+
+* The last HISTORY_KEEP_TURNS user turns are sent verbatim.
+* Older turns keep their shape, but tool responses become compact references (counts, top hits,
+  updated field names), long texts and call arguments are clipped and attachments become placeholders.
+* If the estimated prompt still exceeds HISTORY_TOKEN_BUDGET, the oldest turns are dropped and replaced
+  by one digest of what the student said in them.
+"""
+
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from google.genai import types
+
+from .tools.config import get_logger
+from .tools.result_format import hit_count, iter_records
+
+HISTORY_TOKEN_BUDGET = int(os.environ.get("HISTORY_TOKEN_BUDGET", "24000"))   # estimated tokens of history per call; 0 disables
+HISTORY_KEEP_TURNS = int(os.environ.get("HISTORY_KEEP_TURNS", "2"))           # most recent user turns left untouched
+HISTORY_TEXT_CHARS = int(os.environ.get("HISTORY_TEXT_CHARS", "1500"))        # older text parts are clipped to this
+HISTORY_TOOL_CHARS = int(os.environ.get("HISTORY_TOOL_CHARS", "800"))         # older tool payloads are clipped to this
+HISTORY_DIGEST_CHARS = int(os.environ.get("HISTORY_DIGEST_CHARS", "160"))     # per dropped user message in the digest
+CHARS_PER_TOKEN = 4
+
+logger = get_logger("grestok.history")
+
+_COMPACTED_NOTE = "Older result compacted; call the tool again if the full response is needed."
+
+_stats_lock = threading.Lock()
+_stats = {"requests": 0, "compacted": 0, "tokens_before": 0, "tokens_after": 0, "turns_dropped": 0}
+
+
+def estimate_tokens(contents: List[types.Content]) -> int:
+    """Cheap character-based estimate (about four characters per token) used against the budget."""
+    chars = 0
+    for content in contents:
+        for part in content.parts or []:
+            if part.text:
+                chars += len(part.text)
+            elif part.function_call:
+                chars += len(part.function_call.name or "") + len(_dumps(part.function_call.args))
+            elif part.function_response:
+                chars += len(part.function_response.name or "") + len(_dumps(part.function_response.response))
+            elif part.inline_data and part.inline_data.data:
+                chars += len(part.inline_data.data)
+    return chars // CHARS_PER_TOKEN
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str, separators=(",", ":")) if value else ""
+
+
+def _clip(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [{len(text) - limit} characters compacted]"
+
+
+def _drop_empty(value: Any) -> Any:
+    if isinstance(value, dict):
+        pruned = {key: _drop_empty(item) for key, item in value.items() if key != "rawText"}
+        return {key: item for key, item in pruned.items() if item not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [_drop_empty(item) for item in value]
+    return value
+
+
+def _summarize_search(response: Dict[str, Any]) -> Dict[str, Any]:
+    top = [
+        f"{hit.get('name')} @ {hit.get('school_name')} ({hit.get('school_countryCode')})"
+        for _, hit in zip(range(5), iter_records(response))
+    ]
+    summary = {"hits": hit_count(response), "top": top, "totals": response.get("totals"), "filters": response.get("filters")}
+    for key in ("next_cursor", "next_offset"):
+        if response.get(key) is not None:
+            summary[key] = response[key]
+    return summary
+
+
+def _summarize_batch(response: Dict[str, Any]) -> Dict[str, Any]:
+    results = [
+        {"query_text": result.get("query_text"), **_summarize_search(result)}
+        for result in response.get("results") or []
+        if isinstance(result, dict)
+    ]
+    return {"results": results}
+
+
+def _summarize_profile(response: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "found": response.get("found"),
+        "doc_id": response.get("doc_id"),
+        "profile": _drop_empty(response.get("profile") or {}),
+    }
+
+
+def _summarize_update(response: Dict[str, Any]) -> Dict[str, Any]:
+    summary = {"status": response.get("status")}
+    if response.get("updated_fields"):
+        summary["updated_fields"] = sorted(response["updated_fields"])
+    if response.get("message"):
+        summary["message"] = response["message"]
+    return summary
+
+
+_SUMMARIZERS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "search_and_count": _summarize_search,
+    "search_and_count_batch": _summarize_batch,
+    "get_fs_user_profile": _summarize_profile,
+    "update_profile_from_resume": _summarize_update,
+}
+
+
+def _compact_response(name: str, response: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not response or len(_dumps(response)) <= HISTORY_TOOL_CHARS:
+        return response or {}
+    summarize = _SUMMARIZERS.get(name)
+    summary = summarize(response) if summarize is not None else {}
+    if not summary or len(_dumps(summary)) > HISTORY_TOOL_CHARS:
+        summary = {"preview": _clip(_dumps(summary or response), HISTORY_TOOL_CHARS)}
+    summary["compacted"] = True
+    summary["note"] = _COMPACTED_NOTE
+    return summary
+
+
+def _compact_args(args: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not args or len(_dumps(args)) <= HISTORY_TOOL_CHARS:
+        return args
+    compacted = {}
+    for key, value in args.items():
+        text = value if isinstance(value, str) else _dumps(value)
+        compacted[key] = value if len(text) <= HISTORY_TOOL_CHARS // 4 else _clip(text, HISTORY_TOOL_CHARS // 4)
+    return compacted
+
+
+def _compact_part(part: types.Part) -> types.Part:
+    if part.text:
+        if part.thought:
+            return types.Part(text="")
+        return part if len(part.text) <= HISTORY_TEXT_CHARS else types.Part(text=_clip(part.text, HISTORY_TEXT_CHARS))
+    if part.function_call:
+        call = part.function_call
+        return types.Part(function_call=types.FunctionCall(id=call.id, name=call.name, args=_compact_args(call.args)))
+    if part.function_response:
+        resp = part.function_response
+        return types.Part(
+            function_response=types.FunctionResponse(
+                id=resp.id, name=resp.name, response=_compact_response(resp.name or "", resp.response)
+            )
+        )
+    if part.inline_data:
+        size = len(part.inline_data.data or b"")
+        return types.Part(text=f"[attachment compacted: {part.inline_data.mime_type}, {size} bytes]")
+    return part
+
+
+def _compact_content(content: types.Content) -> Optional[types.Content]:
+    parts = [_compact_part(part) for part in content.parts or []]
+    parts = [part for part in parts if part.text != ""]
+    return types.Content(role=content.role, parts=parts) if parts else None
+
+
+def _is_user_turn(content: types.Content) -> bool:
+    parts = content.parts or []
+    return content.role == "user" and any(part.text for part in parts) and not any(
+        part.function_response for part in parts
+    )
+
+
+def _split_turns(contents: List[types.Content]) -> List[List[types.Content]]:
+    turns: List[List[types.Content]] = []
+    for content in contents:
+        if not turns or _is_user_turn(content):
+            turns.append([])
+        turns[-1].append(content)
+    return turns
+
+
+def _digest(dropped: List[List[types.Content]]) -> types.Content:
+    said = []
+    for turn in dropped:
+        if turn and _is_user_turn(turn[0]):
+            text = " ".join(part.text for part in turn[0].parts if part.text).strip()
+            said.append(f"- {_clip(' '.join(text.split()), HISTORY_DIGEST_CHARS)}")
+    lines = [f"[{len(dropped)} earlier turns omitted to keep the prompt small.]"]
+    if said:
+        lines.append("The student earlier said:")
+        lines.extend(said)
+    return types.Content(role="user", parts=[types.Part(text="\n".join(lines))])
+
+
+def compact_contents(
+    contents: List[types.Content],
+    token_budget: int = HISTORY_TOKEN_BUDGET,
+    keep_turns: int = HISTORY_KEEP_TURNS,
+) -> List[types.Content]:
+    """Returns a compacted copy of `contents`; the input list and its parts are never modified."""
+    turns = _split_turns(contents)
+    if len(turns) <= keep_turns:
+        return contents
+
+    older = [
+        [compacted for compacted in map(_compact_content, turn) if compacted is not None]
+        for turn in turns[:-keep_turns or None]
+    ]
+    recent = turns[len(turns) - keep_turns:] if keep_turns else []
+    kept_recent = [content for turn in recent for content in turn]
+
+    budget_left = token_budget - estimate_tokens(kept_recent)
+    older_tokens = [estimate_tokens(turn) for turn in older]
+    older_total = sum(older_tokens)
+    dropped = 0
+    # Each dropped turn adds at most one clipped line to the digest.
+    while dropped < len(older) and older_total + dropped * HISTORY_DIGEST_CHARS // CHARS_PER_TOKEN > budget_left:
+        older_total -= older_tokens[dropped]
+        dropped += 1
+
+    compacted: List[types.Content] = []
+    if dropped:
+        compacted.append(_digest(older[:dropped]))
+    for turn in older[dropped:]:
+        compacted.extend(turn)
+    compacted.extend(kept_recent)
+
+    with _stats_lock:
+        _stats["turns_dropped"] += dropped
+    return compacted
+
+
+def compact_history(callback_context, llm_request) -> None:
+    """before_model_callback: compacts `llm_request.contents` in place of the full replayed history."""
+    if HISTORY_TOKEN_BUDGET <= 0 or not llm_request.contents:
+        return None
+    before = estimate_tokens(llm_request.contents)
+    compacted = compact_contents(llm_request.contents)
+    after = before if compacted is llm_request.contents else estimate_tokens(compacted)
+    with _stats_lock:
+        _stats["requests"] += 1
+        _stats["tokens_before"] += before
+        _stats["tokens_after"] += after
+        if after != before:
+            _stats["compacted"] += 1
+    if compacted is llm_request.contents:
+        return None
+
+    contents_before = len(llm_request.contents)
+    llm_request.contents = compacted
+    logger.info(
+        "Compacted history | agent=%s contents=%d->%d est_tokens=%d->%d",
+        getattr(callback_context, "agent_name", None),
+        contents_before,
+        len(compacted),
+        before,
+        after,
+    )
+    return None
+
+
+def compaction_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,112 @@
+"""
+Callbacks that put the deterministic resume pre-extraction (`tools.resume_extraction`) in front of
+resume_extractor_agent.
+
+* before_agent hashes the document uploaded with the user's message (PDF, DOCX or text). If this exact file
+  was analysed before, the stored result becomes the agent's answer and the model is not called at all.
+  Otherwise the document is pre-extracted and a summary is recorded in session state.
+* before_model swaps the document for its extracted text (when it has any) and tells the model which
+  fields the rules already found, so it only works out the rest.
+* after_agent fills any field the model left empty from the rules and stores the final result under the
+  document's hash for the next upload.
+"""
+
+import json
+from typing import Any, Dict, Optional, Tuple
+
+from google.genai import types
+
+from .tools import profile_merge, resume_extraction
+from .tools.config import get_logger
+
+STATE_KEY = "resume_prefill"
+OUTPUT_KEY = "document_analysis_patch"
+
+logger = get_logger("grestok.resume")
+
+
+def _document(content: Optional[types.Content]) -> Optional[Tuple[bytes, str]]:
+    """First locally readable attachment in `content`, as (bytes, mime type)."""
+    for part in (content.parts or []) if content else []:
+        blob = part.inline_data
+        if blob and blob.data and blob.mime_type in resume_extraction.SUPPORTED_MIMES:
+            return blob.data, blob.mime_type
+    return None
+
+
+def _prefill(callback_context) -> Optional[Dict[str, Any]]:
+    """This invocation's pre-extraction summary, ignoring one left in state by an earlier turn."""
+    prefill = callback_context.state.get(STATE_KEY)
+    if prefill and prefill.get("invocation") == callback_context.invocation_id:
+        return prefill
+    return None
+
+
+async def before_agent(callback_context) -> Optional[types.Content]:
+    document = _document(callback_context.user_content)
+    if document is None:
+        return None
+    data, mime_type = document
+    digest = resume_extraction.content_hash(data)
+
+    cached = resume_extraction.cached_result(digest)
+    if cached is not None:
+        logger.info("Resume already analysed, skipping the model | hash=%s", digest[:12])
+        callback_context.state[OUTPUT_KEY] = cached
+        return types.Content(role="model", parts=[types.Part(text=json.dumps(cached, ensure_ascii=False))])
+
+    extracted = await resume_extraction.pre_extract(data, mime_type)
+    callback_context.state[STATE_KEY] = {
+        "invocation": callback_context.invocation_id,
+        "hash": digest,
+        "fields": extracted["fields"],
+        "residual": extracted["residual"],
+    }
+    return None
+
+
+def before_model(callback_context, llm_request) -> None:
+    prefill = _prefill(callback_context)
+    if prefill is None:
+        return None
+
+    extracted = resume_extraction.pre_extracted(prefill["hash"])
+    if extracted and extracted["text"].strip():
+        # Plain text is far cheaper for the model than the rendered document.
+        for content in llm_request.contents or []:
+            for index, part in enumerate(content.parts or []):
+                blob = part.inline_data
+                if blob and blob.data and resume_extraction.content_hash(blob.data) == prefill["hash"]:
+                    content.parts[index] = types.Part(
+                        text=f"[Text of the uploaded {blob.mime_type} document]\n{extracted['text']}"
+                    )
+
+    if prefill["fields"]:
+        llm_request.append_instructions([
+            "These fields were already extracted from the document by exact rules; copy them into your "
+            f"output unchanged: {json.dumps(prefill['fields'], ensure_ascii=False)}. "
+            "Extract everything else from the document as usual (names, skills, work experience, education"
+            + (f", and {', '.join(prefill['residual'])}" if prefill["residual"] else "")
+            + ")."
+        ])
+    return None
+
+
+def after_agent(callback_context) -> None:
+    prefill = _prefill(callback_context)
+    if prefill is None:
+        return None
+    result = callback_context.state.get(OUTPUT_KEY)
+    if isinstance(result, str):
+        try:
+            result = json.loads(result)
+        except ValueError:
+            result = None
+    if not isinstance(result, dict):
+        return None
+
+    merged = profile_merge.fill_missing(result, prefill["fields"])
+    if merged != result:
+        callback_context.state[OUTPUT_KEY] = merged
+    resume_extraction.store_result(prefill["hash"], merged)
+    return None
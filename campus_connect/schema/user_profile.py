@@ -57,12 +57,33 @@ class AcademicProfile(BaseModel):
 
 
 # --- resume-extracted bucket ---
+# rawText, workExperience and education live in a compressed artifact under
+# /Users/{doc_id}/ResumeArtifacts/{sha256}; the user document keeps a reference and a summary.
+
+class ResumeArtifactRef(BaseModel):
+    id: Optional[str] = None  # sha256 of the stored content, also the artifact's document id
+    encoding: Optional[str] = None  # "zlib+json"
+    size_bytes: Optional[int] = Field(default=None, alias="sizeBytes")
+    compressed_bytes: Optional[int] = Field(default=None, alias="compressedBytes")
+    stored_at: Optional[datetime] = Field(default=None, alias="storedAt")
+
+
+class ResumeSummary(BaseModel):
+    raw_text_chars: Optional[int] = Field(default=None, alias="rawTextChars")
+    work_experience_count: Optional[int] = Field(default=None, alias="workExperienceCount")
+    education_count: Optional[int] = Field(default=None, alias="educationCount")
+    roles: Optional[List[str]] = None    # "Data Analyst @ Acme", most recent first as stored
+    degrees: Optional[List[str]] = None  # "MSc, IE Business School"
+
+
 # you can dump whatever you parsed from CV here; keep it loose
 class ResumeExtracted(BaseModel):
     raw_text: Optional[str] = Field(default=None, alias="rawText")
     skills: Optional[List[str]] = None
     work_experience: Optional[List[dict]] = Field(default=None, alias="workExperience")
     education: Optional[List[dict]] = None
+    artifact: Optional[ResumeArtifactRef] = None
+    summary: Optional[ResumeSummary] = None
 
 
 # --- wizard snapshot you already have in Firestore ---
@@ -101,3 +122,24 @@ class GrestokUser(BaseModel):
     model_config = {
         "populate_by_name": True,
     }
+
+
+# --- saved programs (/Users/{doc_id}/Shortlist/{item_id}) ---
+
+class ShortlistItem(BaseModel):
+    program_id: Optional[str] = Field(default=None, alias="programId")
+    school_id: Optional[str] = Field(default=None, alias="schoolId")
+    name: Optional[str] = None
+    school_name: Optional[str] = Field(default=None, alias="schoolName")
+    school_country_code: Optional[str] = Field(default=None, alias="schoolCountryCode")
+    program_level: Optional[str] = Field(default=None, alias="programLevel")
+    tuition: Optional[float] = None
+    currency: Optional[str] = None
+    status: Optional[str] = None      # e.g. "saved" / "applying" / "applied"
+    notes: Optional[str] = None
+    saved_at: Optional[datetime] = Field(default=None, alias="savedAt")
+
+    model_config = {
+        "populate_by_name": True,
+        "extra": "allow",   # keep whatever else the web app stores on an item
+    }
@@ -4,6 +4,7 @@ from google.adk import Agent
 from google.adk.tools import google_search
 
 from . import prompt
+from ... import tracing
 
 MODEL = "gemini-2.5-flash"
 
@@ -13,4 +14,8 @@ course_college_websearch_agent = Agent(
     name="course_college_websearch_agent",
     instruction=prompt.COURSE_COLLEGE_WEBSEARCH_PROMPT,
     tools=[google_search],
+    before_agent_callback=tracing.before_agent,
+    after_agent_callback=tracing.after_agent,
+    before_model_callback=tracing.before_model,
+    after_model_callback=tracing.after_model,
 )
\ No newline at end of file
@@ -1,6 +1,8 @@
 from google.adk.agents import LlmAgent
 from google.genai import types
 
+from ... import resume_prefill, tracing
+from ...history import compact_history
 from ...schema.user_profile import GrestokUser
 
 
@@ -31,4 +33,9 @@ When a user uploads a document for updating his/her profile, you need to analyze
     input_schema=GrestokUser, # Enforce JSON input
     output_schema=GrestokUser, # Enforce JSON output
     output_key="document_analysis_patch",
+    # The pre-extraction callbacks run first so a re-uploaded document can skip the agent entirely.
+    before_agent_callback=[resume_prefill.before_agent, tracing.before_agent],
+    after_agent_callback=[resume_prefill.after_agent, tracing.after_agent],
+    before_model_callback=[compact_history, resume_prefill.before_model, tracing.before_model],
+    after_model_callback=tracing.after_model,
 )
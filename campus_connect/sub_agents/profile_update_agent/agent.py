@@ -1,6 +1,13 @@
 from google.adk.agents import LlmAgent
+from ... import tracing
+from ...history import compact_history
 from ...schema.user_profile import GrestokUser
-from ...tools.update_profile_from_resume import update_profile_from_resume
+from ...tools.async_tools import ASYNC_TOOLS_ENABLED
+
+if ASYNC_TOOLS_ENABLED:
+    from ...tools.async_tools import update_profile_from_resume
+else:
+    from ...tools.update_profile_from_resume import update_profile_from_resume
 
 from .prompt import PROFILE_UPDATE_PROMPT
 
@@ -14,4 +21,10 @@ You can use web search tool if needed to verify any information and also to get
     input_schema=GrestokUser,
     tools=[update_profile_from_resume],
     output_key="profile_update_patch",
+    before_agent_callback=tracing.before_agent,
+    after_agent_callback=tracing.after_agent,
+    before_model_callback=[compact_history, tracing.before_model],
+    after_model_callback=tracing.after_model,
+    before_tool_callback=tracing.before_tool,
+    after_tool_callback=tracing.after_tool,
 )
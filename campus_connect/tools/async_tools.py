@@ -0,0 +1,217 @@
+"""
+Async-native variants of the agent tools for the FastAPI runner.
+
+The sync tools block on `.result()` / `.stream()`; run on the runner's single event loop they would stall
+every other user's request. These versions keep the same names, parameters and responses:
+Firestore goes through the shared `firestore.AsyncClient`, and BigQuery work is offloaded to a bounded thread pool.
+Set ASYNC_TOOLS=0 to register the sync tools instead (e.g. for local `adk run` debugging).
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from . import clients, get_bq_courses, profile_cache, profile_format, profile_merge, recommendations, resume_store, telemetry
+from .config import get_logger
+from .get_fs_user_profile import _normalize_email, _profile_response
+from .get_recommendations import _recommendations_response
+from .result_format import resolve_fields, resolve_format
+from .update_profile_from_resume import _prepare_update, _update_response
+
+ASYNC_TOOLS_ENABLED = os.environ.get("ASYNC_TOOLS", "1").strip().lower() not in ("0", "false", "no")
+TOOL_MAX_WORKERS = int(os.environ.get("TOOL_MAX_WORKERS", "8"))   # concurrent blocking BigQuery calls
+SHORTLIST_COLLECTION = os.environ.get("SHORTLIST_COLLECTION", "Shortlist")  # subcollection of /Users/{doc_id}
+
+logger = get_logger("grestok.async_tools")
+
+_executor = ThreadPoolExecutor(max_workers=TOOL_MAX_WORKERS, thread_name_prefix="grestok-tool")
+
+T = TypeVar("T")
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Runs a blocking call on the bounded tool pool, carrying contextvars across the thread hop."""
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(_executor, functools.partial(ctx.run, func, *args, **kwargs))
+
+
+def _offloaded(func: Callable[..., Dict[str, Any]]) -> Callable[..., Any]:
+    """Async twin of a sync tool; keeps its name, docstring and signature so ADK declares the same tool."""
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Dict[str, Any]:
+        return await run_blocking(func, *args, **kwargs)
+
+    return wrapper
+
+
+search_and_count = _offloaded(get_bq_courses.search_and_count)
+search_and_count_batch = _offloaded(get_bq_courses.search_and_count_batch)
+
+
+async def get_fs_user_profile(email: str, view: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Fetches a single user profile document from Firestore `/Users` using the email field.
+    Returns a dict containing the GrestokUser schema (camelCase keys) with every field present; missing values are
+    explicitly set to null so the LLM has a complete view of the shape.
+
+    `view` picks how much of the profile to return: "standard" (default: everything except the resume's
+    raw text, work experience and education, which are summarized in resumeExtracted.summary),
+    "preferences_academics" (name, email, preferences and academicProfile only) or "full".
+    """
+    normalized_email = _normalize_email(email)
+    view = profile_format.resolve_view(view)
+
+    cached = profile_cache.get_profile(normalized_email)
+    if cached is not None:
+        logger.info("Firestore user profile served from cache | doc_id=%s email=%s", cached["doc_id"], normalized_email)
+        doc_id, profile = cached["doc_id"], cached["data"]
+    else:
+        logger.info("Fetching Firestore user profile (async) for email=%s", normalized_email)
+        query = clients.firestore_async().collection("Users").where("email", "==", normalized_email).limit(1)
+        with telemetry.span("firestore.profile_query"):
+            docs = [doc async for doc in query.stream()]
+        telemetry.count_firestore("query", len(docs))
+        if not docs:
+            return _profile_response(normalized_email, None, None, view)
+
+        doc = docs[0]
+        doc_id, profile = doc.id, doc.to_dict() or {}
+        logger.info("Firestore user profile retrieved | doc_id=%s email=%s", doc_id, normalized_email)
+        profile_cache.remember(normalized_email, doc_id, profile, doc.update_time)
+
+    if resume_store.wants_artifact(view):
+        profile = await resume_store.hydrate_async(clients.firestore_async().collection("Users"), doc_id, profile)
+    return _profile_response(normalized_email, doc_id, profile, view)
+
+
+async def _load_snapshot(
+    users_ref, normalized_email: str, field_paths: Optional[List[str]] = None
+) -> Optional[Tuple[str, Dict[str, Any], Any]]:
+    """
+    (doc_id, data, update_time) for the user: live cache entry, else point read by cached doc_id, else query.
+    With `field_paths` only those fields are read, and the partial document is not cached.
+    """
+    cached = profile_cache.get_profile(normalized_email)
+    if cached is not None and profile_cache.is_live(normalized_email):
+        return cached["doc_id"], cached["data"], cached["update_time"]
+
+    doc_id = profile_cache.get_doc_id(normalized_email)
+    if doc_id is not None:
+        with telemetry.span("firestore.profile_get"):
+            snapshot = await users_ref.document(doc_id).get(field_paths=field_paths)
+        telemetry.count_firestore("get")
+        if snapshot.exists:
+            data = snapshot.to_dict() or {}
+            if field_paths is None:
+                profile_cache.remember(normalized_email, doc_id, data, snapshot.update_time)
+            return doc_id, data, snapshot.update_time
+        profile_cache.invalidate(normalized_email, forget_doc_id=True)
+
+    query = users_ref.where("email", "==", normalized_email).limit(1)
+    if field_paths is not None:
+        query = query.select(field_paths)
+    with telemetry.span("firestore.profile_query"):
+        existing_docs = [doc async for doc in query.stream()]
+    telemetry.count_firestore("query", len(existing_docs))
+    if not existing_docs:
+        return None
+    existing_doc = existing_docs[0]
+    data = existing_doc.to_dict() or {}
+    if field_paths is None:
+        profile_cache.remember(normalized_email, existing_doc.id, data, existing_doc.update_time)
+    else:
+        profile_cache.remember_doc_id(normalized_email, existing_doc.id)
+    return existing_doc.id, data, existing_doc.update_time
+
+
+async def _load_existing(
+    users_ref, normalized_email: str, field_paths: Optional[List[str]] = None
+) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Async twin of update_profile_from_resume._load_existing."""
+    snapshot = await _load_snapshot(users_ref, normalized_email, field_paths)
+    return None if snapshot is None else (snapshot[0], snapshot[1])
+
+
+async def load_user_document(email: str) -> Optional[Tuple[str, Dict[str, Any], Any]]:
+    """
+    Current `/Users` document for `email` as (doc_id, data, update_time), or None. Unlike the
+    get_fs_user_profile tool it never serves a cached snapshot that no listener keeps current.
+    """
+    return await _load_snapshot(clients.firestore_async().collection("Users"), _normalize_email(email))
+
+
+async def load_shortlist(doc_id: str) -> List[Tuple[str, Dict[str, Any], Any]]:
+    """(item_id, data, update_time) for every program saved under `/Users/{doc_id}/{SHORTLIST_COLLECTION}`."""
+    items_ref = clients.firestore_async().collection("Users").document(doc_id).collection(SHORTLIST_COLLECTION)
+    with telemetry.span("firestore.shortlist_query"):
+        docs = [doc async for doc in items_ref.stream()]
+    telemetry.count_firestore("query", len(docs))
+    return [(doc.id, doc.to_dict() or {}, doc.update_time) for doc in docs]
+
+
+async def get_recommendations(
+    email: str,
+    limit: Optional[int] = None,
+    output_format: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Returns the programs precomputed for the student from their profile (preferences, wizard answers,
+    highest qualification, resume skills and roles), best match first, without running a search.
+    `status` is "fresh", "stale" (the profile changed since they were computed; they are still returned
+    while a refresh runs in the background) or "missing" (none yet); `pending` says a refresh is queued.
+    `filters` echoes the constraints they were searched with. `limit`, `output_format` and `fields`
+    work as in search_and_count. For anything beyond the saved preferences, use search_and_count.
+    """
+    normalized_email = _normalize_email(email)
+    output_format = resolve_format(output_format)
+    fields = resolve_fields(fields)
+
+    users_ref = clients.firestore_async().collection("Users")
+    existing = await _load_existing(users_ref, normalized_email, list(recommendations.INPUT_PATHS))
+    if existing is None:
+        return _recommendations_response(normalized_email, None, limit, output_format, fields)
+    doc_id, data = existing
+    document = await recommendations.load_async(doc_id, recommendations.fingerprint(data))
+    described = recommendations.describe(normalized_email, doc_id, data, document)
+    return _recommendations_response(normalized_email, described, limit, output_format, fields)
+
+
+async def update_profile_from_resume(email: str, user_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Update Firestore user profile based on the Dict object  provided.
+    Only fills in fields that are missing/empty in the existing document; skills, education and work
+    experience entries are merged into the stored lists (see `profile_merge`).
+    """
+    normalized_email, grestok_user = _prepare_update(email, user_data)
+
+    logger.info("Fetching Firestore user profile (async) for email=%s", normalized_email)
+    users_ref = clients.firestore_async().collection("Users")
+    mask = resume_store.read_mask(profile_merge.read_mask(grestok_user))
+    existing = await _load_existing(users_ref, normalized_email, mask)
+
+    if existing is None:
+        logger.warning("No existing Firestore document found for email: %s", email)
+        return {"status": "error", "message": "User profile not found."}
+
+    doc_id, existing_data = existing
+    if resume_store.REF_PATH in mask:
+        existing_data = await resume_store.hydrate_async(users_ref, doc_id, existing_data)
+    updated_fields = profile_merge.compute_update(existing_data, grestok_user)
+    writes, artifact = resume_store.plan_writes(existing_data, updated_fields)
+    if artifact is not None:
+        await resume_store.save_async(users_ref, doc_id, artifact)
+
+    if writes:
+        with telemetry.span("firestore.profile_update", fields=len(writes)):
+            write_result = await users_ref.document(doc_id).update(writes)
+        telemetry.count_firestore("update")
+        profile_cache.apply_update(normalized_email, writes, write_result.update_time)
+        if recommendations.affected(list(writes)):
+            recommendations.schedule(normalized_email, doc_id)
+    return _update_response(email, updated_fields)
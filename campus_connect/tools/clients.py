@@ -0,0 +1,116 @@
+"""
+Process-wide Google Cloud clients, created on first use and shared by every tool.
+
+Importing a tool module no longer resolves credentials or builds a client; the first `bigquery()`,
+`firestore()` or `firestore_async()` call does, once, and later calls reuse it. The Firestore tools share
+one sync client (and so one gRPC channel pool) instead of a client per module.
+
+`warm_up()` builds the clients and fetches their access tokens ahead of the first request; the runner calls
+it from its startup hook. `override()` swaps in a stand-in (benchmarks, emulators) without patching modules.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from . import telemetry
+from .config import get_logger
+
+PROJECT_ID = os.environ.get("GOOGLE_CLOUD_PROJECT") or os.environ.get("PROJECT_ID") or "grestok-app-dev"
+
+logger = get_logger("grestok.clients")
+
+
+def _new_bigquery() -> Any:
+    from google.cloud import bigquery as bq
+
+    return bq.Client(project=PROJECT_ID)
+
+
+def _new_firestore() -> Any:
+    from google.cloud import firestore as fs
+
+    return fs.Client(project=PROJECT_ID)
+
+
+def _new_firestore_async() -> Any:
+    from google.cloud import firestore as fs
+
+    return fs.AsyncClient(project=PROJECT_ID)
+
+
+_FACTORIES: Dict[str, Callable[[], Any]] = {
+    "bigquery": _new_bigquery,
+    "firestore": _new_firestore,
+    "firestore_async": _new_firestore_async,
+}
+
+_clients: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def get(name: str) -> Any:
+    client = _clients.get(name)
+    if client is not None:
+        return client
+    with _lock:
+        client = _clients.get(name)
+        if client is None:
+            with telemetry.span("client.create", client=name):
+                client = _FACTORIES[name]()
+            _clients[name] = client
+            logger.info("Created %s client | project=%s", name, PROJECT_ID)
+        return client
+
+
+def bigquery() -> Any:
+    """Shared `google.cloud.bigquery.Client`."""
+    return get("bigquery")
+
+
+def firestore() -> Any:
+    """Shared sync `google.cloud.firestore.Client`."""
+    return get("firestore")
+
+
+def firestore_async() -> Any:
+    """Shared `google.cloud.firestore.AsyncClient`; used from the runner's event loop only."""
+    return get("firestore_async")
+
+
+def override(name: str, client: Any) -> None:
+    """Replaces the shared client `name` (None drops it so the next call builds a real one)."""
+    if name not in _FACTORIES:
+        raise KeyError(f"unknown client {name!r}; expected one of {sorted(_FACTORIES)}")
+    with _lock:
+        if client is None:
+            _clients.pop(name, None)
+        else:
+            _clients[name] = client
+
+
+def _prime_credentials(client: Any) -> None:
+    """Fetches an access token now so the first query does not pay for the OAuth round trip."""
+    credentials = getattr(client, "_credentials", None)
+    if credentials is None or credentials.valid:
+        return
+    import google.auth.transport.requests
+
+    credentials.refresh(google.auth.transport.requests.Request())
+
+
+def warm_up(name: str) -> float:
+    """Builds client `name` and primes its credentials; returns the elapsed milliseconds."""
+    started = time.perf_counter()
+    client = get(name)
+    with telemetry.span("client.warm_up", client=name):
+        _prime_credentials(client)
+        if name == "firestore":
+            getattr(client, "_firestore_api", None)  # builds the gRPC transport and channel
+    return (time.perf_counter() - started) * 1000.0
+
+
+def created() -> Dict[str, str]:
+    """Names of the clients built so far and their types."""
+    return {name: type(client).__name__ for name, client in _clients.items()}
@@ -1,19 +1,138 @@
+"""
+Shared logging setup for the `grestok.*` tool loggers and the runner's `campus_connect_agent` logger.
+
+Request code only renders the message and enqueues the record: a single QueueListener thread formats
+and writes it, so JSON formatting, payload serialization and stdout writes never run on the event loop.
+Records are JSON lines by default (Cloud Logging picks up `severity` and `message`); LOG_FORMAT=text
+keeps the classic one-line format.
+
+Bulky payloads (tool responses, function-call args) go in `extra={"payload": ...}`. They are kept for a
+LOG_PAYLOAD_SAMPLE_RATE fraction of records only and are clipped to LOG_PAYLOAD_MAX_CHARS when written.
+"""
+
+import atexit
+import json
 import logging
+import os
+import queue
+import random
 import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").strip().upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json").strip().lower()               # json | text
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))                  # records; overflow is dropped
+LOG_MAX_MESSAGE_CHARS = int(os.environ.get("LOG_MAX_MESSAGE_CHARS", "4000"))
+LOG_PAYLOAD_MAX_CHARS = int(os.environ.get("LOG_PAYLOAD_MAX_CHARS", "2000"))
+LOG_PAYLOAD_SAMPLE_RATE = float(os.environ.get("LOG_PAYLOAD_SAMPLE_RATE", "0.1"))  # fraction of payloads kept
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Attributes every LogRecord has; anything else on a record came from `extra=` and is emitted as a field.
+_RESERVED = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime", "payload"}
+
+_setup_lock = threading.Lock()
+_queue_handler: Optional[QueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+
+def _clip(text: str, limit: int) -> str:
+    if limit <= 0 or len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [{len(text) - limit} chars truncated]"
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "time": self.formatTime(record),
+            "severity": record.levelname,
+            "logger": record.name,
+            "message": _clip(record.getMessage(), LOG_MAX_MESSAGE_CHARS),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        payload = getattr(record, "payload", None)
+        if payload is not None:
+            entry["payload"] = _clip(json.dumps(payload, ensure_ascii=False, default=str), LOG_PAYLOAD_MAX_CHARS)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self) -> None:
+        super().__init__(TEXT_FORMAT)
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = _clip(super().format(record), LOG_MAX_MESSAGE_CHARS)
+        payload = getattr(record, "payload", None)
+        if payload is not None:
+            line += " | payload=" + _clip(json.dumps(payload, ensure_ascii=False, default=str), LOG_PAYLOAD_MAX_CHARS)
+        return line
+
+
+class PayloadSampler(logging.Filter):
+    """Keeps the `payload` extra on a sample of records; the record itself is always logged."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "payload", None) is not None and random.random() >= LOG_PAYLOAD_SAMPLE_RATE:
+            record.payload = None
+        return True
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Enqueues records without running the formatter. `msg % args` is rendered in the calling thread, so a
+    mutable argument changed after the call cannot alter the logged message; the JSON/text formatting and
+    payload serialization happen on the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Tracebacks pin frames; render them now and let the frames go.
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass  # shed log load rather than block a request
+
+
+def _shared_handler() -> QueueHandler:
+    global _queue_handler, _listener
+    with _setup_lock:
+        if _queue_handler is None:
+            log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+            stream_handler = logging.StreamHandler(sys.stdout)
+            stream_handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+            _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+            _listener.start()
+            atexit.register(_listener.stop)  # drain buffered records on shutdown
+
+            _queue_handler = DeferredQueueHandler(log_queue)
+            _queue_handler.addFilter(PayloadSampler())
+        return _queue_handler
+
 
 def get_logger(name: str) -> logging.Logger:
-    """Initializes a logger with a default handler and formatter."""
+    """Initializes a logger that writes through the shared background queue."""
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
+    logger.setLevel(LOG_LEVEL)
     logger.propagate = False  # Prevent duplicate logs in parent loggers
 
     # If the logger already has handlers, don't add another one.
     if not logger.handlers:
-        handler = logging.StreamHandler(sys.stdout)
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-        )
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        logger.addHandler(_shared_handler())
 
     return logger
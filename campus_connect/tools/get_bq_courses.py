@@ -1,10 +1,21 @@
+import base64
+import hashlib
 import logging
 import os
-from typing import Any, Dict, List, Optional
+import secrets
+import threading
+import time
+from array import array
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from google.cloud import bigquery
 
+from . import clients, local_index, telemetry
+from .result_format import format_hits, resolve_fields, resolve_format
+from .cache import TTLCache
 from .config import get_logger
+from .search_filters import describe_filters, filter_sql, filters_key, normalize_filters
 
 # ---------- Config ----------
 PROJECT_ID    = os.environ.get("GOOGLE_CLOUD_PROJECT") or os.environ.get("PROJECT_ID") or "grestok-app-dev"
@@ -15,87 +26,236 @@ BQ_LOCATION   = os.environ.get("BQ_LOCATION", "asia-south1")
 FRACTION_IVF  = float(os.environ.get("IVF_FRACTION", "0.05"))           # 5% of lists
 DEFAULT_THRESH = float(os.environ.get("SIM_THRESHOLD", "0.35"))         # cosine DISTANCE threshold (smaller = closer)
 EMBED_DIM     = int(os.environ.get("EMBED_DIM", "768"))                # must match how you built embeddings
+EMBED_CACHE_SIZE = int(os.environ.get("EMBED_CACHE_SIZE", "1024"))      # cached query vectors
+EMBED_CACHE_TTL  = float(os.environ.get("EMBED_CACHE_TTL", "3600"))     # seconds
+CURSOR_WINDOW    = int(os.environ.get("CURSOR_WINDOW", "200"))          # candidates fetched per cursor window
+CURSOR_CACHE_SIZE = int(os.environ.get("CURSOR_CACHE_SIZE", "256"))     # live result windows kept in memory
+CURSOR_TTL       = float(os.environ.get("CURSOR_TTL", "900"))           # seconds
+TOTALS_MODE      = os.environ.get("TOTALS_MODE", "exact")            # exact | estimate | lazy | skip
+TOTALS_CACHE_SIZE = int(os.environ.get("TOTALS_CACHE_SIZE", "2048"))    # memoized (query vector, threshold) totals
+TOTALS_CACHE_TTL = float(os.environ.get("TOTALS_CACHE_TTL", "21600"))   # seconds; catalog refreshes are rare
+TOTALS_ESTIMATE_TOPK = int(os.environ.get("TOTALS_ESTIMATE_TOPK", "1000"))  # IVF candidates used for estimates
+BATCH_MAX_QUERIES = int(os.environ.get("BATCH_MAX_QUERIES", "8"))    # query texts per search_and_count_batch call
+MAX_TOPK         = 2000
+TOTALS_MODES     = ("exact", "estimate", "lazy", "skip")
 
 logger = get_logger("grestok.bigquery")
 
-client = bigquery.Client(project=PROJECT_ID)
+_embedding_cache = TTLCache(EMBED_CACHE_SIZE, EMBED_CACHE_TTL, name="query_embeddings")
+_result_windows = TTLCache(CURSOR_CACHE_SIZE, CURSOR_TTL, name="result_windows")
+_totals_cache = TTLCache(TOTALS_CACHE_SIZE, TOTALS_CACHE_TTL, name="search_totals")
+_totals_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="bq-totals")
+_pending_totals: Dict[Tuple[Any, ...], Future] = {}   # guarded by _pending_lock
+_pending_lock = threading.Lock()
 
 
-def search_and_count(
-    query_text: str,
-    limit: int = 15,
-    offset: int = 0,
-    threshold: Optional[float] = None,
-    use_brute_force: bool = False,
-) -> Dict[str, Any]:
-    """
-    Performs a pure vector similarity search over the courses embedding index in BigQuery.
-    Provide a richly described natural-language query that already encodes any desired constraints
-    (country, level, budget, duration, etc.), because no structured filters are applied server-side.
+def _normalize_query(query_text: str) -> str:
+    return " ".join((query_text or "").split())
 
-    Returns:
-      {
-        "hits": [ { ui fields... , "similarity": float }, ... ],
-        "next_offset": int|None,
-        "totals": { "programs": int, "schools": int, "threshold": float }
-      }
+
+def embedding_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters for the in-process query embedding cache."""
+    return _embedding_cache.stats()
+
+
+def result_window_stats() -> Dict[str, Any]:
+    """Hit/miss counters for the cursor-backed result windows."""
+    return _result_windows.stats()
+
+
+def totals_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters for memoized exact search totals."""
+    return _totals_cache.stats()
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000.0, 1)
+
+
+def _vector_key(qvec: List[float]) -> str:
+    return hashlib.sha1(array("d", qvec).tobytes()).hexdigest()
+
+
+def _encode_cursor(window_id: str, position: int) -> str:
+    raw = f"{window_id}:{position}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        window_id, position = base64.urlsafe_b64decode(padded).decode("ascii").rsplit(":", 1)
+        return window_id, max(0, int(position))
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError(f"invalid cursor: {cursor!r}") from exc
+
+
+def embed_query(query_text: str) -> List[float]:
     """
-    thresh = threshold if threshold is not None else DEFAULT_THRESH
-    topk = max(1, min(2000, limit + offset + 1))
-    options_json = '{"use_brute_force": true}' if use_brute_force else f'{{"fraction_lists_to_search": {FRACTION_IVF} }}'
+    Returns the RETRIEVAL_QUERY embedding for `query_text`, calling the remote model only on a cache miss.
+    Vectors are cached per (normalized query, EMBED_DIM) so later pages and retries reuse them.
+    """
+    normalized = _normalize_query(query_text)
+    cache_key = (normalized.casefold(), EMBED_DIM)
+    cached = _embedding_cache.get(cache_key)
+    if cached is not None:
+        logger.debug("Query embedding cache hit | query=%r", normalized)
+        return cached
 
+    mdl = f"`{PROJECT_ID}.{BQ_DATASET}.{BQ_MODEL}`"
+    embed_sql = f"""
+SELECT ml_generate_embedding_result AS qvec
+FROM ML.GENERATE_EMBEDDING(
+  MODEL {mdl},
+  (SELECT @q AS content),
+  STRUCT(TRUE AS flatten_json_output,
+         'RETRIEVAL_QUERY' AS task_type,
+         {EMBED_DIM} AS output_dimensionality)  -- literal
+)
+"""
+    with telemetry.span("bigquery.embed"):
+        embed_job = clients.bigquery().query(
+            embed_sql,
+            job_config=bigquery.QueryJobConfig(
+                query_parameters=[bigquery.ScalarQueryParameter("q", "STRING", normalized)]
+            ),
+            location=BQ_LOCATION,
+        )
+        rows = list(embed_job.result())
+    telemetry.record_bigquery_job("embed", embed_job)
+    if not rows or not rows[0]["qvec"]:
+        raise RuntimeError(f"Embedding model returned no vector for query {normalized!r}")
+
+    qvec = [float(x) for x in rows[0]["qvec"]]
+    _embedding_cache.set(cache_key, qvec)
+    stats = _embedding_cache.stats()
     logger.info(
-        "Running BigQuery vector search | query=%r limit=%d offset=%d threshold=%.3f brute_force=%s topk=%d",
-        query_text,
-        limit,
-        offset,
-        thresh,
-        use_brute_force,
-        topk,
+        "Query embedding generated | dim=%d cache_hits=%d cache_misses=%d",
+        len(qvec),
+        stats["hits"],
+        stats["misses"],
     )
+    return qvec
+
 
+def embed_queries(query_texts: List[str]) -> List[List[float]]:
+    """
+    Embeddings for several queries, in order. Cached vectors are reused and every miss is embedded in a
+    single ML.GENERATE_EMBEDDING job, so a batch costs at most one model call.
+    """
+    normalized = [_normalize_query(text) for text in query_texts]
+    vectors: Dict[str, List[float]] = {}
+    missing: Dict[str, str] = {}
+    for text in normalized:
+        folded = text.casefold()
+        if folded in vectors or folded in missing:
+            continue
+        cached = _embedding_cache.get((folded, EMBED_DIM))
+        if cached is not None:
+            vectors[folded] = cached
+        else:
+            missing[folded] = text
+
+    if missing:
+        mdl = f"`{PROJECT_ID}.{BQ_DATASET}.{BQ_MODEL}`"
+        embed_sql = f"""
+SELECT content, ml_generate_embedding_result AS qvec
+FROM ML.GENERATE_EMBEDDING(
+  MODEL {mdl},
+  (SELECT content FROM UNNEST(@texts) AS content),
+  STRUCT(TRUE AS flatten_json_output,
+         'RETRIEVAL_QUERY' AS task_type,
+         {EMBED_DIM} AS output_dimensionality)  -- literal
+)
+"""
+        with telemetry.span("bigquery.embed_batch", queries=len(missing)):
+            embed_job = clients.bigquery().query(
+                embed_sql,
+                job_config=bigquery.QueryJobConfig(
+                    query_parameters=[bigquery.ArrayQueryParameter("texts", "STRING", list(missing.values()))]
+                ),
+                location=BQ_LOCATION,
+            )
+            rows = list(embed_job.result())
+        telemetry.record_bigquery_job("embed_batch", embed_job)
+        for row in rows:
+            if row["qvec"]:
+                folded = row["content"].casefold()
+                vectors[folded] = [float(x) for x in row["qvec"]]
+                _embedding_cache.set((folded, EMBED_DIM), vectors[folded])
+        logger.info("Query embeddings generated | batch=%d missing=%d", len(normalized), len(missing))
+
+    for text in normalized:
+        if text.casefold() not in vectors:
+            raise RuntimeError(f"Embedding model returned no vector for query {text!r}")
+    return [vectors[text.casefold()] for text in normalized]
+
+
+def _row_to_hit(row_dict: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    program_id = row_dict.get("gt_program_id")
+    if program_id is None:
+        logger.warning("Skipping result without program id | row=%s", row_dict)
+        return None
+    school_id = row_dict.get("gt_school_id")
+    program_level = row_dict.get("programLevel") or row_dict.get("program_category")
+    distance = row_dict.get("distance")
+    return {
+        "program_id": str(program_id),
+        "school_id": str(school_id) if school_id is not None else None,
+        "name": row_dict.get("name"),
+        "currency": row_dict.get("currency"),
+        "programLevel": program_level,
+        "program_category": row_dict.get("program_category"),
+        "tuition": float(row_dict.get("tuition")) if row_dict.get("tuition") is not None else None,
+        "school_name": row_dict.get("school_name"),
+        "school_city": row_dict.get("school_city"),
+        "school_province": row_dict.get("school_province"),
+        "school_countryCode": row_dict.get("school_countryCode"),
+        "similarity": float(1.0 - distance) if distance is not None else None,
+    }
+
+
+# Columns stored in the vector index, so VECTOR_SEARCH returns them without reading the base table.
+_HIT_COLUMNS = (
+    "gt_program_id", "gt_school_id", "name", "currency", "programLevel", "program_category", "tuition",
+    "school_name", "school_city", "school_province", "school_countryCode",
+)
+_STORED_HIT_COLUMNS = ", ".join(_HIT_COLUMNS)
+_BASE_HIT_COLUMNS = ",\n    ".join(f"base.{column}" for column in _HIT_COLUMNS)
+
+
+def _submit_hits_job(
+    qvec: List[float],
+    topk: int,
+    limit: int,
+    offset: int,
+    use_brute_force: bool,
+    filters: Optional[Dict[str, Any]] = None,
+) -> bigquery.QueryJob:
+    """
+    Submits VECTOR_SEARCH for the top `topk` neighbours, selecting rows [offset, offset + limit).
+    Filters go into the base-table subquery so the index pre-filters on stored columns.
+    """
     tbl_search = f"`{PROJECT_ID}.{BQ_DATASET}.{BQ_TABLE}`"
-    mdl = f"`{PROJECT_ID}.{BQ_DATASET}.{BQ_MODEL}`"
-    logger.debug("Using BigQuery resources | table=%s model=%s", tbl_search, mdl)
-    # ---------- HITS (IVF) ----------
+    where_sql, filter_params = filter_sql(filters)
+    options_json = '{"use_brute_force": true}' if use_brute_force else f'{{"fraction_lists_to_search": {FRACTION_IVF} }}'
+
     # Only select fields that are STORED in the index + distance.
     top_hits_sql = f"""
-WITH query_vec AS (
-  SELECT ml_generate_embedding_result AS qvec
-  FROM ML.GENERATE_EMBEDDING(
-    MODEL {mdl},
-    (SELECT @q AS content),
-    STRUCT(TRUE AS flatten_json_output,
-           'RETRIEVAL_QUERY' AS task_type,
-           {EMBED_DIM} AS output_dimensionality)  -- literal
-  )
-),
-vs AS (
+WITH vs AS (
   SELECT
-    base.gt_program_id,
-    base.gt_school_id,
-    base.name,
-    base.currency,
-    base.programLevel,
-    base.program_category,
-    base.tuition,
-    base.school_name,
-    base.school_city,
-    base.school_province,
-    base.school_countryCode,
+    {_BASE_HIT_COLUMNS},
     distance
   FROM VECTOR_SEARCH(
     (
       SELECT
         -- select ONLY columns stored in the index + embedding
-        gt_program_id, gt_school_id,
-        name, currency, programLevel, program_category, tuition,
-        school_name, school_city, school_province, school_countryCode,
-        embedding
+        {_STORED_HIT_COLUMNS}, embedding
       FROM {tbl_search}
+      {where_sql}
     ),
     'embedding',
-    (SELECT qvec FROM query_vec),
+    (SELECT @qvec AS qvec),
     query_column_to_search => 'qvec',
     top_k => @topk,
     distance_type => 'COSINE',
@@ -109,70 +269,45 @@ LIMIT @limit OFFSET @offset
 """
 
     params_hits = [
-        bigquery.ScalarQueryParameter("q", "STRING", query_text),
+        bigquery.ArrayQueryParameter("qvec", "FLOAT64", qvec),
         bigquery.ScalarQueryParameter("topk", "INT64", topk),
         bigquery.ScalarQueryParameter("limit", "INT64", limit),
         bigquery.ScalarQueryParameter("offset", "INT64", offset),
+        *filter_params,
     ]
     if logger.isEnabledFor(logging.DEBUG):
         logger.debug("Top hits SQL:\n%s", top_hits_sql)
 
-    hits_job = client.query(
+    return clients.bigquery().query(
         top_hits_sql,
         job_config=bigquery.QueryJobConfig(query_parameters=params_hits),
         location=BQ_LOCATION,
     )
-    top_rows = list(hits_job.result())
 
+
+def _collect_hits(rows) -> List[Dict[str, Any]]:
     hits: List[Dict[str, Any]] = []
-    for r in top_rows:
-        row_dict = dict(r.items())
-        program_id = row_dict.get("gt_program_id")
-        if program_id is None:
-            logger.warning("Skipping result without program id | row=%s", row_dict)
-            continue
-        school_id = row_dict.get("gt_school_id")
-        program_level = row_dict.get("programLevel") or row_dict.get("program_category")
-        distance = row_dict.get("distance")
-        hits.append({
-            "program_id": str(program_id),
-            "school_id": str(school_id) if school_id is not None else None,
-            "name": row_dict.get("name"),
-            "currency": row_dict.get("currency"),
-            "programLevel": program_level,
-            "program_category": row_dict.get("program_category"),
-            "tuition": float(row_dict.get("tuition")) if row_dict.get("tuition") is not None else None,
-            "school_name": row_dict.get("school_name"),
-            "school_city": row_dict.get("school_city"),
-            "school_province": row_dict.get("school_province"),
-            "school_countryCode": row_dict.get("school_countryCode"),
-            "similarity": float(1.0 - distance) if distance is not None else None,
-        })
+    for r in rows:
+        hit = _row_to_hit(dict(r.items()))
+        if hit is not None:
+            hits.append(hit)
+    return hits
 
-    logger.info(
-        "Vector search returned %d hits | limit=%d offset=%d", len(hits), limit, offset
-    )
-    if not hits:
-        logger.warning("Vector search yielded no results for query '%s'", query_text)
 
-    # ---------- COUNTS (exact over same filters) ----------
+def _submit_counts_job(
+    qvec: List[float], thresh: float, filters: Optional[Dict[str, Any]] = None
+) -> bigquery.QueryJob:
+    """Exact programs/schools/countries within `thresh` cosine distance of the query vector (full scan)."""
+    tbl_search = f"`{PROJECT_ID}.{BQ_DATASET}.{BQ_TABLE}`"
+    where_sql, filter_params = filter_sql(filters)
     counts_sql = f"""
-WITH query_vec AS (
-  SELECT ml_generate_embedding_result AS qvec
-  FROM ML.GENERATE_EMBEDDING(
-    MODEL {mdl},
-    (SELECT @q AS content),
-    STRUCT(TRUE AS flatten_json_output,
-           'RETRIEVAL_QUERY' AS task_type,
-           {EMBED_DIM} AS output_dimensionality)  -- literal
-  )
-),
-scored AS (
+WITH scored AS (
   SELECT
     school_countryCode,
     gt_school_id,
-    ML.DISTANCE(embedding, (SELECT qvec FROM query_vec), 'COSINE') AS cos_dist
+    ML.DISTANCE(embedding, @qvec, 'COSINE') AS cos_dist
   FROM {tbl_search}
+  {where_sql}
 )
 SELECT
   COUNTIF(cos_dist <= @thresh) AS programs_total,
@@ -181,37 +316,794 @@ SELECT
 FROM scored
 """
     params_counts = [
-        bigquery.ScalarQueryParameter("q", "STRING", query_text),
+        bigquery.ArrayQueryParameter("qvec", "FLOAT64", qvec),
         bigquery.ScalarQueryParameter("thresh", "FLOAT64", thresh),
+        *filter_params,
     ]
     if logger.isEnabledFor(logging.DEBUG):
         logger.debug("Counts SQL:\n%s", counts_sql)
 
-    totals_job = client.query(
+    return clients.bigquery().query(
         counts_sql,
         job_config=bigquery.QueryJobConfig(query_parameters=params_counts),
         location=BQ_LOCATION,
     )
+
+
+def _collect_counts(totals_job: bigquery.QueryJob, thresh: float) -> Dict[str, Any]:
     totals_row = list(totals_job.result())[0]
-    totals = {
+    return {
         "programs": int(totals_row["programs_total"] or 0),
         "schools": int(totals_row["schools_total"] or 0),
         "countries": int(totals_row["countries_total"] or 0),
         "threshold": thresh,
+        "status": "exact",
+    }
+
+
+def _submit_estimate_job(
+    qvec: List[float], thresh: float, filters: Optional[Dict[str, Any]] = None
+) -> bigquery.QueryJob:
+    """
+    Estimates totals from the IVF candidate set instead of scanning the table.
+    Counts are exact for matches among the top TOTALS_ESTIMATE_TOPK neighbours; when every candidate
+    is a match the true totals may be larger, which is flagged with `saturated`.
+    """
+    tbl_search = f"`{PROJECT_ID}.{BQ_DATASET}.{BQ_TABLE}`"
+    where_sql, filter_params = filter_sql(filters)
+    estimate_sql = f"""
+SELECT
+  COUNTIF(distance <= @thresh) AS programs_total,
+  COUNT(DISTINCT IF(distance <= @thresh, base.gt_school_id, NULL)) AS schools_total,
+  COUNT(DISTINCT IF(distance <= @thresh, base.school_countryCode, NULL)) AS countries_total
+FROM VECTOR_SEARCH(
+  (
+    SELECT gt_school_id, school_countryCode, embedding
+    FROM {tbl_search}
+    {where_sql}
+  ),
+  'embedding',
+  (SELECT @qvec AS qvec),
+  query_column_to_search => 'qvec',
+  top_k => @topk,
+  distance_type => 'COSINE',
+  options => '{{"fraction_lists_to_search": {FRACTION_IVF} }}'
+)
+"""
+    params_estimate = [
+        bigquery.ArrayQueryParameter("qvec", "FLOAT64", qvec),
+        bigquery.ScalarQueryParameter("thresh", "FLOAT64", thresh),
+        bigquery.ScalarQueryParameter("topk", "INT64", TOTALS_ESTIMATE_TOPK),
+        *filter_params,
+    ]
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Estimate totals SQL:\n%s", estimate_sql)
+
+    return clients.bigquery().query(
+        estimate_sql,
+        job_config=bigquery.QueryJobConfig(query_parameters=params_estimate),
+        location=BQ_LOCATION,
+    )
+
+
+def _collect_estimate(estimate_job: bigquery.QueryJob, thresh: float) -> Dict[str, Any]:
+    row = list(estimate_job.result())[0]
+    programs = int(row["programs_total"] or 0)
+    return {
+        "programs": programs,
+        "schools": int(row["schools_total"] or 0),
+        "countries": int(row["countries_total"] or 0),
+        "threshold": thresh,
+        "status": "estimated",
+        "saturated": programs >= TOTALS_ESTIMATE_TOPK,
     }
 
-    next_offset = (offset + limit) if totals["programs"] > (offset + limit) else None
+
+def _totals_key(qvec: List[float], thresh: float, filters: Optional[Dict[str, Any]]) -> Tuple[Any, ...]:
+    return (_vector_key(qvec), thresh, filters_key(filters))
+
+
+def _exact_totals_memoized(
+    qvec: List[float], thresh: float, filters: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    return _start_totals(qvec, thresh, "exact", filters)()
+
+
+def _schedule_exact_totals(qvec: List[float], thresh: float, filters: Optional[Dict[str, Any]] = None) -> None:
+    """Computes exact totals in the background so a later page or repeat query finds them memoized."""
+    key = _totals_key(qvec, thresh, filters)
+
+    def _run() -> None:
+        try:
+            _exact_totals_memoized(qvec, thresh, filters)
+        except Exception:  # background best-effort; the next request retries
+            logger.exception("Background totals computation failed | threshold=%.3f", thresh)
+
+    def _forget(future: Future) -> None:
+        with _pending_lock:
+            if _pending_totals.get(key) is future:
+                del _pending_totals[key]
+
+    with _pending_lock:
+        if key in _pending_totals:
+            return
+        future = _totals_executor.submit(_run)
+        _pending_totals[key] = future
+    # Added after registration, so it runs (immediately if need be) even when the job already finished.
+    future.add_done_callback(_forget)
+
+
+def _start_totals(
+    qvec: List[float],
+    thresh: float,
+    totals_mode: str,
+    filters: Optional[Dict[str, Any]] = None,
+) -> Callable[[], Dict[str, Any]]:
+    """
+    Submits whatever totals work `totals_mode` needs and returns a callable that waits for the result,
+    so the counts job can run while the hits job is still in flight.
+    """
+    if totals_mode not in TOTALS_MODES:
+        raise ValueError(f"totals_mode must be one of {TOTALS_MODES}, got {totals_mode!r}")
+
+    # Memoized exact totals are free regardless of the requested mode.
+    key = _totals_key(qvec, thresh, filters)
+    memoized = _totals_cache.get(key)
+    if memoized is not None:
+        return lambda: memoized
+
+    if totals_mode == "exact":
+        counts_job = _submit_counts_job(qvec, thresh, filters)
+
+        def _wait_exact() -> Dict[str, Any]:
+            totals = _collect_counts(counts_job, thresh)
+            telemetry.record_bigquery_job("count", counts_job)
+            _totals_cache.set(key, totals)
+            return totals
+
+        return _wait_exact
+
+    if totals_mode == "estimate":
+        estimate_job = _submit_estimate_job(qvec, thresh, filters)
+
+        def _wait_estimate() -> Dict[str, Any]:
+            totals = _collect_estimate(estimate_job, thresh)
+            telemetry.record_bigquery_job("estimate", estimate_job)
+            return totals
+
+        return _wait_estimate
+
+    if totals_mode == "lazy":
+        _schedule_exact_totals(qvec, thresh, filters)
+    placeholder = {
+        "programs": None,
+        "schools": None,
+        "countries": None,
+        "threshold": thresh,
+        "status": "pending" if totals_mode == "lazy" else "skipped",
+    }
+    return lambda: placeholder
+
+
+def _local_search(
+    index: "local_index.LocalIndex",
+    qvec: List[float],
+    topk: int,
+    page_limit: int,
+    offset: int,
+    thresh: float,
+    use_brute_force: bool,
+    totals_mode: str,
+    timings: Dict[str, float],
+    filters: Optional[Dict[str, Any]] = None,
+) -> Optional[Tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+    """Serves hits and totals from the in-memory snapshot; returns None on a miss so BigQuery is used."""
+    if index.dim != len(qvec):
+        logger.warning("Local index dim %d does not match query dim %d", index.dim, len(qvec))
+        return None
+
+    with telemetry.span("local_index.search", version=index.version) as stage:
+        mask = index.filter_mask(filters)
+        neighbours = index.search(qvec, topk, brute_force=use_brute_force, mask=mask)
+    timings["search"] = stage.elapsed_ms
+    if not neighbours:
+        return None
+
+    with telemetry.span("local_index.fetch") as stage:
+        hits = [
+            hit for hit in (
+                _row_to_hit(index.row(idx, distance)) for idx, distance in neighbours[offset:offset + page_limit]
+            ) if hit is not None
+        ]
+    timings["fetch"] = stage.elapsed_ms
+
+    with telemetry.span("local_index.count") as stage:
+        if totals_mode == "skip":
+            totals = {"programs": None, "schools": None, "countries": None, "threshold": thresh, "status": "skipped"}
+        else:
+            # A full in-memory pass is cheap, so every other mode gets exact totals.
+            totals = index.totals(qvec, thresh, mask=mask)
+    timings["count"] = stage.elapsed_ms
+    return hits, totals
+
+
+def _has_more(totals: Dict[str, Any], end: int, more_rows: bool) -> bool:
+    """Exact totals decide paging as before; otherwise fall back to whether more neighbours exist."""
+    if totals["status"] == "exact":
+        return totals["programs"] > end
+    return more_rows
+
+
+def _window_key(query_text: str, thresh: float, filters: Optional[Dict[str, Any]]) -> Tuple[Any, ...]:
+    """What a cursor must have been issued for to be served from a window."""
+    return (_normalize_query(query_text), thresh, filters_key(filters))
+
+
+def _page_from_window(window_id: str, window: Dict[str, Any], position: int, limit: int) -> Dict[str, Any]:
+    start = position - window["start"]
+    end = position + limit
+    hits = window["hits"][start:start + limit]
+    window_end = window["start"] + len(window["hits"])
+    if window["totals"]["status"] == "pending":
+        # Lazy totals may have landed since the window was built.
+        memoized = _totals_cache.get(window["totals_key"])
+        if memoized is not None:
+            window["totals"] = memoized
+    has_more = end < window_end or (not window["exhausted"] and _has_more(window["totals"], end, True))
+    next_cursor = _encode_cursor(window_id, end) if has_more else None
+    return {"hits": hits, "next_cursor": next_cursor, "totals": window["totals"]}
+
+
+def search_and_count(
+    query_text: str,
+    limit: int = 15,
+    offset: int = 0,
+    threshold: Optional[float] = None,
+    use_brute_force: bool = False,
+    use_cursor: bool = False,
+    cursor: Optional[str] = None,
+    totals_mode: Optional[str] = None,
+    use_local_index: bool = True,
+    destination_countries: Optional[List[str]] = None,
+    study_level: Optional[str] = None,
+    max_tuition: Optional[float] = None,
+    tuition_currency: Optional[str] = None,
+    output_format: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Performs a vector similarity search over the courses embedding index in BigQuery.
+    Describe the kind of program in `query_text` (field, focus, career goals) and pass hard constraints
+    as structured filters, which are enforced inside the search rather than left to the embedding:
+      destination_countries  country names or ISO codes, e.g. ["Canada", "DE"] (Preferences.destinationCountries)
+      study_level            e.g. "bachelors", "masters", "phd" (Preferences.studyLevel)
+      max_tuition            maximum tuition amount (Preferences.budget.annualAmount)
+      tuition_currency       ISO currency of max_tuition, e.g. "CAD" (Preferences.budget.currencyCode);
+                             the budget is converted to compare with programs priced in other currencies
+    `filters` in the response echoes what was applied and lists any value that could not be used.
+
+    Set `use_cursor=True` to fetch a larger candidate window once and page through it with `next_cursor`.
+    To show more results, call again with the same `query_text` and `cursor` set to the previous `next_cursor`;
+    those pages are served from memory without running another BigQuery job.
+
+    `totals_mode` controls how match totals are computed (default from TOTALS_MODE):
+      "exact"    full-table distance scan, memoized per (query vector, threshold)
+      "estimate" counts matches among the IVF candidate set
+      "lazy"     returns immediately and computes exact totals in the background for later pages
+      "skip"     no totals
+    `totals.status` reports which one you got: "exact", "estimated", "pending" or "skipped".
+
+    When a fresh local snapshot is configured (LOCAL_INDEX_DIR) the search runs in memory and `source`
+    names the snapshot version; stale or missing snapshots fall back to BigQuery.
+
+    `output_format` selects the hits shape (default from SEARCH_OUTPUT_FORMAT):
+      "columnar" {"columns": [...], "rows": [[...], ...], "shared": {column: value common to every row}};
+                 school details in a "schools" table of the same form, joined on school_id
+      "compact"  one dict per hit without nulls; school details in a "schools" map keyed by school_id
+      "records"  one dict per hit with every field
+    `fields` limits hits to some of program_id, school_id, name, currency, programLevel, program_category,
+    tuition, school_name, school_city, school_province, school_countryCode, similarity.
+
+    Returns:
+      {
+        "hits": [ { ui fields... , "similarity": float }, ... ],   # in the requested output_format
+        "schools": { school details by school_id },   # "compact" and "columnar" only
+        "next_offset": int|None,          # or "next_cursor": str|None in cursor mode
+        "totals": { "programs": int|None, "schools": int|None, "countries": int|None,
+                    "threshold": float, "status": str },
+        "timings_ms": { "embed": float, "search": float, "fetch": float, "count": float, "total": float },
+        "source": "bigquery" | "local:<version>",
+        "filters": { applied filters..., "ignored": [...] } | None
+      }
+    """
+    started = time.perf_counter()
+    thresh = threshold if threshold is not None else DEFAULT_THRESH
+    filters = normalize_filters(destination_countries, study_level, max_tuition, tuition_currency)
+    applied_filters = describe_filters(filters)
+    totals_mode = (totals_mode or TOTALS_MODE).strip().lower()
+    if totals_mode not in TOTALS_MODES:
+        raise ValueError(f"totals_mode must be one of {TOTALS_MODES}, got {totals_mode!r}")
+    output_format = resolve_format(output_format)
+    fields = resolve_fields(fields)
+
+    if cursor:
+        window_id, position = _decode_cursor(cursor)
+        window = _result_windows.get(window_id)
+        usable = (
+            window is not None
+            and window["query_key"] == _window_key(query_text, thresh, filters)
+            and window["start"] <= position
+            and (position < window["start"] + len(window["hits"]) or window["exhausted"])
+        )
+        if usable:
+            logger.info(
+                "Serving search page from cursor window | window=%s position=%d limit=%d",
+                window_id,
+                position,
+                limit,
+            )
+            page = _page_from_window(window_id, window, position, limit)
+            page.update(format_hits(page["hits"], output_format, fields))
+            page["timings_ms"] = {"total": _elapsed_ms(started)}
+            page["source"] = window["source"]
+            page["filters"] = applied_filters
+            return page
+        # Expired, evicted or exhausted window: rebuild one starting at the cursor position.
+        logger.info("Cursor window unavailable, re-running search | window=%s position=%d", window_id, position)
+        offset = position
+        use_cursor = True
+
+    if use_cursor and offset >= MAX_TOPK:
+        # Past the deepest candidate VECTOR_SEARCH can return: an exhausted page, without running a job.
+        page = {
+            "next_cursor": None,
+            "totals": {"programs": None, "schools": None, "countries": None, "threshold": thresh, "status": "skipped"},
+            **format_hits([], output_format, fields),
+            "timings_ms": {"total": _elapsed_ms(started)},
+            "source": "bigquery",
+            "filters": applied_filters,
+        }
+        return page
+
+    if use_cursor:
+        topk = max(1, min(MAX_TOPK, max(CURSOR_WINDOW, limit) + offset + 1))
+        page_limit = max(0, topk - offset)
+    else:
+        # One extra row tells us whether another page exists when totals are not exact.
+        topk = max(1, min(MAX_TOPK, limit + offset + 1))
+        page_limit = limit + 1
+
     logger.info(
-        "Vector search totals | programs=%d schools=%d countries=%d threshold=%.3f next_offset=%s",
+        "Running BigQuery vector search | query=%r limit=%d offset=%d threshold=%.3f brute_force=%s topk=%d "
+        "cursor=%s totals_mode=%s filters=%s",
+        query_text,
+        limit,
+        offset,
+        thresh,
+        use_brute_force,
+        topk,
+        use_cursor,
+        totals_mode,
+        applied_filters,
+    )
+
+    timings: Dict[str, float] = {}
+
+    # Embed once; both statements below take the vector as a parameter.
+    with telemetry.span("search.embed") as stage:
+        qvec = embed_query(query_text)
+    timings["embed"] = stage.elapsed_ms
+
+    local = None
+    index = local_index.get_local_index() if use_local_index else None
+    if index is not None:
+        local = _local_search(
+            index, qvec, topk, page_limit, offset, thresh, use_brute_force, totals_mode, timings, filters
+        )
+        if local is None:
+            logger.info("Local index miss, falling back to BigQuery | version=%s", index.version)
+
+    if local is not None:
+        hits, totals = local
+        source = f"local:{index.version}"
+    else:
+        source = "bigquery"
+        # Submit hits (IVF) and counts together; BigQuery runs them concurrently.
+        with telemetry.span("bigquery.search", topk=topk, brute_force=use_brute_force) as stage:
+            hits_job = _submit_hits_job(qvec, topk, page_limit, offset, use_brute_force, filters)
+            wait_totals = _start_totals(qvec, thresh, totals_mode, filters)
+            hit_rows = hits_job.result()
+        timings["search"] = stage.elapsed_ms
+        telemetry.record_bigquery_job("search", hits_job)
+
+        with telemetry.span("bigquery.fetch") as stage:
+            hits = _collect_hits(hit_rows)
+        timings["fetch"] = stage.elapsed_ms
+        logger.info(
+            "Vector search returned %d hits | limit=%d offset=%d", len(hits), page_limit, offset
+        )
+        if not hits:
+            logger.warning("Vector search yielded no results for query '%s'", query_text)
+
+        with telemetry.span("bigquery.count", totals_mode=totals_mode) as stage:
+            totals = wait_totals()
+        timings["count"] = stage.elapsed_ms
+
+    timings["total"] = _elapsed_ms(started)
+    logger.info(
+        "Vector search timings (ms) | source=%s embed=%.1f search=%.1f fetch=%.1f count=%.1f total=%.1f",
+        source,
+        timings["embed"],
+        timings["search"],
+        timings["fetch"],
+        timings["count"],
+        timings["total"],
+    )
+
+    if use_cursor:
+        window_id = secrets.token_urlsafe(12)
+        window = {
+            "start": offset,
+            "hits": hits,
+            "totals": totals,
+            "totals_key": _totals_key(qvec, thresh, filters),
+            "query_key": _window_key(query_text, thresh, filters),
+            "source": source,
+            # Fewer rows than asked for means VECTOR_SEARCH ran out of candidates.
+            "exhausted": len(hits) < page_limit or topk >= MAX_TOPK,
+        }
+        _result_windows.set(window_id, window)
+        page = _page_from_window(window_id, window, offset, limit)
+        page.update(format_hits(page["hits"], output_format, fields))
+        page["timings_ms"] = timings
+        page["source"] = source
+        page["filters"] = applied_filters
+        logger.info(
+            "Vector search totals | programs=%s schools=%s countries=%s threshold=%.3f status=%s window=%s "
+            "window_size=%d",
+            totals["programs"],
+            totals["schools"],
+            totals["countries"],
+            totals["threshold"],
+            totals["status"],
+            window_id,
+            len(hits),
+        )
+        return page
+
+    more_rows = len(hits) > limit
+    hits = hits[:limit]
+    next_offset = (offset + limit) if _has_more(totals, offset + limit, more_rows) else None
+    logger.info(
+        "Vector search totals | programs=%s schools=%s countries=%s threshold=%.3f status=%s next_offset=%s",
         totals["programs"],
         totals["schools"],
         totals["countries"],
         totals["threshold"],
+        totals["status"],
         next_offset,
     )
 
+    logger.debug("Sample hits", extra={"payload": hits[:3]})
+
+    return {
+        **format_hits(hits, output_format, fields),
+        "next_offset": next_offset,
+        "totals": totals,
+        "timings_ms": timings,
+        "source": source,
+        "filters": applied_filters,
+    }
+
+
+def search_vector(
+    qvec: List[float],
+    limit: int,
+    filters: Optional[Dict[str, Any]] = None,
+    use_local_index: bool = True,
+) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    (hits, source) for the `limit` nearest programs to a vector the caller built itself (e.g. a blend of
+    several embeddings), with `filters` from normalize_filters. No totals, paging or output shaping; the
+    hits are full records, closest first.
+    """
+    topk = max(1, min(MAX_TOPK, limit))
+    index = local_index.get_local_index() if use_local_index else None
+    if index is not None:
+        local = _local_search(index, qvec, topk, topk, 0, DEFAULT_THRESH, False, "skip", {}, filters)
+        if local is not None:
+            return local[0], f"local:{index.version}"
+        logger.info("Local index miss, falling back to BigQuery | version=%s", index.version)
+
+    with telemetry.span("bigquery.search", topk=topk, brute_force=False):
+        hits_job = _submit_hits_job(qvec, topk, topk, 0, False, filters)
+        rows = hits_job.result()
+    telemetry.record_bigquery_job("search", hits_job)
+    return _collect_hits(rows), "bigquery"
+
+
+_FILTER_ARGS = ("destination_countries", "study_level", "max_tuition", "tuition_currency")
+BATCH_TOTALS_MODES = ("estimate", "skip")
+
+
+def _submit_batch_job(
+    qvecs: List[List[float]],
+    groups: List[Tuple[Optional[Dict[str, Any]], List[int]]],
+    limit: int,
+    thresh: float,
+    totals_mode: str,
+    use_brute_force: bool,
+) -> bigquery.QueryJob:
+    """
+    One VECTOR_SEARCH per filter group over a shared query table, combined with UNION ALL in a single job.
+    Each query keeps its own top `limit` rows; in "estimate" mode its totals ride along from the same
+    candidate set, so a batch needs no separate counts job.
+    """
+    tbl_search = f"`{PROJECT_ID}.{BQ_DATASET}.{BQ_TABLE}`"
+    options_json = '{"use_brute_force": true}' if use_brute_force else f'{{"fraction_lists_to_search": {FRACTION_IVF} }}'
+    estimate = totals_mode == "estimate"
+    topk = max(limit, TOTALS_ESTIMATE_TOPK) if estimate else limit
+
+    searches: List[str] = []
+    group_params: List[Any] = []
+    for number, (filters, qids) in enumerate(groups):
+        where_sql, filter_params = filter_sql(filters, prefix=f"g{number}_f_")
+        group_params.extend(filter_params)
+        group_params.append(bigquery.ArrayQueryParameter(f"g{number}_qids", "INT64", qids))
+        searches.append(f"""
+  SELECT
+    query.qid AS qid,
+    {_BASE_HIT_COLUMNS},
+    distance
+  FROM VECTOR_SEARCH(
+    (
+      SELECT {_STORED_HIT_COLUMNS}, embedding
+      FROM {tbl_search}
+      {where_sql}
+    ),
+    'embedding',
+    (SELECT qid, qvec FROM queries WHERE qid IN UNNEST(@g{number}_qids)),
+    query_column_to_search => 'qvec',
+    top_k => @topk,
+    distance_type => 'COSINE',
+    options => '{options_json}'
+  )""")
+
+    totals_cte = totals_select = totals_join = ""
+    if estimate:
+        totals_cte = """,
+totals AS (
+  SELECT
+    qid,
+    COUNTIF(distance <= @thresh) AS programs_total,
+    COUNT(DISTINCT IF(distance <= @thresh, gt_school_id, NULL)) AS schools_total,
+    COUNT(DISTINCT IF(distance <= @thresh, school_countryCode, NULL)) AS countries_total
+  FROM vs
+  GROUP BY qid
+)"""
+        totals_select = ", totals.programs_total, totals.schools_total, totals.countries_total"
+        totals_join = "LEFT JOIN totals USING (qid)"
+
+    union_sql = "\n  UNION ALL".join(searches)
+    batch_sql = f"""
+WITH queries AS (
+  SELECT q.qid, q.qvec FROM UNNEST(@queries) AS q
+),
+vs AS ({union_sql}
+),
+ranked AS (
+  SELECT vs.*, ROW_NUMBER() OVER (PARTITION BY qid ORDER BY distance) AS hit_rank
+  FROM vs
+){totals_cte}
+SELECT ranked.*{totals_select}
+FROM ranked
+{totals_join}
+WHERE hit_rank <= @limit
+ORDER BY qid, hit_rank
+"""
+    params = [
+        bigquery.ArrayQueryParameter(
+            "queries",
+            "STRUCT",
+            [
+                bigquery.StructQueryParameter(
+                    None,
+                    bigquery.ScalarQueryParameter("qid", "INT64", qid),
+                    bigquery.ArrayQueryParameter("qvec", "FLOAT64", qvec),
+                )
+                for qid, qvec in enumerate(qvecs)
+            ],
+        ),
+        bigquery.ScalarQueryParameter("topk", "INT64", topk),
+        bigquery.ScalarQueryParameter("limit", "INT64", limit),
+        *([bigquery.ScalarQueryParameter("thresh", "FLOAT64", thresh)] if estimate else []),
+        *group_params,
+    ]
     if logger.isEnabledFor(logging.DEBUG):
-        preview = hits[:3]
-        logger.debug("Sample hits: %s", preview)
+        logger.debug("Batch search SQL:\n%s", batch_sql)
+
+    return clients.bigquery().query(
+        batch_sql,
+        job_config=bigquery.QueryJobConfig(query_parameters=params),
+        location=BQ_LOCATION,
+    )
 
-    return {"hits": hits, "next_offset": next_offset, "totals": totals}
+
+def _batch_filters(
+    count: int, shared: Dict[str, Any], per_query_filters: Optional[List[Optional[Dict[str, Any]]]]
+) -> List[Dict[str, Any]]:
+    if per_query_filters is None:
+        return [normalize_filters(**shared)] * count
+    if len(per_query_filters) != count:
+        raise ValueError(
+            f"per_query_filters has {len(per_query_filters)} entries for {count} query_texts"
+        )
+    resolved = []
+    for overrides in per_query_filters:
+        overrides = overrides or {}
+        unknown = sorted(set(overrides) - set(_FILTER_ARGS))
+        if unknown:
+            raise ValueError(f"per_query_filters accepts {_FILTER_ARGS}, got {unknown}")
+        resolved.append(normalize_filters(**{**shared, **overrides}))
+    return resolved
+
+
+def search_and_count_batch(
+    query_texts: List[str],
+    limit: int = 10,
+    threshold: Optional[float] = None,
+    use_brute_force: bool = False,
+    totals_mode: Optional[str] = None,
+    use_local_index: bool = True,
+    destination_countries: Optional[List[str]] = None,
+    study_level: Optional[str] = None,
+    max_tuition: Optional[float] = None,
+    tuition_currency: Optional[str] = None,
+    per_query_filters: Optional[List[Optional[Dict[str, Any]]]] = None,
+    output_format: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Runs several course searches at once: use it instead of repeated search_and_count calls when comparing
+    alternatives (fields, countries, levels). All queries are embedded together and searched in one
+    BigQuery job, and the results come back grouped per query in the order given.
+
+    `query_texts` lists up to BATCH_MAX_QUERIES (default 8) program descriptions. The filters
+    (destination_countries, study_level, max_tuition, tuition_currency) apply to every query, as in
+    search_and_count; `per_query_filters` optionally gives one dict per query whose keys override them,
+    e.g. [{"destination_countries": ["Canada"]}, {"destination_countries": ["Germany"]}].
+
+    `totals_mode` is "estimate" (default; counts matches among the search candidates) or "skip".
+    Exact totals already memoized by search_and_count are returned when available. To page deeper into
+    one of the results, call search_and_count with that query_text.
+    `output_format` and `fields` shape each result's hits exactly as in search_and_count.
+
+    Returns:
+      {
+        "results": [ { "query_text": str, "hits": ..., "schools": {...}, "totals": {...},
+                       "filters": {...}|None }, ... ],
+        "timings_ms": { "embed": float, "search": float, "fetch": float, "total": float },
+        "source": "bigquery" | "local:<version>"
+      }
+    """
+    started = time.perf_counter()
+    if not query_texts:
+        raise ValueError("query_texts must contain at least one query")
+    if len(query_texts) > BATCH_MAX_QUERIES:
+        raise ValueError(f"at most {BATCH_MAX_QUERIES} query_texts per batch, got {len(query_texts)}")
+    thresh = threshold if threshold is not None else DEFAULT_THRESH
+    limit = max(1, min(MAX_TOPK, limit))
+    totals_mode = (totals_mode or "estimate").strip().lower()
+    if totals_mode not in BATCH_TOTALS_MODES:
+        raise ValueError(f"totals_mode must be one of {BATCH_TOTALS_MODES}, got {totals_mode!r}")
+    output_format = resolve_format(output_format)
+    fields = resolve_fields(fields)
+    shared = dict(
+        destination_countries=destination_countries,
+        study_level=study_level,
+        max_tuition=max_tuition,
+        tuition_currency=tuition_currency,
+    )
+    filters = _batch_filters(len(query_texts), shared, per_query_filters)
+
+    logger.info(
+        "Running batched vector search | queries=%d limit=%d threshold=%.3f totals_mode=%s",
+        len(query_texts),
+        limit,
+        thresh,
+        totals_mode,
+    )
+    timings: Dict[str, float] = {}
+    with telemetry.span("search.embed", queries=len(query_texts)) as stage:
+        qvecs = embed_queries(query_texts)
+    timings["embed"] = stage.elapsed_ms
+
+    index = local_index.get_local_index() if use_local_index else None
+    if index is not None:
+        local_results = []
+        for qvec, query_filters in zip(qvecs, filters):
+            local = _local_search(
+                index, qvec, limit, limit, 0, thresh, use_brute_force, totals_mode, {}, query_filters
+            )
+            if local is None:
+                logger.info("Local index miss, falling back to BigQuery | version=%s", index.version)
+                break
+            local_results.append(local)
+        else:
+            timings["total"] = _elapsed_ms(started)
+            return {
+                "results": [
+                    {
+                        "query_text": text,
+                        **format_hits(hits, output_format, fields),
+                        "totals": totals,
+                        "filters": describe_filters(query_filters),
+                    }
+                    for text, (hits, totals), query_filters in zip(query_texts, local_results, filters)
+                ],
+                "timings_ms": timings,
+                "source": f"local:{index.version}",
+            }
+
+    # Queries sharing a filter set share one VECTOR_SEARCH (and its parameters).
+    grouped: Dict[Tuple[Any, ...], Tuple[Optional[Dict[str, Any]], List[int]]] = {}
+    for qid, query_filters in enumerate(filters):
+        grouped.setdefault(filters_key(query_filters), (query_filters, []))[1].append(qid)
+
+    with telemetry.span("bigquery.search_batch", queries=len(query_texts), groups=len(grouped)) as stage:
+        batch_job = _submit_batch_job(qvecs, list(grouped.values()), limit, thresh, totals_mode, use_brute_force)
+        rows = batch_job.result()
+    timings["search"] = stage.elapsed_ms
+    telemetry.record_bigquery_job("search_batch", batch_job)
+
+    with telemetry.span("bigquery.fetch") as stage:
+        hits: List[List[Dict[str, Any]]] = [[] for _ in query_texts]
+        counts: Dict[int, Dict[str, Any]] = {}
+        for row in rows:
+            row_dict = dict(row.items())
+            qid = int(row_dict["qid"])
+            hit = _row_to_hit(row_dict)
+            if hit is not None:
+                hits[qid].append(hit)
+            if totals_mode == "estimate":
+                counts[qid] = row_dict
+    timings["fetch"] = stage.elapsed_ms
+
+    results = []
+    for qid, (text, qvec, query_filters) in enumerate(zip(query_texts, qvecs, filters)):
+        totals = _totals_cache.get(_totals_key(qvec, thresh, query_filters))
+        if totals is None and totals_mode == "estimate":
+            row = counts.get(qid, {})
+            programs = int(row.get("programs_total") or 0)
+            totals = {
+                "programs": programs,
+                "schools": int(row.get("schools_total") or 0),
+                "countries": int(row.get("countries_total") or 0),
+                "threshold": thresh,
+                "status": "estimated",
+                "saturated": programs >= max(limit, TOTALS_ESTIMATE_TOPK),
+            }
+        elif totals is None:
+            totals = {"programs": None, "schools": None, "countries": None, "threshold": thresh, "status": "skipped"}
+        if not hits[qid]:
+            logger.warning("Batched vector search yielded no results for query '%s'", text)
+        results.append(
+            {
+                "query_text": text,
+                **format_hits(hits[qid], output_format, fields),
+                "totals": totals,
+                "filters": describe_filters(query_filters),
+            }
+        )
+
+    timings["total"] = _elapsed_ms(started)
+    logger.info(
+        "Batched vector search timings (ms) | queries=%d groups=%d embed=%.1f search=%.1f fetch=%.1f total=%.1f",
+        len(query_texts),
+        len(grouped),
+        timings["embed"],
+        timings["search"],
+        timings["fetch"],
+        timings["total"],
+    )
+    return {"results": results, "timings_ms": timings, "source": "bigquery"}
@@ -1,52 +1,72 @@
-import os
-from typing import Any, Dict
-
-from google.cloud import firestore
+from typing import Any, Dict, Optional
 
+from . import clients, profile_cache, profile_format, resume_store, telemetry
 from .config import get_logger
-from ..schema.user_profile import GrestokUser
-
-PROJECT_ID = os.environ.get("GOOGLE_CLOUD_PROJECT") or os.environ.get("PROJECT_ID") or "grestok-app-dev"
 
 logger = get_logger("grestok.firestore")
-client = firestore.Client(project=PROJECT_ID)
 
 
-def get_fs_user_profile(email: str) -> Dict[str, Any]:
-    """
-    Fetches a single user profile document from Firestore `/Users` using the email field.
-    Returns a dict containing the GrestokUser schema (camelCase keys) with every field present; missing values are
-    explicitly set to null so the LLM has a complete view of the shape.
-    """
+def _normalize_email(email: str) -> str:
     normalized_email = (email or "").strip()
     if not normalized_email:
         raise ValueError("email is required")
+    return normalized_email
 
-    logger.info("Fetching Firestore user profile for email=%s", normalized_email)
-    users_ref = client.collection("Users")
-    query = users_ref.where("email", "==", normalized_email).limit(1)
-    docs = list(query.stream())
 
-    if not docs:
+def _profile_response(
+    normalized_email: str,
+    doc_id: Optional[str],
+    profile: Optional[Dict[str, Any]],
+    view: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Shapes a stored profile (or None when no user matched) into the tool response."""
+    if doc_id is None:
         logger.warning("No Firestore user profile found for email=%s", normalized_email)
-        schema_payload = GrestokUser(email=normalized_email).model_dump(
-            by_alias=True,
-            exclude_none=False,
-        )
+        schema_payload = profile_format.empty_profile(normalized_email, view)
         return {"found": False, "email": normalized_email, "doc_id": None, "profile": schema_payload}
 
-    doc = docs[0]
-    profile = doc.to_dict() or {}
-    logger.info("Firestore user profile retrieved | doc_id=%s email=%s", doc.id, normalized_email)
-
-    schema_payload = GrestokUser.model_validate(profile).model_dump(
-        by_alias=True,
-        exclude_none=False,
-    )
+    schema_payload = profile_format.dump_profile(profile, view)
 
     return {
         "found": True,
         "email": normalized_email,
-        "doc_id": doc.id,
+        "doc_id": doc_id,
         "profile": schema_payload,
     }
+
+
+def get_fs_user_profile(email: str, view: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Fetches a single user profile document from Firestore `/Users` using the email field.
+    Returns a dict containing the GrestokUser schema (camelCase keys) with every field present; missing values are
+    explicitly set to null so the LLM has a complete view of the shape.
+
+    `view` picks how much of the profile to return: "standard" (default: everything except the resume's
+    raw text, work experience and education, which are summarized in resumeExtracted.summary),
+    "preferences_academics" (name, email, preferences and academicProfile only) or "full".
+    """
+    normalized_email = _normalize_email(email)
+    view = profile_format.resolve_view(view)
+
+    cached = profile_cache.get_profile(normalized_email)
+    if cached is not None:
+        logger.info("Firestore user profile served from cache | doc_id=%s email=%s", cached["doc_id"], normalized_email)
+        doc_id, profile = cached["doc_id"], cached["data"]
+    else:
+        logger.info("Fetching Firestore user profile for email=%s", normalized_email)
+        users_ref = clients.firestore().collection("Users")
+        query = users_ref.where("email", "==", normalized_email).limit(1)
+        with telemetry.span("firestore.profile_query"):
+            docs = list(query.stream())
+        telemetry.count_firestore("query", len(docs))
+        if not docs:
+            return _profile_response(normalized_email, None, None, view)
+
+        doc = docs[0]
+        doc_id, profile = doc.id, doc.to_dict() or {}
+        logger.info("Firestore user profile retrieved | doc_id=%s email=%s", doc_id, normalized_email)
+        profile_cache.remember(normalized_email, doc_id, profile, doc.update_time)
+
+    if resume_store.wants_artifact(view):
+        profile = resume_store.hydrate(clients.firestore().collection("Users"), doc_id, profile)
+    return _profile_response(normalized_email, doc_id, profile, view)
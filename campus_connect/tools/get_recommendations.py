@@ -0,0 +1,54 @@
+from typing import Any, Dict, List, Optional
+
+from . import clients, recommendations
+from .config import get_logger
+from .get_fs_user_profile import _normalize_email
+from .result_format import format_hits, resolve_fields, resolve_format
+from .update_profile_from_resume import _load_existing
+
+logger = get_logger("grestok.recommendations")
+
+
+def _recommendations_response(
+    normalized_email: str,
+    described: Optional[Dict[str, Any]],
+    limit: Optional[int],
+    output_format: str,
+    fields: Any,
+) -> Dict[str, Any]:
+    """Shapes `recommendations.describe` output (or None when no user matched) into the tool response."""
+    if described is None:
+        logger.warning("No Firestore user profile found for email=%s", normalized_email)
+        return {"found": False, "email": normalized_email, "status": "missing", "pending": False, "hits": []}
+    items = described["items"][:limit] if limit else described["items"]
+    response = {"found": True, "email": normalized_email, **format_hits(items, output_format, fields)}
+    for key in ("status", "pending", "computed_at", "filters", "source", "reason"):
+        response[key] = described[key]
+    return response
+
+
+def get_recommendations(
+    email: str,
+    limit: Optional[int] = None,
+    output_format: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Returns the programs precomputed for the student from their profile (preferences, wizard answers,
+    highest qualification, resume skills and roles), best match first, without running a search.
+    `status` is "fresh", "stale" (the profile changed since they were computed; they are still returned
+    while a refresh runs in the background) or "missing" (none yet); `pending` says a refresh is queued.
+    `filters` echoes the constraints they were searched with. `limit`, `output_format` and `fields`
+    work as in search_and_count. For anything beyond the saved preferences, use search_and_count.
+    """
+    normalized_email = _normalize_email(email)
+    output_format = resolve_format(output_format)
+    fields = resolve_fields(fields)
+
+    existing = _load_existing(clients.firestore().collection("Users"), normalized_email, list(recommendations.INPUT_PATHS))
+    if existing is None:
+        return _recommendations_response(normalized_email, None, limit, output_format, fields)
+    doc_id, data = existing
+    document = recommendations.load(doc_id, recommendations.fingerprint(data))
+    described = recommendations.describe(normalized_email, doc_id, data, document)
+    return _recommendations_response(normalized_email, described, limit, output_format, fields)
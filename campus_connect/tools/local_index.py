@@ -0,0 +1,433 @@
+"""
+In-memory ANN index over a local snapshot of the `courses_search` table.
+
+A snapshot is a directory `<LOCAL_INDEX_DIR>/<version>/` holding:
+  embeddings.f32   row-major float32 matrix (rows x dim), L2-normalized, memory-mapped on load
+  metadata.json    columnar table of the stored index columns
+  ivf.npz          IVF centroids plus row ids grouped by list
+  manifest.json    version, row count, dim, nlist, source table and creation time
+`<LOCAL_INDEX_DIR>/CURRENT` names the active version; rewriting it hot-swaps the index without a restart.
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .cache import TTLCache
+from .config import get_logger
+from .search_filters import filters_key, has_filters, tuition_caps, within_budget
+
+LOCAL_INDEX_DIR = os.environ.get("LOCAL_INDEX_DIR", "")                            # empty disables the local index
+LOCAL_INDEX_MAX_AGE = float(os.environ.get("LOCAL_INDEX_MAX_AGE", "86400"))        # seconds before a snapshot is stale
+LOCAL_INDEX_CHECK_SECONDS = float(os.environ.get("LOCAL_INDEX_CHECK_SECONDS", "30"))  # CURRENT pointer poll interval
+LOCAL_IVF_FRACTION = float(os.environ.get("LOCAL_IVF_FRACTION", "0.1"))            # share of lists probed per query
+LOCAL_INDEX_KEEP = int(os.environ.get("LOCAL_INDEX_KEEP", "3"))                    # snapshots kept on disk
+LOCAL_MASK_CACHE_SIZE = int(os.environ.get("LOCAL_MASK_CACHE_SIZE", "256"))         # filter row masks kept per snapshot
+
+METADATA_COLUMNS = (
+    "gt_program_id", "gt_school_id",
+    "name", "currency", "programLevel", "program_category", "tuition",
+    "school_name", "school_city", "school_province", "school_countryCode",
+)
+
+logger = get_logger("grestok.local_index")
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _train_ivf(embeddings: np.ndarray, nlist: int, iterations: int = 12, seed: int = 7) -> Tuple[np.ndarray, np.ndarray]:
+    """Spherical k-means; returns (centroids, list assignment per row)."""
+    rng = np.random.default_rng(seed)
+    rows = embeddings.shape[0]
+    sample_size = min(rows, max(nlist * 64, 10000))
+    sample = embeddings[rng.choice(rows, size=sample_size, replace=False)] if sample_size < rows else embeddings
+    centroids = np.array(sample[rng.choice(sample.shape[0], size=nlist, replace=False)], dtype=np.float32)
+
+    for _ in range(iterations):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        for list_id in range(nlist):
+            members = sample[assign == list_id]
+            if len(members):
+                centroids[list_id] = members.mean(axis=0)
+        centroids = _normalize_rows(centroids).astype(np.float32)
+
+    assignments = np.empty(rows, dtype=np.int32)
+    for start in range(0, rows, 8192):
+        block = np.asarray(embeddings[start:start + 8192])
+        assignments[start:start + 8192] = np.argmax(block @ centroids.T, axis=1)
+    return centroids, assignments
+
+
+class LocalIndex:
+    """Read-only snapshot loaded from disk; safe to share between threads."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as fh:
+            self.manifest: Dict[str, Any] = json.load(fh)
+        self.version: str = self.manifest["version"]
+        self.rows: int = int(self.manifest["rows"])
+        self.dim: int = int(self.manifest["dim"])
+        self.created_at: float = float(self.manifest["created_at"])
+
+        self.embeddings = np.memmap(
+            os.path.join(path, "embeddings.f32"), dtype=np.float32, mode="r", shape=(self.rows, self.dim)
+        )
+        with open(os.path.join(path, "metadata.json"), "r", encoding="utf-8") as fh:
+            self.metadata: Dict[str, List[Any]] = json.load(fh)
+
+        ivf = np.load(os.path.join(path, "ivf.npz"))
+        self.centroids: np.ndarray = ivf["centroids"]
+        self.list_rows: np.ndarray = ivf["list_rows"]
+        self.list_offsets: np.ndarray = ivf["list_offsets"]
+        self.nlist = int(self.centroids.shape[0])
+        # A snapshot never changes, so masks only leave the cache when it is full.
+        self._masks = TTLCache(LOCAL_MASK_CACHE_SIZE, float("inf"), name=f"local_index_masks:{self.version}")
+
+    def is_stale(self, max_age: float = LOCAL_INDEX_MAX_AGE) -> bool:
+        return max_age > 0 and (time.time() - self.created_at) > max_age
+
+    def row(self, idx: int, distance: float) -> Dict[str, Any]:
+        record = {column: self.metadata[column][idx] for column in METADATA_COLUMNS}
+        record["distance"] = distance
+        return record
+
+    def filter_mask(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Boolean row mask for normalized search filters (see search_filters), cached per filter set."""
+        if not has_filters(filters):
+            return None
+        key = filters_key(filters)
+        mask = self._masks.get(key)
+        if mask is not None:
+            return mask
+
+        mask = np.ones(self.rows, dtype=bool)
+        if filters["countries"]:
+            allowed = set(filters["countries"])
+            mask &= np.array([(c or "").upper() in allowed for c in self.metadata["school_countryCode"]], dtype=bool)
+        if filters["level_pattern"]:
+            pattern = re.compile(filters["level_pattern"])
+            levels = zip(self.metadata["programLevel"], self.metadata["program_category"])
+            mask &= np.array([bool(pattern.search((lvl or cat or "").lower())) for lvl, cat in levels], dtype=bool)
+        if filters["max_tuition"] is not None:
+            caps = tuition_caps(filters)
+            prices = zip(self.metadata["tuition"], self.metadata["currency"])
+            mask &= np.array([within_budget(t, c, filters, caps) for t, c in prices], dtype=bool)
+        self._masks.set(key, mask)
+        return mask
+
+    def _candidates(self, qvec: np.ndarray, fraction: float) -> np.ndarray:
+        nprobe = max(1, min(self.nlist, math.ceil(self.nlist * fraction)))
+        probe = np.argpartition(-(self.centroids @ qvec), nprobe - 1)[:nprobe]
+        return np.concatenate([self.list_rows[self.list_offsets[i]:self.list_offsets[i + 1]] for i in probe])
+
+    def search(
+        self,
+        qvec: Sequence[float],
+        topk: int,
+        brute_force: bool = False,
+        fraction: float = LOCAL_IVF_FRACTION,
+        mask: Optional[np.ndarray] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Returns up to `topk` (row index, cosine distance) pairs ordered by distance, restricted to
+        rows where `mask` is set. Selective masks that leave too few IVF candidates fall back to
+        scanning every matching row, which is still cheap because the mask already shrank the set.
+        """
+        query = self._prepare_query(qvec)
+        candidates: Optional[np.ndarray] = None
+        if not brute_force:
+            candidates = np.sort(self._candidates(query, fraction))  # sorted ids read the memmap sequentially
+            if mask is not None:
+                candidates = candidates[mask[candidates]]
+                if candidates.shape[0] < topk:
+                    candidates = None
+        if candidates is None and mask is not None:
+            candidates = np.flatnonzero(mask)
+
+        if candidates is None:
+            distances = 1.0 - np.asarray(self.embeddings @ query)
+        else:
+            distances = 1.0 - np.asarray(self.embeddings[candidates] @ query)
+
+        k = min(topk, distances.shape[0])
+        if k <= 0:
+            return []
+        best = np.argpartition(distances, k - 1)[:k]
+        best = best[np.argsort(distances[best], kind="stable")]
+        ids = best if candidates is None else candidates[best]
+        return [(int(i), float(distances[b])) for i, b in zip(ids, best)]
+
+    def totals(self, qvec: Sequence[float], thresh: float, mask: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """Exact totals via one vectorized pass over the whole matrix (or the masked rows)."""
+        query = self._prepare_query(qvec)
+        if mask is None:
+            matched = np.flatnonzero((1.0 - np.asarray(self.embeddings @ query)) <= thresh)
+        else:
+            rows = np.flatnonzero(mask)
+            matched = rows[(1.0 - np.asarray(self.embeddings[rows] @ query)) <= thresh]
+        school_ids = self.metadata["gt_school_id"]
+        countries = self.metadata["school_countryCode"]
+        return {
+            "programs": int(matched.shape[0]),
+            "schools": len({school_ids[i] for i in matched if school_ids[i] is not None}),
+            "countries": len({countries[i] for i in matched if countries[i] is not None}),
+            "threshold": thresh,
+            "status": "exact",
+        }
+
+    def _prepare_query(self, qvec: Sequence[float]) -> np.ndarray:
+        query = np.asarray(qvec, dtype=np.float32)
+        if query.shape != (self.dim,):
+            raise ValueError(f"query dim {query.shape} does not match snapshot dim {self.dim}")
+        norm = float(np.linalg.norm(query))
+        return query / norm if norm else query
+
+
+class _IndexManager:
+    """Tracks the CURRENT snapshot and swaps in new versions as they are published."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._index: Optional[LocalIndex] = None
+        self._lock = threading.Lock()
+        self._checked_at = float("-inf")
+        self._pointer_mtime: Optional[float] = None
+
+    def current(self) -> Optional[LocalIndex]:
+        if time.monotonic() - self._checked_at >= LOCAL_INDEX_CHECK_SECONDS:
+            self.refresh()
+        return self._index
+
+    def refresh(self, force: bool = False) -> Optional[LocalIndex]:
+        with self._lock:
+            self._checked_at = time.monotonic()
+            pointer = os.path.join(self.root, "CURRENT")
+            try:
+                mtime = os.stat(pointer).st_mtime
+            except FileNotFoundError:
+                return self._index
+            if not force and mtime == self._pointer_mtime and self._index is not None:
+                return self._index
+            try:
+                with open(pointer, "r", encoding="utf-8") as fh:
+                    version = fh.read().strip()
+                if self._index is None or self._index.version != version or force:
+                    loaded = LocalIndex(os.path.join(self.root, version))
+                    previous = self._index.version if self._index else None
+                    self._index = loaded  # readers holding the old object keep using it safely
+                    logger.info(
+                        "Local course index loaded | version=%s rows=%d dim=%d nlist=%d previous=%s",
+                        loaded.version,
+                        loaded.rows,
+                        loaded.dim,
+                        loaded.nlist,
+                        previous,
+                    )
+                self._pointer_mtime = mtime
+            except Exception:
+                logger.exception("Failed to load local course index from %s", self.root)
+            return self._index
+
+
+_manager: Optional[_IndexManager] = _IndexManager(LOCAL_INDEX_DIR) if LOCAL_INDEX_DIR else None
+
+
+def get_local_index() -> Optional[LocalIndex]:
+    """Returns the active snapshot, or None when disabled, missing or stale (callers fall back to BigQuery)."""
+    if _manager is None:
+        return None
+    index = _manager.current()
+    if index is None:
+        return None
+    if index.is_stale():
+        logger.warning("Local course index is stale | version=%s", index.version)
+        return None
+    return index
+
+
+def reload_local_index() -> Optional[LocalIndex]:
+    """Forces a re-read of the CURRENT pointer (e.g. right after publishing a snapshot)."""
+    return _manager.refresh(force=True) if _manager is not None else None
+
+
+def export_snapshot(
+    client,
+    table: str,
+    output_dir: str,
+    location: Optional[str] = None,
+    nlist: Optional[int] = None,
+    publish: bool = True,
+) -> str:
+    """
+    Streams `table` (stored columns + embedding) into a new versioned snapshot and, if `publish`,
+    points CURRENT at it. Returns the snapshot version.
+    """
+    columns = ", ".join(METADATA_COLUMNS)
+    sql = f"SELECT {columns}, embedding FROM {table} WHERE ARRAY_LENGTH(embedding) > 0"
+    rows = client.query(sql, location=location).result(page_size=5000)
+    total_rows = int(rows.total_rows or 0)
+    if total_rows == 0:
+        raise RuntimeError(f"{table} returned no embeddings to snapshot")
+
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    target = os.path.join(output_dir, version)
+    staging = target + ".tmp"
+    os.makedirs(staging, exist_ok=True)
+
+    matrix: Optional[np.memmap] = None
+    metadata: Dict[str, List[Any]] = {column: [] for column in METADATA_COLUMNS}
+    count = 0
+    for row in rows:
+        vector = np.asarray(row["embedding"], dtype=np.float32)
+        if matrix is None:
+            matrix = np.memmap(
+                os.path.join(staging, "embeddings.f32"), dtype=np.float32, mode="w+", shape=(total_rows, vector.shape[0])
+            )
+        norm = float(np.linalg.norm(vector))
+        matrix[count] = vector / norm if norm else vector
+        for column in METADATA_COLUMNS:
+            value = row[column]
+            metadata[column].append(float(value) if column == "tuition" and value is not None else value)
+        count += 1
+
+    assert matrix is not None
+    dim = int(matrix.shape[1])
+    if count != total_rows:
+        raise RuntimeError(f"expected {total_rows} rows from {table}, streamed {count}")
+    matrix.flush()
+
+    nlist = nlist or max(1, min(4096, int(math.sqrt(count))))
+    centroids, assignments = _train_ivf(matrix, nlist)
+    list_rows = np.argsort(assignments, kind="stable").astype(np.int64)
+    list_offsets = np.searchsorted(assignments[list_rows], np.arange(nlist + 1)).astype(np.int64)
+    np.savez(os.path.join(staging, "ivf.npz"), centroids=centroids, list_rows=list_rows, list_offsets=list_offsets)
+    del matrix
+
+    with open(os.path.join(staging, "metadata.json"), "w", encoding="utf-8") as fh:
+        json.dump(metadata, fh, default=str)
+    manifest = {
+        "version": version,
+        "rows": count,
+        "dim": dim,
+        "nlist": nlist,
+        "source_table": table,
+        "created_at": time.time(),
+    }
+    with open(os.path.join(staging, "manifest.json"), "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+
+    os.replace(staging, target)
+    logger.info("Local course index snapshot written | version=%s rows=%d dim=%d nlist=%d", version, count, dim, nlist)
+    if publish:
+        publish_snapshot(output_dir, version)
+    return version
+
+
+def publish_snapshot(output_dir: str, version: str) -> None:
+    """Atomically points CURRENT at `version` and prunes old snapshots beyond LOCAL_INDEX_KEEP."""
+    pointer_tmp = os.path.join(output_dir, "CURRENT.tmp")
+    with open(pointer_tmp, "w", encoding="utf-8") as fh:
+        fh.write(version)
+    os.replace(pointer_tmp, os.path.join(output_dir, "CURRENT"))
+
+    versions = sorted(
+        entry for entry in os.listdir(output_dir)
+        if os.path.isfile(os.path.join(output_dir, entry, "manifest.json"))
+    )
+    for old in versions[:-LOCAL_INDEX_KEEP] if LOCAL_INDEX_KEEP > 0 else []:
+        if old != version:
+            shutil.rmtree(os.path.join(output_dir, old), ignore_errors=True)
+
+
+def compare_with_bigquery(queries: Iterable[str], topk: int = 15) -> Dict[str, Any]:
+    """
+    Runs each query through the local index and through BigQuery (IVF and brute force) and reports
+    recall@k of both against BigQuery brute force, plus latency percentiles for each path.
+    """
+    from . import get_bq_courses as bq
+
+    index = get_local_index() or reload_local_index()
+    if index is None:
+        raise RuntimeError("no local index snapshot available; set LOCAL_INDEX_DIR and export one first")
+
+    latencies: Dict[str, List[float]] = {"local": [], "bigquery_ivf": [], "bigquery_exact": []}
+    recalls: Dict[str, List[float]] = {"local": [], "bigquery_ivf": []}
+    for query_text in queries:
+        qvec = bq.embed_query(query_text)
+
+        started = time.perf_counter()
+        local_ids = {str(index.metadata["gt_program_id"][i]) for i, _ in index.search(qvec, topk)}
+        latencies["local"].append((time.perf_counter() - started) * 1000.0)
+
+        results = {}
+        for label, brute in (("bigquery_ivf", False), ("bigquery_exact", True)):
+            started = time.perf_counter()
+            rows = bq._collect_hits(bq._submit_hits_job(qvec, topk, topk, 0, brute).result())
+            latencies[label].append((time.perf_counter() - started) * 1000.0)
+            results[label] = {hit["program_id"] for hit in rows}
+
+        truth = results["bigquery_exact"] or {""}
+        recalls["local"].append(len(local_ids & truth) / len(truth))
+        recalls["bigquery_ivf"].append(len(results["bigquery_ivf"] & truth) / len(truth))
+
+    def _pct(values: List[float], q: float) -> Optional[float]:
+        return round(float(np.percentile(values, q)), 2) if values else None
+
+    return {
+        "version": index.version,
+        "queries": len(latencies["local"]),
+        "topk": topk,
+        "recall_at_k": {label: round(float(np.mean(v)), 4) if v else None for label, v in recalls.items()},
+        "latency_ms": {
+            label: {"p50": _pct(v, 50), "p95": _pct(v, 95)} for label, v in latencies.items()
+        },
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m campus_connect.tools.local_index",
+        description="Export a local snapshot of the courses index, or compare it with BigQuery.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("export", help="write a new snapshot under LOCAL_INDEX_DIR and make it CURRENT")
+    compare = commands.add_parser("compare", help="recall and latency of the local index against BigQuery")
+    compare.add_argument("queries", nargs="+", metavar="QUERY")
+    args = parser.parse_args(argv)
+    if not LOCAL_INDEX_DIR:
+        parser.error("LOCAL_INDEX_DIR is not set")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    from . import clients, get_bq_courses as bq
+
+    if args.command == "export":
+        table = f"`{bq.PROJECT_ID}.{bq.BQ_DATASET}.{bq.BQ_TABLE}`"
+        version = export_snapshot(clients.bigquery(), table, LOCAL_INDEX_DIR, location=bq.BQ_LOCATION)
+        logger.info("Local index snapshot exported | version=%s dir=%s", version, LOCAL_INDEX_DIR)
+        return 0
+
+    logger.info("Local index comparison | %s", json.dumps(compare_with_bigquery(args.queries)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+Process-local cache of `/Users` lookups keyed by email.
+
+Two layers: email -> doc_id (long TTL, ids never change) and email -> profile snapshot (short TTL).
+Writes from update_profile_from_resume patch the cached snapshot in place of a re-read. With
+PROFILE_CACHE_LISTEN=1 each cached document also gets a Firestore `on_snapshot` listener so
+out-of-band edits (wizard, dashboard) refresh the cache as they happen, and hooks registered with
+`on_change` see each new snapshot.
+
+Cached snapshots are shared; callers must treat them as read-only.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from google.cloud.firestore import DELETE_FIELD
+
+from . import clients, telemetry
+from .cache import TTLCache
+from .config import get_logger
+
+PROFILE_CACHE_SIZE = int(os.environ.get("PROFILE_CACHE_SIZE", "4096"))
+PROFILE_CACHE_TTL = float(os.environ.get("PROFILE_CACHE_TTL", "300"))            # seconds; snapshot freshness
+PROFILE_ID_CACHE_TTL = float(os.environ.get("PROFILE_ID_CACHE_TTL", "86400"))    # seconds; email -> doc_id
+PROFILE_CACHE_LISTEN = os.environ.get("PROFILE_CACHE_LISTEN", "0").strip().lower() in ("1", "true", "yes")
+PROFILE_CACHE_MAX_LISTENERS = int(os.environ.get("PROFILE_CACHE_MAX_LISTENERS", "500"))
+
+logger = get_logger("grestok.profile_cache")
+
+_doc_ids = TTLCache(PROFILE_CACHE_SIZE, PROFILE_ID_CACHE_TTL, name="profile_doc_ids")
+_profiles = TTLCache(PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL, name="profile_snapshots")
+
+_watches: "OrderedDict[str, Any]" = OrderedDict()   # doc_id -> Watch
+_watch_lock = threading.Lock()
+_change_hooks: List[Callable[[str, str, Dict[str, Any]], Any]] = []
+
+
+def _key(email: str) -> str:
+    return (email or "").strip().casefold()
+
+
+def get_doc_id(email: str) -> Optional[str]:
+    return _doc_ids.get(_key(email))
+
+
+def get_profile(email: str) -> Optional[Dict[str, Any]]:
+    """Returns {"doc_id", "data", "update_time"} for a cached user, or None."""
+    return _profiles.get(_key(email))
+
+
+def is_live(email: str) -> bool:
+    """True when a snapshot listener keeps this user's cached profile current."""
+    doc_id = get_doc_id(email)
+    return doc_id is not None and doc_id in _watches
+
+
+def remember_doc_id(email: str, doc_id: str) -> None:
+    """Records where a user's document lives without caching a snapshot (e.g. after a field-mask read)."""
+    _doc_ids.set(_key(email), doc_id)
+
+
+def remember(email: str, doc_id: str, data: Dict[str, Any], update_time: Any = None) -> None:
+    key = _key(email)
+    _doc_ids.set(key, doc_id)
+    _profiles.set(key, {"doc_id": doc_id, "data": data, "update_time": update_time})
+    if PROFILE_CACHE_LISTEN:
+        _ensure_watch(key, doc_id)
+
+
+def apply_update(email: str, updated_fields: Dict[str, Any], update_time: Any = None) -> None:
+    """Write-through: patch the cached snapshot with the dotted field paths just written to Firestore."""
+    key = _key(email)
+    entry = _profiles.get(key)
+    if entry is None:
+        return
+    data = _patched(entry["data"], updated_fields)
+    _profiles.set(key, {"doc_id": entry["doc_id"], "data": data, "update_time": update_time or entry["update_time"]})
+
+
+def invalidate(email: str, forget_doc_id: bool = False) -> None:
+    key = _key(email)
+    _profiles.pop(key)
+    if forget_doc_id:
+        _doc_ids.pop(key)
+
+
+def on_change(hook: Callable[[str, str, Dict[str, Any]], Any]) -> None:
+    """Calls `hook(email, doc_id, data)` from the listener thread whenever a watched profile changes."""
+    _change_hooks.append(hook)
+
+
+def stats() -> Dict[str, Any]:
+    return {
+        "doc_ids": _doc_ids.stats(),
+        "profiles": _profiles.stats(),
+        "listeners": len(_watches),
+    }
+
+
+def _patched(data: Dict[str, Any], updated_fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy-on-write application of Firestore dotted-path updates; untouched branches stay shared."""
+    result = dict(data)
+    for path, value in updated_fields.items():
+        parts = path.split(".")
+        node = result
+        for part in parts[:-1]:
+            child = node.get(part)
+            child = dict(child) if isinstance(child, dict) else {}
+            node[part] = child
+            node = child
+        if value is DELETE_FIELD:
+            node.pop(parts[-1], None)
+        else:
+            node[parts[-1]] = value
+    return result
+
+
+def _ensure_watch(key: str, doc_id: str) -> None:
+    with _watch_lock:
+        if doc_id in _watches:
+            _watches.move_to_end(doc_id)
+            return
+        def _on_snapshot(snapshots, changes, read_time) -> None:
+            telemetry.count_firestore("listen", len(snapshots))
+            for snapshot in snapshots:
+                if snapshot.exists:
+                    data = snapshot.to_dict() or {}
+                    _profiles.set(key, {"doc_id": snapshot.id, "data": data, "update_time": snapshot.update_time})
+                    for hook in _change_hooks:
+                        try:
+                            hook(key, snapshot.id, data)
+                        except Exception:
+                            logger.exception("Profile change hook failed | doc_id=%s", snapshot.id)
+                else:
+                    invalidate(key, forget_doc_id=True)
+
+        try:
+            _watches[doc_id] = clients.firestore().collection("Users").document(doc_id).on_snapshot(_on_snapshot)
+        except Exception:
+            logger.exception("Unable to attach profile listener | doc_id=%s", doc_id)
+            return
+
+        while len(_watches) > PROFILE_CACHE_MAX_LISTENERS:
+            old_doc_id, watch = _watches.popitem(last=False)
+            try:
+                watch.unsubscribe()
+            except Exception:
+                logger.exception("Unable to detach profile listener | doc_id=%s", old_doc_id)
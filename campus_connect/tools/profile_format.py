@@ -0,0 +1,115 @@
+"""
+Serialization of stored `/Users` documents into GrestokUser-shaped payloads (camelCase keys, every field
+present, missing values null).
+
+Each projection gets its own compiled TypeAdapter over a model derived from GrestokUser that only has the
+selected fields, so excluded parts of the document (the resume details, or everything but preferences and
+academics) are neither validated nor dumped. Views name the common projections:
+
+* "full"                   every field
+* "standard"               every field except the resume's rawText, workExperience and education (kept
+                           in the resume artifact, see `resume_store`) and the artifact reference; the
+                           default for the agent
+* "preferences_academics"  name, email, preferences and academicProfile
+
+`fields` selects arbitrary dotted paths instead (the REST `fields` parameter). The all-null payload for a
+user with no document is built once per view; like cached profiles it is shared and must be treated as
+read-only.
+"""
+
+import os
+from functools import lru_cache
+from typing import Any, Dict, Optional, Sequence, Tuple, Type
+
+from pydantic import BaseModel, Field, TypeAdapter, create_model
+
+from .projection import _path_tree, project
+from ..schema.user_profile import GrestokUser
+
+PROFILE_VIEWS: Dict[str, Tuple[Optional[Tuple[str, ...]], Tuple[str, ...]]] = {
+    # view -> (included paths or None for all, excluded paths)
+    "full": (None, ()),
+    "standard": (
+        None,
+        ("resumeExtracted.rawText", "resumeExtracted.workExperience", "resumeExtracted.education",
+         "resumeExtracted.artifact"),
+    ),
+    "preferences_academics": (
+        ("displayName", "email", "firstName", "lastName", "preferences", "academicProfile"),
+        (),
+    ),
+}
+PROFILE_VIEW = os.environ.get("PROFILE_VIEW", "standard")
+
+
+def resolve_view(view: Optional[str]) -> str:
+    resolved = (view or PROFILE_VIEW).strip().lower()
+    if resolved not in PROFILE_VIEWS:
+        raise ValueError(f"view must be one of {tuple(PROFILE_VIEWS)}, got {view!r}")
+    return resolved
+
+
+def _nested_model(annotation: Any) -> Optional[Type[BaseModel]]:
+    for candidate in (annotation, *getattr(annotation, "__args__", ())):
+        if isinstance(candidate, type) and issubclass(candidate, BaseModel):
+            return candidate
+    return None
+
+
+def _derive(model: Type[BaseModel], include: Optional[Dict[str, Any]], exclude: Dict[str, Any]) -> Type[BaseModel]:
+    """`model` restricted to the `include` tree (None: all fields) minus the `exclude` tree."""
+    fields: Dict[str, Any] = {}
+    for name, field in model.model_fields.items():
+        key = field.alias or name
+        sub_include = include.get(key) if include is not None else True
+        sub_exclude = exclude.get(key)
+        if sub_include is None or sub_exclude is True:
+            continue
+        nested = _nested_model(field.annotation)
+        if nested is not None and (sub_include is not True or sub_exclude):
+            derived = _derive(nested, None if sub_include is True else sub_include, sub_exclude or {})
+            fields[name] = (Optional[derived], Field(default=None, alias=field.alias))
+        else:
+            fields[name] = (field.annotation, field)
+    if include is None and not exclude:
+        return model
+    return create_model(model.__name__, __config__=model.model_config, **fields)
+
+
+@lru_cache(maxsize=64)
+def _adapter(include: Optional[Tuple[str, ...]], exclude: Tuple[str, ...]) -> TypeAdapter:
+    include_tree = _path_tree(include) if include is not None else None
+    return TypeAdapter(_derive(GrestokUser, include_tree, _path_tree(exclude)))
+
+
+def _selection(view: Optional[str], fields: Optional[Sequence[str]]) -> Tuple[Optional[Tuple[str, ...]], Tuple[str, ...]]:
+    if fields:
+        return tuple(sorted(set(fields))), ()
+    return PROFILE_VIEWS[resolve_view(view)]
+
+
+def dump_profile(
+    data: Optional[Dict[str, Any]],
+    view: Optional[str] = None,
+    fields: Optional[Sequence[str]] = None,
+    mode: str = "python",
+) -> Dict[str, Any]:
+    """Validates a stored document against the selected part of GrestokUser and dumps it by alias."""
+    include, exclude = _selection(view, fields)
+    adapter = _adapter(include, exclude)
+    payload = adapter.dump_python(adapter.validate_python(data or {}), by_alias=True, exclude_none=False, mode=mode)
+    if fields:
+        # Paths below a plain dict/list field (e.g. wizardSnapshot.intake.month) are not part of the model.
+        payload = project(payload, list(include))
+    return payload
+
+
+@lru_cache(maxsize=64)
+def _skeleton(view: str) -> Dict[str, Any]:
+    return dump_profile(None, view)
+
+
+def empty_profile(email: str, view: Optional[str] = None) -> Dict[str, Any]:
+    """The all-null payload reported for a user without a document, with `email` filled in."""
+    skeleton = _skeleton(resolve_view(view))
+    return {**skeleton, "email": email} if "email" in skeleton else skeleton
@@ -0,0 +1,191 @@
+"""
+Schema-aware minimal-diff merge of profile data into a stored `/Users` document.
+
+The incoming GrestokUser is walked along its model, so every write is as narrow as Firestore allows:
+
+* scalar fields get one dotted path per leaf, set only when the stored value is missing or empty (a missing
+  parent no longer means rewriting the whole nested object);
+* `resumeExtracted.skills`, `.education` and `.workExperience` are merged: stored entries stay, an entry
+  that matches a new one by identity key has its gaps filled, unmatched new entries are appended, and the
+  list path is written only when that changed it. Other lists keep the fill-if-empty rule;
+* free-form dict fields (e.g. `wizardSnapshot.intake`) are filled key by key.
+
+`read_mask` names the field paths the diff looks at, so the stored document can be read with a field mask
+instead of in full (bulky `resumeExtracted.rawText` is only read when the update carries a rawText itself).
+"""
+
+import json
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Type, get_args
+
+from pydantic import BaseModel
+
+from ..schema.user_profile import GrestokUser
+
+_SIMPLE_KEY = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value in ("", [], {})
+
+
+def _norm(value: Any) -> str:
+    return " ".join(str(value).split()).casefold()
+
+
+def _keyed(*groups: Tuple[str, ...]) -> Callable[[Any], Tuple[str, ...]]:
+    """Identity of a dict entry: the first non-empty key of each group, normalized; the whole entry if none."""
+    def identity(item: Any) -> Tuple[str, ...]:
+        if not isinstance(item, dict):
+            return (_norm(item),)
+        key = tuple(
+            next((_norm(item[name]) for name in names if not _is_empty(item.get(name))), "") for names in groups
+        )
+        if any(key):
+            return key
+        return (json.dumps(item, sort_keys=True, default=str),)
+    return identity
+
+
+# Key groups naming the same thing in the loosely shaped education / work experience entries.
+INSTITUTION_KEYS = ("institution", "school", "university", "college")
+DEGREE_KEYS = ("degree", "qualification", "program")
+COMPANY_KEYS = ("company", "employer", "organization")
+TITLE_KEYS = ("title", "role", "position")
+
+# List field path -> identity of its entries; lists not listed here are only set when empty.
+LIST_IDENTITY: Dict[str, Callable[[Any], Any]] = {
+    "resumeExtracted.skills": _norm,
+    "resumeExtracted.education": _keyed(INSTITUTION_KEYS, DEGREE_KEYS),
+    "resumeExtracted.workExperience": _keyed(COMPANY_KEYS, TITLE_KEYS),
+}
+
+
+@lru_cache(maxsize=None)
+def _schema(model: Type[BaseModel]) -> Dict[str, Optional[Type[BaseModel]]]:
+    """Firestore key (alias) -> nested model class, or None for plain fields."""
+    schema: Dict[str, Optional[Type[BaseModel]]] = {}
+    for name, field in model.model_fields.items():
+        nested = None
+        for candidate in (field.annotation, *get_args(field.annotation)):
+            if isinstance(candidate, type) and issubclass(candidate, BaseModel):
+                nested = candidate
+        schema[field.alias or name] = nested
+    return schema
+
+
+def _fields(model: Type[BaseModel], data: Dict[str, Any], prefix: str = "") -> Iterator[Tuple[str, Any]]:
+    """(field path, value) for every non-empty leaf, list or free-form dict in a dumped model."""
+    schema = _schema(model)
+    for key, value in data.items():
+        path = f"{prefix}.{key}" if prefix else key
+        nested = schema.get(key)
+        if nested is not None and isinstance(value, dict):
+            yield from _fields(nested, value, path)
+        elif not _is_empty(value):
+            yield path, value
+
+
+def _lookup(data: Any, path: str) -> Any:
+    for part in path.split("."):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(part)
+    return data
+
+
+def fill_missing(target: Dict[str, Any], source: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of `target` with its missing or empty keys taken from `source`, recursively for nested dicts."""
+    merged = dict(target)
+    for key, value in source.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = fill_missing(merged[key], value)
+        elif _is_empty(merged.get(key)):
+            merged[key] = value
+    return merged
+
+
+def _merge_list(current: List[Any], new: List[Any], identity: Callable[[Any], Any]) -> Optional[List[Any]]:
+    """`current` with `new` merged in by identity, or None when nothing changed."""
+    merged = list(current)
+    index: Dict[Any, int] = {}
+    for position, item in enumerate(merged):
+        index.setdefault(identity(item), position)
+    changed = False
+    for item in new:
+        key = identity(item)
+        position = index.get(key)
+        if position is None:
+            index[key] = len(merged)
+            merged.append(item)
+            changed = True
+        elif isinstance(item, dict) and isinstance(merged[position], dict):
+            filled = fill_missing(merged[position], item)
+            if filled != merged[position]:
+                merged[position] = filled
+                changed = True
+    return merged if changed else None
+
+
+def _merge_dict(current: Any, new: Dict[str, Any], path: str, updates: Dict[str, Any]) -> None:
+    """Fills a free-form dict key by key; keys that cannot be field paths rewrite the dict once."""
+    if not all(_SIMPLE_KEY.match(key) for key in new):
+        base = current if isinstance(current, dict) else {}
+        merged = fill_missing(base, new)
+        if merged != base or not isinstance(current, dict):
+            updates[path] = merged
+        return
+    for key, value in new.items():
+        stored = current.get(key) if isinstance(current, dict) else None
+        if isinstance(value, dict) and value:
+            _merge_dict(stored, value, f"{path}.{key}", updates)
+        elif _is_empty(stored) and not _is_empty(value):
+            updates[f"{path}.{key}"] = value
+
+
+def diff(stored: Any, target: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """
+    Dotted field paths -> values that make `stored` equal `target` on every key `target` has; keys only
+    `stored` has are left alone. Dicts whose keys cannot be field paths are written whole.
+    """
+    updates: Dict[str, Any] = {}
+    for key, value in target.items():
+        path = f"{prefix}.{key}" if prefix else key
+        current = stored.get(key) if isinstance(stored, dict) else None
+        if isinstance(value, dict) and isinstance(current, dict) and all(_SIMPLE_KEY.match(k) for k in value):
+            updates.update(diff(current, value, path))
+        elif current != value:
+            updates[path] = value
+    return updates
+
+
+def dump(user: GrestokUser) -> Dict[str, Any]:
+    """The update in Firestore shape (camelCase aliases, no None values)."""
+    return user.model_dump(by_alias=True, exclude_none=True)
+
+
+def read_mask(user: GrestokUser) -> List[str]:
+    """Field paths of the stored document that `compute_update` needs for this update."""
+    # An empty mask would read no fields at all; "email" still tells an existing user from a missing one.
+    return sorted(path for path, _ in _fields(GrestokUser, dump(user))) or ["email"]
+
+
+def compute_update(existing: Dict[str, Any], user: GrestokUser) -> Dict[str, Any]:
+    """
+    Dotted Firestore field paths -> values that merge `user` into `existing`; empty when it adds nothing.
+    `existing` may be the full document or one read with `read_mask(user)`.
+    """
+    updates: Dict[str, Any] = {}
+    for path, value in _fields(GrestokUser, dump(user)):
+        stored = _lookup(existing, path)
+        identity = LIST_IDENTITY.get(path)
+        if identity is not None and isinstance(value, list) and (isinstance(stored, list) or _is_empty(stored)):
+            merged = _merge_list(stored or [], value, identity)
+            if merged is not None:
+                updates[path] = merged
+        elif isinstance(value, dict):
+            _merge_dict(stored, value, path, updates)
+        elif _is_empty(stored):
+            updates[path] = value
+    return updates
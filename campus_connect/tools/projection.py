@@ -0,0 +1,46 @@
+"""
+Field projection for JSON-shaped responses: `fields=preferences,academicProfile.cgpa` keeps only those
+dotted paths (and the parents needed to reach them).
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Comma-separated dotted paths -> sorted unique list; None/blank means "everything"."""
+    if not fields:
+        return None
+    paths = sorted({path.strip() for path in fields.split(",") if path.strip()})
+    return paths or None
+
+
+def _path_tree(paths: Iterable[str]) -> Dict[str, Any]:
+    tree: Dict[str, Any] = {}
+    for path in paths:
+        node = tree
+        parts = path.split(".")
+        for part in parts[:-1]:
+            child = node.setdefault(part, {})
+            if child is True:  # a shorter path already selects this whole branch
+                break
+            node = child
+        else:
+            node[parts[-1]] = True
+    return tree
+
+
+def _apply(value: Any, tree: Dict[str, Any]) -> Any:
+    if not isinstance(value, dict):
+        return value
+    projected = {}
+    for key, subtree in tree.items():
+        if key in value:
+            projected[key] = value[key] if subtree is True else _apply(value[key], subtree)
+    return projected
+
+
+def project(data: Dict[str, Any], paths: Optional[List[str]]) -> Dict[str, Any]:
+    """Copy of `data` restricted to `paths`; missing paths are simply absent."""
+    if not paths:
+        return data
+    return _apply(data, _path_tree(paths))
@@ -0,0 +1,459 @@
+"""
+Course recommendations precomputed per user and stored at `/Users/{doc_id}/{RECOMMENDATIONS_COLLECTION}/latest`,
+so the agent and the dashboard read a ranked shortlist instead of running a search while the student waits.
+
+The inputs are the profile fields that shape a search (INPUT_PATHS: preferences, the wizard snapshot,
+highest qualification, resume skills and roles). From them `profile_query` builds two texts, what the
+student wants to study and their background, whose embeddings (one batched job, cached) are blended into
+the query vector; the hard constraints become search filters as in search_and_count. The nearest
+programs are capped per school and the top RECOMMENDATIONS_TOP_N stored with the fingerprint of the
+inputs they were computed from.
+
+Refreshes run in the background. `schedule` is called when an update writes one of the inputs, when a
+profile listener (PROFILE_CACHE_LISTEN) sees them change, and when a read finds the stored result stale.
+Requests for a user are debounced: each one pushes the refresh back by RECOMMENDATIONS_DEBOUNCE_SECONDS,
+up to RECOMMENDATIONS_MAX_DELAY_SECONDS after the first, so a burst of wizard edits costs one search.
+At most RECOMMENDATIONS_QUEUE_SIZE users wait at a time; beyond that requests are dropped, and since a
+stored result whose fingerprint no longer matches the profile reads as "stale", the next read queues it
+again. Results older than RECOMMENDATIONS_MAX_AGE (catalog changes) are stale too.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from . import clients, get_bq_courses, profile_cache, telemetry
+from .cache import TTLCache
+from .config import get_logger
+from .projection import project
+from .search_filters import describe_filters, normalize_filters
+
+RECOMMENDATIONS_ENABLED = os.environ.get("RECOMMENDATIONS_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+RECOMMENDATIONS_COLLECTION = os.environ.get("RECOMMENDATIONS_COLLECTION", "Recommendations")  # subcollection of /Users/{doc_id}
+RECOMMENDATIONS_TOP_N = int(os.environ.get("RECOMMENDATIONS_TOP_N", "20"))
+RECOMMENDATIONS_PER_SCHOOL = int(os.environ.get("RECOMMENDATIONS_PER_SCHOOL", "2"))        # programs kept per school
+RECOMMENDATIONS_CANDIDATES = int(os.environ.get("RECOMMENDATIONS_CANDIDATES", "100"))      # neighbours ranked
+RECOMMENDATIONS_BACKGROUND_WEIGHT = float(os.environ.get("RECOMMENDATIONS_BACKGROUND_WEIGHT", "0.3"))
+RECOMMENDATIONS_DEBOUNCE_SECONDS = float(os.environ.get("RECOMMENDATIONS_DEBOUNCE_SECONDS", "5"))
+RECOMMENDATIONS_MAX_DELAY_SECONDS = float(os.environ.get("RECOMMENDATIONS_MAX_DELAY_SECONDS", "30"))
+RECOMMENDATIONS_QUEUE_SIZE = int(os.environ.get("RECOMMENDATIONS_QUEUE_SIZE", "256"))      # users waiting
+RECOMMENDATIONS_WORKERS = int(os.environ.get("RECOMMENDATIONS_WORKERS", "2"))
+RECOMMENDATIONS_MAX_AGE = float(os.environ.get("RECOMMENDATIONS_MAX_AGE", str(7 * 86400)))  # seconds
+RECOMMENDATIONS_CACHE_SIZE = int(os.environ.get("RECOMMENDATIONS_CACHE_SIZE", "4096"))
+RECOMMENDATIONS_CACHE_TTL = float(os.environ.get("RECOMMENDATIONS_CACHE_TTL", "300"))      # seconds
+PIPELINE_VERSION = "1"   # bump when the query, blend or ranking changes so stored results go stale
+DOCUMENT_ID = "latest"
+SKILLS_IN_QUERY = 15
+ROLES_IN_QUERY = 3
+
+INPUT_PATHS = (
+    "preferences",
+    "wizardSnapshot",
+    "academicProfile.highestQualification",
+    "resumeExtracted.skills",
+    "resumeExtracted.summary.roles",
+)
+# Bookkeeping written on every save; a change to these alone does not change the search.
+_VOLATILE_PATHS = (("preferences", "lastUpdatedAt"), ("preferences", "source"), ("wizardSnapshot", "savedAt"))
+
+logger = get_logger("grestok.recommendations")
+
+_documents = TTLCache(RECOMMENDATIONS_CACHE_SIZE, RECOMMENDATIONS_CACHE_TTL, name="recommendations")
+
+
+# ---------- Inputs ----------
+
+def inputs(data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """The part of a profile recommendations depend on."""
+    selected = project(data or {}, list(INPUT_PATHS)) if data else {}
+    for parent, key in _VOLATILE_PATHS:
+        if isinstance(selected.get(parent), dict) and key in selected[parent]:
+            selected[parent] = {k: v for k, v in selected[parent].items() if k != key}
+    return selected
+
+
+def fingerprint(data: Optional[Dict[str, Any]]) -> str:
+    settings = (PIPELINE_VERSION, RECOMMENDATIONS_TOP_N, RECOMMENDATIONS_PER_SCHOOL, RECOMMENDATIONS_BACKGROUND_WEIGHT)
+    raw = json.dumps([settings, inputs(data)], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def affected(paths: Sequence[str]) -> bool:
+    """True when writing these dotted field paths can change the recommendations."""
+    return any(
+        path == target or path.startswith(f"{target}.") or target.startswith(f"{path}.")
+        for path in paths
+        for target in INPUT_PATHS
+    )
+
+
+def _dict(value: Any) -> Dict[str, Any]:
+    return value if isinstance(value, dict) else {}
+
+
+def _strings(value: Any) -> List[str]:
+    if isinstance(value, str):
+        value = [value]
+    return [item.strip() for item in value or [] if isinstance(item, str) and item.strip()]
+
+
+def profile_query(data: Dict[str, Any]) -> Tuple[List[str], List[float], Dict[str, Any]]:
+    """
+    (texts, weights, search_and_count filter arguments) for a profile: the interest text (field of study
+    and level) and the background text (qualification, skills, recent roles), whichever exist.
+    """
+    prefs = _dict(data.get("preferences"))
+    wizard = _dict(data.get("wizardSnapshot"))
+    field = _dict(prefs.get("fieldOfStudy")) or _dict(wizard.get("fieldOfStudy"))
+    level = prefs.get("studyLevel") or wizard.get("studyLevel")
+    resume = _dict(data.get("resumeExtracted"))
+
+    subjects = _strings([field.get("focus"), field.get("category")])
+    interest = ""
+    if subjects:
+        interest = f"{level or ''} programs in {', '.join(dict.fromkeys(subjects))}".strip()
+    background_parts = []
+    qualification = _dict(data.get("academicProfile")).get("highestQualification")
+    if isinstance(qualification, str) and qualification.strip():
+        background_parts.append(f"holds a {qualification.strip()}")
+    skills = _strings(resume.get("skills"))[:SKILLS_IN_QUERY]
+    if skills:
+        background_parts.append(f"skills: {', '.join(skills)}")
+    roles = _strings(_dict(resume.get("summary")).get("roles"))[:ROLES_IN_QUERY]
+    if roles:
+        background_parts.append(f"experience: {'; '.join(roles)}")
+    background = f"Student background: {'; '.join(background_parts)}" if background_parts else ""
+
+    texts, weights = [], []
+    if interest:
+        texts.append(interest)
+        weights.append(1.0 - RECOMMENDATIONS_BACKGROUND_WEIGHT if background else 1.0)
+    if background:
+        texts.append(background)
+        weights.append(RECOMMENDATIONS_BACKGROUND_WEIGHT if interest else 1.0)
+
+    budget = _dict(prefs.get("budget"))
+    max_tuition = budget.get("annualAmount") if budget.get("annualAmount") is not None else wizard.get("budget")
+    filters = {
+        "destination_countries": _strings(prefs.get("destinationCountries")) or _strings(wizard.get("countries")) or None,
+        "study_level": level if isinstance(level, str) else None,
+        "max_tuition": max_tuition if isinstance(max_tuition, (int, float)) else None,
+        "tuition_currency": budget.get("currencyCode") if isinstance(budget.get("currencyCode"), str) else None,
+    }
+    return texts, weights, filters
+
+
+def query_vector(texts: List[str], weights: List[float]) -> List[float]:
+    """Weighted blend of the texts' embeddings, unit length."""
+    vectors = np.asarray(get_bq_courses.embed_queries(texts), dtype=np.float64)
+    blended = np.asarray(weights, dtype=np.float64) @ vectors
+    norm = np.linalg.norm(blended)
+    return (blended / norm if norm else blended).tolist()
+
+
+def rank(hits: List[Dict[str, Any]], top_n: int, per_school: int) -> List[Dict[str, Any]]:
+    """Closest first, at most `per_school` programs from one school."""
+    ranked = []
+    per_school_counts: Dict[Any, int] = {}
+    for hit in sorted(hits, key=lambda hit: -(hit.get("similarity") or 0.0)):
+        school = hit.get("school_id")
+        if per_school and school is not None:
+            if per_school_counts.get(school, 0) >= per_school:
+                continue
+            per_school_counts[school] = per_school_counts.get(school, 0) + 1
+        ranked.append(hit)
+        if len(ranked) >= top_n:
+            break
+    return ranked
+
+
+# ---------- Storage ----------
+
+def _document_ref(users_ref, doc_id: str):
+    return users_ref.document(doc_id).collection(RECOMMENDATIONS_COLLECTION).document(DOCUMENT_ID)
+
+
+def load(doc_id: str, current: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    The stored recommendations, from the process cache when it holds the `current` fingerprint (or any
+    when None); otherwise read, since another instance may have refreshed them.
+    """
+    cached = _documents.get(doc_id)
+    if cached is not None and (current is None or cached.get("fingerprint") == current):
+        return cached
+    with telemetry.span("firestore.recommendations_get"):
+        snapshot = _document_ref(clients.firestore().collection("Users"), doc_id).get()
+    telemetry.count_firestore("get")
+    return _remember(doc_id, snapshot)
+
+
+async def load_async(doc_id: str, current: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Async twin of `load`."""
+    cached = _documents.get(doc_id)
+    if cached is not None and (current is None or cached.get("fingerprint") == current):
+        return cached
+    with telemetry.span("firestore.recommendations_get"):
+        snapshot = await _document_ref(clients.firestore_async().collection("Users"), doc_id).get()
+    telemetry.count_firestore("get")
+    return _remember(doc_id, snapshot)
+
+
+def _remember(doc_id: str, snapshot) -> Optional[Dict[str, Any]]:
+    if not snapshot.exists:
+        return None
+    document = snapshot.to_dict() or {}
+    _documents.set(doc_id, document)
+    return document
+
+
+def _age_seconds(document: Dict[str, Any]) -> float:
+    computed_at = document.get("computedAt")
+    if not isinstance(computed_at, datetime.datetime):
+        return float("inf")
+    return (datetime.datetime.now(datetime.timezone.utc) - computed_at).total_seconds()
+
+
+def status(document: Optional[Dict[str, Any]], current: str) -> str:
+    """"fresh", "stale" (inputs changed or too old) or "missing"."""
+    if document is None:
+        return "missing"
+    if document.get("fingerprint") != current or _age_seconds(document) > RECOMMENDATIONS_MAX_AGE:
+        return "stale"
+    return "fresh"
+
+
+def refresh(email: str, doc_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Recomputes and stores one user's recommendations unless the stored ones are fresh. Returns the
+    stored document, or None when the user no longer exists.
+    """
+    users_ref = clients.firestore().collection("Users")
+    with telemetry.span("firestore.profile_get"):
+        snapshot = users_ref.document(doc_id).get(field_paths=list(INPUT_PATHS))
+    telemetry.count_firestore("get")
+    if not snapshot.exists:
+        return None
+    data = snapshot.to_dict() or {}
+    current = fingerprint(data)
+    stored = load(doc_id, current)
+    if status(stored, current) == "fresh":
+        logger.debug("Recommendations already fresh | doc_id=%s", doc_id)
+        return stored
+
+    texts, weights, filter_args = profile_query(data)
+    filters = normalize_filters(**filter_args)
+    document: Dict[str, Any] = {
+        "fingerprint": current,
+        "computedAt": datetime.datetime.now(datetime.timezone.utc),
+        "version": PIPELINE_VERSION,
+        "query": {"texts": texts, "weights": weights},
+        "filters": describe_filters(filters),
+        "items": [],
+        "source": None,
+    }
+    with telemetry.span("recommendations.refresh", doc_id=doc_id) as stage:
+        if texts:
+            candidates, document["source"] = get_bq_courses.search_vector(
+                query_vector(texts, weights), max(RECOMMENDATIONS_CANDIDATES, RECOMMENDATIONS_TOP_N), filters
+            )
+            document["items"] = rank(candidates, RECOMMENDATIONS_TOP_N, RECOMMENDATIONS_PER_SCHOOL)
+        else:
+            document["reason"] = "profile has no field of study, skills or roles to search with"
+        with telemetry.span("firestore.recommendations_set", items=len(document["items"])):
+            _document_ref(users_ref, doc_id).set(document)
+        telemetry.count_firestore("set")
+    _documents.set(doc_id, document)
+    logger.info(
+        "Recommendations refreshed | doc_id=%s email=%s items=%d source=%s ms=%.1f",
+        doc_id,
+        email,
+        len(document["items"]),
+        document["source"],
+        stage.elapsed_ms,
+    )
+    return document
+
+
+# ---------- Background queue ----------
+
+class RefreshQueue:
+    """
+    Debounced, bounded queue of users whose recommendations need a refresh, drained by daemon worker
+    threads (started on first use). A user is never refreshed by two workers at once; a request that
+    arrives while its refresh runs is queued again for after it.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[str, str], Any],
+        workers: int,
+        maxsize: int,
+        debounce_seconds: float,
+        max_delay_seconds: float,
+    ):
+        self._handler = handler
+        self._workers = max(1, workers)
+        self.maxsize = maxsize
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max(debounce_seconds, max_delay_seconds)
+        self._pending: Dict[str, List[Any]] = {}   # doc_id -> [due, deadline, email]
+        self._running: Set[str] = set()
+        self._threads: List[threading.Thread] = []
+        self._cond = threading.Condition()
+        self._stopped = False
+        self.counts = dict.fromkeys(("scheduled", "coalesced", "dropped", "completed", "failed"), 0)
+
+    def schedule(self, doc_id: str, email: str) -> bool:
+        """Queues (or pushes back) a refresh; False when the queue is full."""
+        now = time.monotonic()
+        with self._cond:
+            entry = self._pending.get(doc_id)
+            if entry is not None:
+                entry[0] = min(now + self.debounce_seconds, entry[1])
+                entry[2] = email
+                self.counts["coalesced"] += 1
+                return True
+            if len(self._pending) >= self.maxsize:
+                self.counts["dropped"] += 1
+                return False
+            self._pending[doc_id] = [now + self.debounce_seconds, now + self.max_delay_seconds, email]
+            self.counts["scheduled"] += 1
+            self._start()
+            self._cond.notify()
+            return True
+
+    def is_pending(self, doc_id: str) -> bool:
+        with self._cond:
+            return doc_id in self._pending or doc_id in self._running
+
+    def _start(self) -> None:
+        if self._threads or self._stopped:
+            return
+        for i in range(self._workers):
+            thread = threading.Thread(target=self._work, name=f"recommendations-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _next(self) -> Optional[Tuple[str, str]]:
+        with self._cond:
+            while not self._stopped:
+                ready = [(entry[0], doc_id) for doc_id, entry in self._pending.items() if doc_id not in self._running]
+                if not ready:
+                    self._cond.wait()
+                    continue
+                due, doc_id = min(ready)
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                email = self._pending.pop(doc_id)[2]
+                self._running.add(doc_id)
+                return doc_id, email
+            return None
+
+    def _work(self) -> None:
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            doc_id, email = item
+            try:
+                self._handler(email, doc_id)
+                outcome = "completed"
+            except Exception:
+                logger.exception("Recommendations refresh failed | doc_id=%s", doc_id)
+                outcome = "failed"
+            with self._cond:
+                self._running.discard(doc_id)
+                self.counts[outcome] += 1
+                self._cond.notify_all()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until nothing is queued or running (benchmarks, shutdown); False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._running:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {**self.counts, "pending": len(self._pending), "running": len(self._running)}
+
+
+_queue = RefreshQueue(
+    refresh,
+    RECOMMENDATIONS_WORKERS,
+    RECOMMENDATIONS_QUEUE_SIZE,
+    RECOMMENDATIONS_DEBOUNCE_SECONDS,
+    RECOMMENDATIONS_MAX_DELAY_SECONDS,
+)
+
+
+def schedule(email: str, doc_id: str, data: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    Asks for a background refresh of `doc_id`'s recommendations. With the profile `data` at hand, a
+    change that leaves the inputs as they were when the cached result was computed is ignored.
+    """
+    if not RECOMMENDATIONS_ENABLED:
+        return False
+    if data is not None:
+        cached = _documents.get(doc_id)
+        if cached is not None and cached.get("fingerprint") == fingerprint(data):
+            return False
+    return _queue.schedule(doc_id, email)
+
+
+def is_pending(doc_id: str) -> bool:
+    return _queue.is_pending(doc_id)
+
+
+def describe(email: str, doc_id: str, data: Dict[str, Any], document: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    What a reader gets: {"status", "pending", "computed_at", "items", "filters", "source", "reason"}.
+    Stale or missing results queue a refresh; stale items are still returned meanwhile.
+    """
+    state = status(document, fingerprint(data))
+    pending = is_pending(doc_id)
+    if state != "fresh" and not pending:
+        pending = schedule(email, doc_id)
+    document = document or {}
+    computed_at = document.get("computedAt")
+    return {
+        "status": state,
+        "pending": pending,
+        "computed_at": computed_at.isoformat() if isinstance(computed_at, datetime.datetime) else None,
+        "items": document.get("items") or [],
+        "filters": document.get("filters"),
+        "source": document.get("source"),
+        "reason": document.get("reason"),
+    }
+
+
+def wait_idle(timeout: Optional[float] = None) -> bool:
+    return _queue.wait_idle(timeout)
+
+
+def shutdown() -> None:
+    _queue.stop()
+
+
+def stats() -> Dict[str, Any]:
+    return {"queue": _queue.stats(), "documents": _documents.stats()}
+
+
+profile_cache.on_change(lambda email, doc_id, data: schedule(email, doc_id, data))
@@ -0,0 +1,175 @@
+"""
+Output shapes for course-search hits. Search responses go into the model context and stay in session
+history, so the default shape spends as few tokens as possible on repeated keys and school details:
+
+* "records"   one dict per hit with every field (the original shape)
+* "compact"   one dict per hit without null fields; school details moved to a `schools` map
+* "columnar"  {"columns": [...], "rows": [[...], ...], "shared": {...}} with school details moved to a
+              `schools` table of the same form; values equal across all rows are written once in "shared"
+
+`fields` projects hits onto a subset of HIT_FIELDS (program_id is always kept), `similarity` is rounded
+to SIMILARITY_DIGITS and whole tuition amounts are written as integers in every shape. `iter_records`
+turns any shape back into plain records.
+"""
+
+import os
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+SEARCH_OUTPUT_FORMAT = os.environ.get("SEARCH_OUTPUT_FORMAT", "columnar")   # records | compact | columnar
+SIMILARITY_DIGITS = int(os.environ.get("SIMILARITY_DIGITS", "3"))
+OUTPUT_FORMATS = ("records", "compact", "columnar")
+
+HIT_FIELDS = (
+    "program_id",
+    "school_id",
+    "name",
+    "currency",
+    "programLevel",
+    "program_category",
+    "tuition",
+    "school_name",
+    "school_city",
+    "school_province",
+    "school_countryCode",
+    "similarity",
+)
+# Hit field -> key in the `schools` map.
+SCHOOL_FIELDS = {
+    "school_name": "name",
+    "school_city": "city",
+    "school_province": "province",
+    "school_countryCode": "countryCode",
+}
+
+
+def resolve_format(output_format: Optional[str]) -> str:
+    resolved = (output_format or SEARCH_OUTPUT_FORMAT).strip().lower()
+    if resolved not in OUTPUT_FORMATS:
+        raise ValueError(f"output_format must be one of {OUTPUT_FORMATS}, got {output_format!r}")
+    return resolved
+
+
+def resolve_fields(fields: Optional[Sequence[str]]) -> Tuple[str, ...]:
+    """Hit fields to return, in HIT_FIELDS order; None or empty means all of them."""
+    if not fields:
+        return HIT_FIELDS
+    unknown = sorted(set(fields) - set(HIT_FIELDS))
+    if unknown:
+        raise ValueError(f"unknown hit fields {unknown}; expected a subset of {list(HIT_FIELDS)}")
+    selected = {"program_id", *fields}
+    return tuple(field for field in HIT_FIELDS if field in selected)
+
+
+def _project(hit: Dict[str, Any], columns: Sequence[str], digits: int) -> Dict[str, Any]:
+    projected = {column: hit.get(column) for column in columns}
+    if projected.get("similarity") is not None:
+        projected["similarity"] = round(projected["similarity"], digits)
+    tuition = projected.get("tuition")
+    if isinstance(tuition, float) and tuition.is_integer():
+        projected["tuition"] = int(tuition)
+    return projected
+
+
+def _table(records: List[Dict[str, Any]], columns: Sequence[str]) -> Dict[str, Any]:
+    """Columns/rows table; columns with one value across every row are written once under "shared"."""
+    shared = {}
+    if len(records) > 1:
+        for column in columns:
+            first = records[0].get(column)
+            if all(record.get(column) == first for record in records):
+                shared[column] = first
+    kept = [column for column in columns if column not in shared]
+    table: Dict[str, Any] = {"columns": kept, "rows": [[record.get(column) for column in kept] for record in records]}
+    if shared:
+        table["shared"] = shared
+    return table
+
+
+def _schools(hits: List[Dict[str, Any]], school_columns: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    School details keyed by school_id, or {} when they cannot be factored out: a hit without a school id,
+    or two hits of one school that disagree on a detail, keeps every school field inline.
+    """
+    schools: Dict[str, Dict[str, Any]] = {}
+    if not school_columns:
+        return schools
+    for hit in hits:
+        if hit.get("school_id") is None:
+            return {}
+        school = {SCHOOL_FIELDS[column]: hit.get(column) for column in school_columns}
+        if schools.setdefault(hit["school_id"], school) != school:
+            return {}
+    return schools
+
+
+def format_hits(
+    hits: List[Dict[str, Any]],
+    output_format: str,
+    fields: Optional[Sequence[str]] = None,
+    similarity_digits: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Renders full hit records in `output_format`. Returns the response keys that carry them: always "hits",
+    plus "schools" when school details were deduplicated (a {school_id: {name, city, ...}} map in
+    "compact", a table keyed by school_id in "columnar").
+    """
+    if similarity_digits is None:
+        similarity_digits = SIMILARITY_DIGITS
+    columns = resolve_fields(fields)
+    records = [_project(hit, columns, similarity_digits) for hit in hits]
+    if output_format == "records":
+        return {"hits": records}
+
+    school_columns = [column for column in columns if column in SCHOOL_FIELDS]
+    schools = _schools(hits, school_columns)
+    if schools:
+        columns = tuple(column for column in columns if column not in SCHOOL_FIELDS)
+        if "school_id" not in columns:
+            columns = (columns[0], "school_id", *columns[1:])
+        records = [_project(hit, columns, similarity_digits) for hit in hits]
+
+    if output_format == "columnar":
+        shaped: Dict[str, Any] = {"hits": _table(records, columns)}
+        if schools:
+            school_records = [{"school_id": school_id, **school} for school_id, school in schools.items()]
+            shaped["schools"] = _table(school_records, ["school_id", *(SCHOOL_FIELDS[c] for c in school_columns)])
+        return shaped
+
+    shaped = {"hits": [{key: value for key, value in record.items() if value is not None} for record in records]}
+    if schools:
+        shaped["schools"] = {
+            school_id: {key: value for key, value in school.items() if value is not None}
+            for school_id, school in schools.items()
+        }
+    return shaped
+
+
+def _table_records(table: Dict[str, Any]) -> List[Dict[str, Any]]:
+    columns = table.get("columns") or []
+    shared = table.get("shared") or {}
+    return [{**dict(zip(columns, row)), **shared} for row in table.get("rows") or []]
+
+
+def iter_records(response: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Yields plain hit dicts (school details inlined again) from a response in any output shape."""
+    hits = response.get("hits") or []
+    if isinstance(hits, dict):
+        records = _table_records(hits)
+    else:
+        records = [dict(hit) for hit in hits if isinstance(hit, dict)]
+    schools = response.get("schools") or {}
+    if "columns" in schools:
+        schools = {school.pop("school_id", None): school for school in _table_records(schools)}
+    for record in records:
+        school = schools.get(record.get("school_id")) or {}
+        for field, key in SCHOOL_FIELDS.items():
+            if key in school:
+                record.setdefault(field, school[key])
+        yield record
+
+
+def hit_count(response: Dict[str, Any]) -> int:
+    hits = response.get("hits") or []
+    if isinstance(hits, dict):
+        return len(hits.get("rows") or [])
+    return len(hits)
@@ -0,0 +1,355 @@
+"""
+Deterministic resume pre-extraction: document text plus the fields that are reliably pattern-matchable
+(email, phone, CGPA and scale, English and standardized test scores, highest degree).
+
+Text extraction and parsing are CPU-bound (pypdf is pure Python), so they run in a process pool of
+RESUME_EXTRACT_WORKERS spawned workers; 0 runs them on a worker thread instead. Results are cached by
+the SHA-256 of the document bytes, so re-uploading the same file is free. The model only has to fill in
+what the parsers could not (`residual_fields`).
+
+PDF support needs `pypdf` (in requirements.txt; without it PDFs are passed to the model unparsed and a
+warning is logged once per process); DOCX is read with the standard library.
+"""
+
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import os
+import re
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from xml.etree import ElementTree
+
+from . import telemetry
+from .cache import TTLCache
+from .config import get_logger
+
+RESUME_EXTRACT_WORKERS = int(os.environ.get("RESUME_EXTRACT_WORKERS", "2"))       # 0 parses on a thread
+RESUME_CACHE_SIZE = int(os.environ.get("RESUME_CACHE_SIZE", "512"))               # documents kept per process
+RESUME_CACHE_TTL = float(os.environ.get("RESUME_CACHE_TTL", "86400"))             # seconds
+RESUME_MAX_BYTES = int(os.environ.get("RESUME_MAX_BYTES", str(10 * 1024 * 1024)))  # larger uploads go to the model as is
+
+PDF_MIME = "application/pdf"
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+TEXT_MIMES = ("text/plain", "text/markdown")
+SUPPORTED_MIMES = (PDF_MIME, DOCX_MIME, *TEXT_MIMES)
+
+# Dotted GrestokUser paths the parsers can fill; whatever they miss is left to the model.
+RULE_FIELDS = (
+    "email",
+    "phoneNumber",
+    "academicProfile.cgpa",
+    "academicProfile.cgpaScale",
+    "academicProfile.highestQualification",
+    "academicProfile.englishScores.ieltsOverall",
+    "academicProfile.englishScores.toeflTotal",
+    "academicProfile.englishScores.duolingo",
+    "academicProfile.englishScores.pte",
+    "academicProfile.standardizedTests.greTotal",
+    "academicProfile.standardizedTests.greQuant",
+    "academicProfile.standardizedTests.greVerbal",
+    "academicProfile.standardizedTests.gmatTotal",
+    "academicProfile.standardizedTests.satTotal",
+)
+
+logger = get_logger("grestok.resume")
+
+_cache = TTLCache(RESUME_CACHE_SIZE, RESUME_CACHE_TTL, name="resume_extractions")
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_pypdf_missing_logged = False
+
+
+class UnsupportedDocument(ValueError):
+    """The document type cannot be read locally (or its reader is not installed)."""
+
+
+# ---------- Text extraction ----------
+
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def _pdf_text(data: bytes) -> str:
+    try:
+        from pypdf import PdfReader
+    except ImportError as exc:  # a build without requirements.txt
+        global _pypdf_missing_logged
+        if not _pypdf_missing_logged:
+            _pypdf_missing_logged = True
+            logger.warning("pypdf is not installed; PDF resumes go to the model without local pre-extraction")
+        raise UnsupportedDocument("PDF extraction needs the 'pypdf' package") from exc
+    reader = PdfReader(io.BytesIO(data))
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+def _docx_text(data: bytes) -> str:
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            root = ElementTree.fromstring(archive.read("word/document.xml"))
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError) as exc:
+        raise UnsupportedDocument(f"not a readable DOCX file: {exc}") from exc
+    paragraphs = []
+    for paragraph in root.iter(f"{_W_NS}p"):
+        pieces = []
+        for node in paragraph.iter():
+            if node.tag == f"{_W_NS}t" and node.text:
+                pieces.append(node.text)
+            elif node.tag == f"{_W_NS}tab":
+                pieces.append("\t")
+            elif node.tag in (f"{_W_NS}br", f"{_W_NS}cr"):
+                pieces.append("\n")
+        paragraphs.append("".join(pieces))
+    return "\n".join(paragraphs)
+
+
+def extract_text(data: bytes, mime_type: str) -> str:
+    if mime_type == PDF_MIME:
+        return _pdf_text(data)
+    if mime_type == DOCX_MIME:
+        return _docx_text(data)
+    if mime_type in TEXT_MIMES:
+        return data.decode("utf-8", errors="replace")
+    raise UnsupportedDocument(f"unsupported document type {mime_type!r}")
+
+
+# ---------- Rule-based parsers ----------
+
+_EMAIL = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}")
+_PHONE = re.compile(r"(?<![\w/.])\+?\(?\d[\d\s().-]{7,18}\d(?![\w/])")
+_NUMBER = r"(\d{1,4}(?:\.\d{1,2})?)"
+_GAP = r"[^\d\n]{0,25}?"  # label-to-score filler such as " score: ", " (overall) - "
+_CGPA = re.compile(
+    rf"\b(?:c\.?g\.?p\.?a|g\.?p\.?a|cpi|grade point average)\b{_GAP}{_NUMBER}(?:\s*(?:/|out of)\s*{_NUMBER})?",
+    re.IGNORECASE,
+)
+_SCORES: Dict[str, Tuple[re.Pattern, float, float]] = {
+    "ieltsOverall": (re.compile(rf"\bielts\b{_GAP}{_NUMBER}", re.IGNORECASE), 0, 9),
+    "toeflTotal": (re.compile(rf"\btoefl(?:[\s-]*ibt)?\b{_GAP}{_NUMBER}", re.IGNORECASE), 0, 120),
+    "duolingo": (re.compile(rf"\b(?:duolingo|det)\b(?:\s+english\s+test)?{_GAP}{_NUMBER}", re.IGNORECASE), 10, 160),
+    "pte": (re.compile(rf"\bpte\b(?:\s+academic)?{_GAP}{_NUMBER}", re.IGNORECASE), 10, 90),
+    "greTotal": (re.compile(rf"\bgre\b(?:\s+general)?(?:\s+total)?{_GAP}{_NUMBER}", re.IGNORECASE), 260, 340),
+    "greQuant": (re.compile(rf"\bquant(?:itative)?(?:\s+reasoning)?\b{_GAP}{_NUMBER}", re.IGNORECASE), 130, 170),
+    "greVerbal": (re.compile(rf"\bverbal(?:\s+reasoning)?\b{_GAP}{_NUMBER}", re.IGNORECASE), 130, 170),
+    "gmatTotal": (re.compile(rf"\bgmat\b(?:\s+focus)?{_GAP}{_NUMBER}", re.IGNORECASE), 200, 805),
+    "satTotal": (re.compile(rf"\bsat\b{_GAP}{_NUMBER}", re.IGNORECASE), 400, 1600),
+}
+_ENGLISH = ("ieltsOverall", "toeflTotal", "duolingo", "pte")
+# GRE section scores only count when they appear near a GRE mention.
+_GRE_SECTIONS = ("greQuant", "greVerbal")
+_GRE_WINDOW = 200
+
+# Highest qualification, best first. Spelled-out degrees run to the next delimiter ("Master of Science in
+# Data Science, ..."); abbreviations are taken as written.
+_DEGREE_PHRASE = r"(?:'s)?(?:\s+degree)?\s+(?:of|in)\s+[^,;:()\[\]|\n\d]{3,60}"
+_DEGREES = (
+    re.compile(rf"\b(?:ph\.?\s?d\b\.?|doctor(?:ate)?{_DEGREE_PHRASE})", re.IGNORECASE),
+    re.compile(
+        rf"\b(?:master{_DEGREE_PHRASE}|m\.?\s?(?:sc|tech|eng|com|phil|des)\b\.?|mba\b|m\.?s\.?(?=\s+in\b))",
+        re.IGNORECASE,
+    ),
+    re.compile(
+        rf"\b(?:bachelor{_DEGREE_PHRASE}|b\.?\s?(?:sc|tech|eng|com|des|ca|ba)\b\.?|b\.e\.|b\.?a\.?(?=\s+in\b))",
+        re.IGNORECASE,
+    ),
+    re.compile(rf"\b(?:advanced\s+|post-?graduate\s+)?diploma{_DEGREE_PHRASE}", re.IGNORECASE),
+    re.compile(r"\b(?:higher secondary|high school|senior secondary|a-levels|class xii|12th grade)\b", re.IGNORECASE),
+)
+# Where a spelled-out degree name stops: "... from <school>", "... at <school>", " - 2023".
+_DEGREE_END = re.compile(r"\s+(?:from|at)\s+.*|\s+[-–].*", re.IGNORECASE)
+
+
+def _in_range(value: str, low: float, high: float) -> Optional[float]:
+    number = float(value)
+    return number if low <= number <= high else None
+
+
+def _first_score(text: str, name: str) -> Optional[float]:
+    pattern, low, high = _SCORES[name]
+    for match in pattern.finditer(text):
+        preceding = text[max(0, match.start() - _GRE_WINDOW):match.start()]
+        if name in _GRE_SECTIONS and not re.search(r"\bgre\b", preceding, re.IGNORECASE):
+            continue
+        score = _in_range(match.group(1), low, high)
+        if score is not None:
+            return score
+    return None
+
+
+def _cgpa(text: str) -> Tuple[Optional[float], Optional[float]]:
+    for match in _CGPA.finditer(text):
+        value = float(match.group(1))
+        if match.group(2):
+            scale = float(match.group(2))
+        else:
+            # Without an explicit scale, take the smallest common one that fits.
+            scale = next((s for s in (4.0, 5.0, 10.0) if value <= s), None)
+        if scale and 0 < value <= scale <= 100:
+            return value, scale
+    return None, None
+
+
+def _phone(text: str) -> Optional[str]:
+    for match in _PHONE.finditer(text):
+        candidate = " ".join(match.group(0).split())
+        digits = re.sub(r"\D", "", candidate)
+        # 10-15 digits and not a date range or year span such as "2019 - 2023".
+        if 10 <= len(digits) <= 15 and not re.fullmatch(r"(?:19|20)\d\d\s*[-–]\s*(?:19|20)\d\d", candidate):
+            return candidate
+    return None
+
+
+def _highest_qualification(text: str) -> Optional[str]:
+    for pattern in _DEGREES:
+        match = pattern.search(text)
+        if match:
+            return " ".join(_DEGREE_END.sub("", match.group(0)).split()).rstrip(".")
+    return None
+
+
+def parse_resume(text: str) -> Dict[str, Any]:
+    """Fields the rules found, as a partial GrestokUser dict (camelCase, nothing null)."""
+    fields: Dict[str, Any] = {}
+    email = _EMAIL.search(text)
+    if email:
+        fields["email"] = email.group(0).lower()
+    phone = _phone(text)
+    if phone:
+        fields["phoneNumber"] = phone
+
+    academic: Dict[str, Any] = {}
+    cgpa, scale = _cgpa(text)
+    if cgpa is not None:
+        academic["cgpa"], academic["cgpaScale"] = cgpa, scale
+    qualification = _highest_qualification(text)
+    if qualification:
+        academic["highestQualification"] = qualification
+
+    scores = {name: _first_score(text, name) for name in _SCORES}
+    if scores["greTotal"] is None and scores["greQuant"] and scores["greVerbal"]:
+        scores["greTotal"] = scores["greQuant"] + scores["greVerbal"]
+    english = {name: scores[name] for name in _ENGLISH if scores[name] is not None}
+    tests = {name: scores[name] for name in _SCORES if name not in _ENGLISH and scores[name] is not None}
+    for integer_field in ("toeflTotal", "duolingo", "pte"):
+        if integer_field in english:
+            english[integer_field] = int(english[integer_field])
+    if english:
+        academic["englishScores"] = english
+    if tests:
+        academic["standardizedTests"] = {name: int(value) for name, value in tests.items()}
+    if academic:
+        fields["academicProfile"] = academic
+    return fields
+
+
+def _leaf_paths(value: Dict[str, Any], prefix: str = "") -> List[str]:
+    paths = []
+    for key, item in value.items():
+        path = f"{prefix}{key}"
+        if isinstance(item, dict):
+            paths.extend(_leaf_paths(item, f"{path}."))
+        else:
+            paths.append(path)
+    return paths
+
+
+def residual_fields(fields: Dict[str, Any]) -> List[str]:
+    """RULE_FIELDS the parsers did not fill."""
+    found = set(_leaf_paths(fields))
+    return [path for path in RULE_FIELDS if path not in found]
+
+
+def _extract(data: bytes, mime_type: str) -> Dict[str, Any]:
+    """Worker-process entry point: text plus parsed fields (or the reason nothing could be read)."""
+    try:
+        text = extract_text(data, mime_type)
+    except UnsupportedDocument as exc:
+        return {"text": "", "fields": {}, "error": str(exc)}
+    except Exception as exc:  # a malformed file must not take the turn down; the model still sees it
+        return {"text": "", "fields": {}, "error": f"{type(exc).__name__}: {exc}"}
+    return {"text": text, "fields": parse_resume(text), "error": None}
+
+
+# ---------- Pool and cache ----------
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if RESUME_EXTRACT_WORKERS <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn, not fork: the parent already runs gRPC and executor threads.
+                _pool = ProcessPoolExecutor(
+                    max_workers=RESUME_EXTRACT_WORKERS, mp_context=multiprocessing.get_context("spawn")
+                )
+    return _pool
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def pre_extracted(digest: str) -> Optional[Dict[str, Any]]:
+    """The `pre_extract` result for this document, while it is still cached."""
+    return _cache.get(("pre", digest))
+
+
+def cached_result(digest: str) -> Optional[Dict[str, Any]]:
+    """Final (model-completed) extraction stored for this document, if any."""
+    return _cache.get(("final", digest))
+
+
+def store_result(digest: str, result: Dict[str, Any]) -> None:
+    _cache.set(("final", digest), result)
+
+
+async def pre_extract(data: bytes, mime_type: str) -> Dict[str, Any]:
+    """
+    Text and rule-based fields for a document, computed once per content hash:
+      {"hash": str, "mime_type": str, "text": str, "fields": {...}, "residual": [...], "error": str|None}
+    """
+    digest = content_hash(data)
+    cached = _cache.get(("pre", digest))
+    if cached is not None:
+        return cached
+    if len(data) > RESUME_MAX_BYTES:
+        extracted = {"text": "", "fields": {}, "error": f"document larger than {RESUME_MAX_BYTES} bytes"}
+    else:
+        loop = asyncio.get_running_loop()
+        with telemetry.span("resume.pre_extract", mime_type=mime_type, size=len(data)):
+            extracted = await loop.run_in_executor(_get_pool(), _extract, data, mime_type)
+    result = {"hash": digest, "mime_type": mime_type, **extracted, "residual": residual_fields(extracted["fields"])}
+    _cache.set(("pre", digest), result)
+    logger.info(
+        "Resume pre-extracted | hash=%s mime=%s chars=%d fields=%d residual=%d error=%s",
+        digest[:12],
+        mime_type,
+        len(result["text"]),
+        len(RULE_FIELDS) - len(result["residual"]),
+        len(result["residual"]),
+        result["error"],
+    )
+    return result
+
+
+def warm_up() -> None:
+    """Starts the worker processes ahead of the first upload (each imports the package once)."""
+    pool = _get_pool()
+    if pool is not None:
+        list(pool.map(parse_resume, [""] * RESUME_EXTRACT_WORKERS))
+
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters for the per-document extraction cache."""
+    return _cache.stats()
@@ -0,0 +1,222 @@
+"""
+Resume artifacts: the bulky parts of `resumeExtracted` (rawText, workExperience, education) stored outside
+the `/Users` document.
+
+Each version is one document at `/Users/{doc_id}/{RESUME_COLLECTION}/{sha256}` holding zlib-compressed JSON,
+named by the hash of its content: writing the same resume twice is idempotent and earlier versions stay
+readable. The user document keeps `resumeExtracted.artifact` (the reference) and `resumeExtracted.summary`
+(counts, roles, degrees), so a profile read costs the same whatever the size of the resume. `hydrate`
+fetches the artifact only for callers that need the full resume; decoded artifacts are cached by id,
+which is safe because an id always names the same content.
+
+Documents written before artifacts existed keep the fields inline; the next update that touches them
+(or the backfill job) moves them out.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from google.cloud.firestore import DELETE_FIELD
+
+from . import telemetry
+from .cache import TTLCache
+from .config import get_logger
+from .profile_merge import COMPANY_KEYS, DEGREE_KEYS, INSTITUTION_KEYS, TITLE_KEYS
+
+RESUME_COLLECTION = os.environ.get("RESUME_COLLECTION", "ResumeArtifacts")   # subcollection of /Users/{doc_id}
+RESUME_COMPRESSION_LEVEL = int(os.environ.get("RESUME_COMPRESSION_LEVEL", "6"))
+RESUME_ARTIFACT_CACHE_SIZE = int(os.environ.get("RESUME_ARTIFACT_CACHE_SIZE", "256"))
+RESUME_ARTIFACT_CACHE_TTL = float(os.environ.get("RESUME_ARTIFACT_CACHE_TTL", "3600"))   # seconds
+SUMMARY_ITEMS = 5
+ENCODING = "zlib+json"
+
+OFFLOADED_FIELDS = ("rawText", "workExperience", "education")
+OFFLOADED_PATHS = tuple(f"resumeExtracted.{field}" for field in OFFLOADED_FIELDS)
+REF_PATH = "resumeExtracted.artifact"
+SUMMARY_PATH = "resumeExtracted.summary"
+
+logger = get_logger("grestok.resume_store")
+
+_artifacts = TTLCache(RESUME_ARTIFACT_CACHE_SIZE, RESUME_ARTIFACT_CACHE_TTL, name="resume_artifacts")
+
+# (artifact id, artifact document, decoded fields)
+Artifact = Tuple[str, Dict[str, Any], Dict[str, Any]]
+
+
+def cache_stats() -> Dict[str, Any]:
+    return _artifacts.stats()
+
+
+def _resume(data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    resume = (data or {}).get("resumeExtracted")
+    return resume if isinstance(resume, dict) else {}
+
+
+def artifact_ref(data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    ref = _resume(data).get("artifact")
+    return ref if isinstance(ref, dict) and ref.get("id") else None
+
+
+def encode(fields: Dict[str, Any]) -> Tuple[str, Dict[str, Any], Dict[str, Any]]:
+    """(artifact id, artifact document, reference for the user document) for the offloaded fields."""
+    raw = json.dumps(fields, sort_keys=True, ensure_ascii=False, default=str, separators=(",", ":")).encode("utf-8")
+    artifact_id = hashlib.sha256(raw).hexdigest()
+    data = zlib.compress(raw, RESUME_COMPRESSION_LEVEL)
+    stored_at = datetime.datetime.now(datetime.timezone.utc)
+    document = {"encoding": ENCODING, "data": data, "sizeBytes": len(raw), "storedAt": stored_at}
+    ref = {
+        "id": artifact_id,
+        "encoding": ENCODING,
+        "sizeBytes": len(raw),
+        "compressedBytes": len(data),
+        "storedAt": stored_at,
+    }
+    return artifact_id, document, ref
+
+
+def decode(document: Dict[str, Any]) -> Dict[str, Any]:
+    if document.get("encoding") != ENCODING:
+        raise ValueError(f"unsupported resume artifact encoding {document.get('encoding')!r}")
+    return json.loads(zlib.decompress(document["data"]))
+
+
+def _first(item: Dict[str, Any], names: Sequence[str]) -> str:
+    return next((str(item[name]).strip() for name in names if item.get(name) not in (None, "")), "")
+
+
+def _labels(entries: Any, groups: Sequence[Sequence[str]], separator: str) -> List[str]:
+    labels = []
+    for entry in entries if isinstance(entries, list) else []:
+        if isinstance(entry, dict):
+            label = separator.join(part for part in (_first(entry, names) for names in groups) if part)
+            if label:
+                labels.append(label)
+    return labels[:SUMMARY_ITEMS]
+
+
+def summarize(fields: Dict[str, Any]) -> Dict[str, Any]:
+    """What the user document keeps about the offloaded fields."""
+    work = fields.get("workExperience") or []
+    education = fields.get("education") or []
+    return {
+        "rawTextChars": len(fields.get("rawText") or ""),
+        "workExperienceCount": len(work) if isinstance(work, list) else 0,
+        "educationCount": len(education) if isinstance(education, list) else 0,
+        "roles": _labels(work, (TITLE_KEYS, COMPANY_KEYS), " @ "),
+        "degrees": _labels(education, (DEGREE_KEYS, INSTITUTION_KEYS), ", "),
+    }
+
+
+def read_mask(mask: List[str]) -> List[str]:
+    """
+    `mask` widened for an update that touches an offloaded field: the new artifact version carries all of
+    them, so the diff needs every one (inline on older documents, else behind the reference).
+    """
+    if not any(path in OFFLOADED_PATHS for path in mask):
+        return mask
+    return sorted({*mask, *OFFLOADED_PATHS, REF_PATH})
+
+
+def wants_artifact(view: Optional[str], fields: Optional[Sequence[str]] = None) -> bool:
+    """True when a profile projection includes offloaded fields, i.e. the artifact has to be loaded."""
+    if fields:
+        return any(
+            path == "resumeExtracted" or any(path == p or path.startswith(f"{p}.") for p in OFFLOADED_PATHS)
+            for path in fields
+        )
+    return view == "full"
+
+
+def _inline(data: Dict[str, Any], fields: Dict[str, Any]) -> Dict[str, Any]:
+    return {**data, "resumeExtracted": {**_resume(data), **fields}}
+
+
+def _artifact_document(users_ref, doc_id: str, artifact_id: str):
+    return users_ref.document(doc_id).collection(RESUME_COLLECTION).document(artifact_id)
+
+
+def _decoded(snapshot, ref: Dict[str, Any], doc_id: str) -> Optional[Dict[str, Any]]:
+    if not snapshot.exists:
+        logger.warning("Resume artifact missing | doc_id=%s artifact=%s", doc_id, ref["id"])
+        return None
+    fields = decode(snapshot.to_dict() or {})
+    _artifacts.set(ref["id"], fields)
+    return fields
+
+
+def hydrate(users_ref, doc_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """`data` with the artifact's fields inlined into resumeExtracted; `data` itself when it has none."""
+    ref = artifact_ref(data)
+    if ref is None:
+        return data
+    fields = _artifacts.get(ref["id"])
+    if fields is None:
+        with telemetry.span("firestore.resume_artifact_get"):
+            snapshot = _artifact_document(users_ref, doc_id, ref["id"]).get()
+        telemetry.count_firestore("get")
+        fields = _decoded(snapshot, ref, doc_id)
+    return data if fields is None else _inline(data, fields)
+
+
+async def hydrate_async(users_ref, doc_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Async twin of `hydrate` for `AsyncClient` collections."""
+    ref = artifact_ref(data)
+    if ref is None:
+        return data
+    fields = _artifacts.get(ref["id"])
+    if fields is None:
+        with telemetry.span("firestore.resume_artifact_get"):
+            snapshot = await _artifact_document(users_ref, doc_id, ref["id"]).get()
+        telemetry.count_firestore("get")
+        fields = _decoded(snapshot, ref, doc_id)
+    return data if fields is None else _inline(data, fields)
+
+
+def plan_writes(
+    existing: Dict[str, Any], updated_fields: Dict[str, Any], migrate: bool = False
+) -> Tuple[Dict[str, Any], Optional[Artifact]]:
+    """
+    Turns field updates computed against the hydrated `existing` document into what is written: offloaded
+    fields go into a new artifact version and the user document gets its reference and summary instead,
+    dropping inline copies left by older documents. `migrate` also moves inline fields out when the
+    update does not touch them. Returns (user document updates, artifact to save first or None).
+    """
+    resume = _resume(existing)
+    inline = artifact_ref(existing) is None and any(field in resume for field in OFFLOADED_FIELDS)
+    if not any(path in OFFLOADED_PATHS for path in updated_fields) and not (migrate and inline):
+        return updated_fields, None
+
+    fields = {field: resume[field] for field in OFFLOADED_FIELDS if resume.get(field) not in (None, "", [])}
+    for path, value in updated_fields.items():
+        if path in OFFLOADED_PATHS:
+            fields[path.split(".", 1)[1]] = value
+    artifact_id, document, ref = encode(fields)
+
+    writes = {path: value for path, value in updated_fields.items() if path not in OFFLOADED_PATHS}
+    writes[REF_PATH] = ref
+    writes[SUMMARY_PATH] = summarize(fields)
+    if inline:
+        for field in OFFLOADED_FIELDS:
+            if field in resume:
+                writes[f"resumeExtracted.{field}"] = DELETE_FIELD
+    return writes, (artifact_id, document, fields)
+
+
+def save(users_ref, doc_id: str, artifact: Artifact) -> None:
+    artifact_id, document, fields = artifact
+    with telemetry.span("firestore.resume_artifact_set", bytes=len(document["data"])):
+        _artifact_document(users_ref, doc_id, artifact_id).set(document)
+    telemetry.count_firestore("set")
+    _artifacts.set(artifact_id, fields)
+
+
+async def save_async(users_ref, doc_id: str, artifact: Artifact) -> None:
+    artifact_id, document, fields = artifact
+    with telemetry.span("firestore.resume_artifact_set", bytes=len(document["data"])):
+        await _artifact_document(users_ref, doc_id, artifact_id).set(document)
+    telemetry.count_firestore("set")
+    _artifacts.set(artifact_id, fields)
@@ -0,0 +1,240 @@
+"""
+Structured course-search filters derived from the `Preferences` schema
+(destinationCountries, studyLevel, budget). Filters are normalized once and then rendered
+either as a BigQuery WHERE clause over the stored index columns or as a local-index row mask.
+
+A budget given with a currency is converted into each program's currency with TUITION_FX_RATES
+before comparing, so a budget in INR still matches programs priced in USD or GBP. Programs priced in a
+currency without a rate are kept rather than compared across currencies.
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from google.cloud import bigquery
+
+# Approximate units of each currency per US dollar; only used to compare tuition against a budget.
+_DEFAULT_FX_RATES = {
+    "USD": 1.0, "CAD": 1.37, "GBP": 0.79, "EUR": 0.92, "AUD": 1.52, "NZD": 1.66,
+    "INR": 83.5, "SGD": 1.35, "AED": 3.67, "HKD": 7.8, "MYR": 4.7, "JPY": 150.0, "KRW": 1350.0,
+    "CNY": 7.2, "CHF": 0.88, "SEK": 10.5, "NOK": 10.6, "DKK": 6.9, "PLN": 4.0, "CZK": 23.0, "HUF": 360.0,
+}
+TUITION_FX_RATES = {
+    code.upper(): float(rate)
+    for code, rate in {**_DEFAULT_FX_RATES, **json.loads(os.environ.get("TUITION_FX_RATES") or "{}")}.items()
+    if float(rate) > 0
+}   # TUITION_FX_RATES='{"INR": 84.1}' overrides or adds rates
+
+# Destination names students and the wizard commonly use -> ISO 3166-1 alpha-2 (school_countryCode).
+_COUNTRY_CODES = {
+    "australia": "AU",
+    "austria": "AT",
+    "belgium": "BE",
+    "canada": "CA",
+    "china": "CN",
+    "cyprus": "CY",
+    "czech republic": "CZ",
+    "czechia": "CZ",
+    "denmark": "DK",
+    "dubai": "AE",
+    "england": "GB",
+    "finland": "FI",
+    "france": "FR",
+    "germany": "DE",
+    "great britain": "GB",
+    "hong kong": "HK",
+    "hungary": "HU",
+    "india": "IN",
+    "ireland": "IE",
+    "italy": "IT",
+    "japan": "JP",
+    "latvia": "LV",
+    "lithuania": "LT",
+    "malaysia": "MY",
+    "malta": "MT",
+    "netherlands": "NL",
+    "new zealand": "NZ",
+    "norway": "NO",
+    "poland": "PL",
+    "portugal": "PT",
+    "scotland": "GB",
+    "singapore": "SG",
+    "south korea": "KR",
+    "spain": "ES",
+    "sweden": "SE",
+    "switzerland": "CH",
+    "the netherlands": "NL",
+    "uae": "AE",
+    "uk": "GB",
+    "united arab emirates": "AE",
+    "united kingdom": "GB",
+    "united states": "US",
+    "united states of america": "US",
+    "usa": "US",
+    "us": "US",
+    "wales": "GB",
+}
+
+# RE2-compatible patterns matched against LOWER(programLevel or program_category).
+_LEVEL_PATTERNS = {
+    "bachelor": r"bachelor|undergrad|\bb\.?(a|sc|s|eng|tech|com|ba)\b",
+    "master": r"master|post-?grad|\bm\.?(a|sc|s|eng|tech|ba|res)\b",
+    "doctorate": r"doctor|ph\.?\s?d",
+    "diploma": r"diploma|certificate",
+}
+_LEVEL_ALIASES = {
+    "bachelors": "bachelor",
+    "bachelor's": "bachelor",
+    "undergraduate": "bachelor",
+    "ug": "bachelor",
+    "masters": "master",
+    "master's": "master",
+    "postgraduate": "master",
+    "pg": "master",
+    "mba": "master",
+    "phd": "doctorate",
+    "doctoral": "doctorate",
+    "certificate": "diploma",
+}
+
+
+def normalize_filters(
+    destination_countries: Optional[Sequence[str]] = None,
+    study_level: Optional[str] = None,
+    max_tuition: Optional[float] = None,
+    tuition_currency: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Returns a canonical filter dict. Values that cannot be mapped onto catalog columns are
+    reported under "ignored" instead of silently filtering everything out.
+    """
+    ignored: List[str] = []
+
+    countries: Optional[Tuple[str, ...]] = None
+    if destination_countries:
+        codes = set()
+        for country in destination_countries:
+            value = (country or "").strip()
+            if not value:
+                continue
+            code = _COUNTRY_CODES.get(value.casefold())
+            if code is None and len(value) == 2 and value.isalpha():
+                code = value.upper()
+            if code is None:
+                ignored.append(f"destination_countries:{value}")
+            else:
+                codes.add(code)
+        countries = tuple(sorted(codes)) or None
+
+    level: Optional[str] = None
+    level_pattern: Optional[str] = None
+    if study_level and study_level.strip():
+        raw_level = study_level.strip().casefold()
+        resolved = _LEVEL_ALIASES.get(raw_level, raw_level)
+        if resolved in _LEVEL_PATTERNS:
+            level, level_pattern = resolved, _LEVEL_PATTERNS[resolved]
+        else:
+            ignored.append(f"study_level:{study_level.strip()}")
+
+    tuition_cap = float(max_tuition) if max_tuition is not None and max_tuition > 0 else None
+    currency = tuition_currency.strip().upper() if tuition_currency and tuition_currency.strip() else None
+    if currency and tuition_cap is None:
+        ignored.append(f"tuition_currency:{currency} (no max_tuition)")
+        currency = None
+
+    return {
+        "countries": countries,
+        "study_level": level,
+        "level_pattern": level_pattern,
+        "max_tuition": tuition_cap,
+        "currency": currency,
+        "ignored": ignored,
+    }
+
+
+def has_filters(filters: Optional[Dict[str, Any]]) -> bool:
+    return bool(filters) and any(
+        filters.get(name) is not None for name in ("countries", "level_pattern", "max_tuition")
+    )
+
+
+def filters_key(filters: Optional[Dict[str, Any]]) -> Tuple[Any, ...]:
+    """Hashable identity of the filters that actually change the result set (for cache keys)."""
+    if not has_filters(filters):
+        return ()
+    return (filters["countries"], filters["level_pattern"], filters["max_tuition"], filters["currency"])
+
+
+def tuition_caps(filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, float]]:
+    """
+    {program currency: largest tuition within budget} when the budget has a currency, else None (the cap
+    applies to tuition as is). Without a rate for the budget currency only that currency is capped.
+    """
+    if not filters or filters.get("max_tuition") is None or not filters.get("currency"):
+        return None
+    cap, currency = filters["max_tuition"], filters["currency"]
+    budget_rate = TUITION_FX_RATES.get(currency)
+    if budget_rate is None:
+        return {currency: cap}
+    return {code: cap * rate / budget_rate for code, rate in TUITION_FX_RATES.items()}
+
+
+def within_budget(tuition: Any, currency: Any, filters: Dict[str, Any], caps: Optional[Dict[str, float]]) -> bool:
+    """Python twin of the tuition clause in `filter_sql`, for the local index."""
+    if tuition is None:
+        return False
+    if caps is None:
+        return tuition <= filters["max_tuition"]
+    cap = caps.get((currency or "").upper())
+    return cap is None or tuition <= cap
+
+
+def describe_filters(filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """camelCase summary echoed back to the agent so it knows what was enforced."""
+    if not filters or (not has_filters(filters) and not filters.get("ignored")):
+        return None
+    applied = {
+        "destinationCountries": list(filters["countries"]) if filters["countries"] else None,
+        "studyLevel": filters["study_level"],
+        "maxTuition": filters["max_tuition"],
+        "currency": filters["currency"],
+    }
+    summary: Dict[str, Any] = {key: value for key, value in applied.items() if value is not None}
+    if filters.get("ignored"):
+        summary["ignored"] = list(filters["ignored"])
+    return summary
+
+
+def filter_sql(
+    filters: Optional[Dict[str, Any]],
+    prefix: str = "f_",
+) -> Tuple[str, List[Any]]:
+    """Renders filters as a WHERE clause over stored index columns plus its query parameters."""
+    if not has_filters(filters):
+        return "", []
+
+    clauses: List[str] = []
+    params: List[Any] = []
+    if filters["countries"]:
+        clauses.append(f"UPPER(school_countryCode) IN UNNEST(@{prefix}countries)")
+        params.append(bigquery.ArrayQueryParameter(f"{prefix}countries", "STRING", list(filters["countries"])))
+    if filters["level_pattern"]:
+        clauses.append(
+            f"REGEXP_CONTAINS(LOWER(COALESCE(programLevel, program_category, '')), @{prefix}level)"
+        )
+        params.append(bigquery.ScalarQueryParameter(f"{prefix}level", "STRING", filters["level_pattern"]))
+    caps = tuition_caps(filters)
+    if caps is not None:
+        # The budget converted into each program's currency; currencies without a rate are not capped.
+        clauses.append(
+            f"tuition IS NOT NULL AND (UPPER(IFNULL(currency, '')) NOT IN UNNEST(@{prefix}cap_currencies)"
+            f" OR EXISTS (SELECT 1 FROM UNNEST(@{prefix}cap_currencies) AS code WITH OFFSET AS pos"
+            f" WHERE code = UPPER(currency) AND tuition <= @{prefix}caps[OFFSET(pos)]))"
+        )
+        params.append(bigquery.ArrayQueryParameter(f"{prefix}cap_currencies", "STRING", list(caps)))
+        params.append(bigquery.ArrayQueryParameter(f"{prefix}caps", "FLOAT64", list(caps.values())))
+    elif filters["max_tuition"] is not None:
+        clauses.append(f"tuition IS NOT NULL AND tuition <= @{prefix}max_tuition")
+        params.append(bigquery.ScalarQueryParameter(f"{prefix}max_tuition", "FLOAT64", filters["max_tuition"]))
+    return "WHERE " + "\n        AND ".join(clauses), params
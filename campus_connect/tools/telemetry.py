@@ -0,0 +1,307 @@
+"""
+Spans and Prometheus-style metrics for the runner, the agents and the tools.
+
+`span("bigquery.search")` times a stage into the `grestok_stage_duration_seconds` histogram and, when the
+OpenTelemetry API is importable (ADK depends on it), opens a child span on the current trace, so stages nest
+under ADK's own agent/LLM/tool spans in whatever exporter the deployment configures. Extra consumers can
+subscribe with `add_span_listener`.
+
+Counters cover BigQuery bytes and slot time per job, Firestore operations and document counts, tool payload
+sizes and LLM token usage. Components with their own `stats()` (caches, session store) are registered with
+`register_stats` and exposed as gauges. `render_prometheus()` produces the /metrics text format.
+
+Set TELEMETRY_ENABLED=0 to turn all of it into no-ops.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .config import get_logger
+
+TELEMETRY_ENABLED = os.environ.get("TELEMETRY_ENABLED", "1").strip().lower() not in ("0", "false", "no")
+TELEMETRY_OTEL = os.environ.get("TELEMETRY_OTEL", "1").strip().lower() not in ("0", "false", "no")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+logger = get_logger("grestok.telemetry")
+
+try:
+    from opentelemetry import context as otel_context
+    from opentelemetry import trace as otel_trace
+except ImportError:  # optional
+    otel_context = None
+    otel_trace = None
+
+_tracer = otel_trace.get_tracer("grestok") if (otel_trace is not None and TELEMETRY_OTEL) else None
+
+LabelValues = Tuple[str, ...]
+_INF = 'le="+Inf"'
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if not TELEMETRY_ENABLED or not amount:
+            return
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(tuple(str(labels.get(name, "")) for name in self.labelnames), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelValues, List[float]] = {}  # bucket counts..., +Inf count, sum
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        if not TELEMETRY_ENABLED:
+            return
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def count(self, **labels: Any) -> int:
+        series = self._series.get(tuple(str(labels.get(name, "")) for name in self.labelnames))
+        return int(series[-2]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    le = f'le="{bound:g}"'
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {count:g}")
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, _INF)} {series[-2]:g}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {series[-1]:.6f}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {series[-2]:g}")
+        return lines
+
+
+_metrics: List[Any] = []
+_stats_providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+_span_listeners: List[Callable[[str, float, Dict[str, Any], Optional[BaseException]], None]] = []
+
+STAGE_SECONDS = Histogram(
+    "grestok_stage_duration_seconds", "Duration of a traced stage (auth, session, llm, tool, bigquery, ...).", ("stage",)
+)
+STAGE_ERRORS = Counter("grestok_stage_errors_total", "Stages that ended with an exception.", ("stage",))
+HTTP_SECONDS = Histogram(
+    "grestok_http_request_duration_seconds", "Time to response headers per route.", ("route", "method", "status")
+)
+BQ_JOBS = Counter("grestok_bigquery_jobs_total", "BigQuery jobs completed.", ("stage", "cache_hit"))
+BQ_BYTES = Counter("grestok_bigquery_bytes_processed_total", "BigQuery bytes processed.", ("stage",))
+BQ_BILLED = Counter("grestok_bigquery_bytes_billed_total", "BigQuery bytes billed.", ("stage",))
+BQ_SLOT_MS = Counter("grestok_bigquery_slot_milliseconds_total", "BigQuery slot time consumed.", ("stage",))
+FS_OPS = Counter("grestok_firestore_operations_total", "Firestore calls.", ("op",))
+FS_DOCS = Counter("grestok_firestore_documents_total", "Firestore documents read or written.", ("op",))
+PAYLOAD_BYTES = Histogram(
+    "grestok_tool_payload_bytes", "JSON size of tool arguments and responses.", ("tool", "direction"), SIZE_BUCKETS
+)
+LLM_TOKENS = Counter("grestok_llm_tokens_total", "Gemini tokens reported in usage metadata.", ("agent", "kind"))
+
+
+class Span:
+    """A timed stage. Use as a context manager, or call `end()` when the stage finishes elsewhere."""
+
+    __slots__ = ("name", "attributes", "started", "elapsed", "_otel_span", "_otel_token")
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None, activate: bool = True):
+        self.name = name
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.elapsed: Optional[float] = None
+        self._otel_span = None
+        self._otel_token = None
+        if TELEMETRY_ENABLED and _tracer is not None:
+            self._otel_span = _tracer.start_span(name, attributes=_otel_attributes(self.attributes))
+            if activate:
+                # Makes nested spans (and ADK's) children of this one; only valid when ended in the same context.
+                self._otel_token = otel_context.attach(otel_trace.set_span_in_context(self._otel_span))
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed_ms(self) -> float:
+        seconds = self.elapsed if self.elapsed is not None else time.perf_counter() - self.started
+        return round(seconds * 1000.0, 1)
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+        if self._otel_span is not None and value is not None:
+            self._otel_span.set_attribute(key, _otel_value(value))
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        if self.elapsed is not None:
+            return
+        self.elapsed = time.perf_counter() - self.started
+        if not TELEMETRY_ENABLED:
+            return
+        STAGE_SECONDS.observe(self.elapsed, stage=self.name)
+        if error is not None:
+            STAGE_ERRORS.inc(stage=self.name)
+        if self._otel_span is not None:
+            if error is not None:
+                self._otel_span.record_exception(error)
+                self._otel_span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, str(error)))
+            self._otel_span.end()
+            if self._otel_token is not None:
+                try:
+                    otel_context.detach(self._otel_token)
+                except Exception:  # ended from another context; the span itself is still recorded
+                    pass
+        for listener in _span_listeners:
+            try:
+                listener(self.name, self.elapsed, self.attributes, error)
+            except Exception:
+                logger.exception("Span listener failed | span=%s", self.name)
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.end(exc)
+
+
+def _otel_value(value: Any) -> Any:
+    return value if isinstance(value, (bool, int, float, str)) else str(value)
+
+
+def _otel_attributes(attributes: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: _otel_value(value) for key, value in attributes.items() if value is not None}
+
+
+def span(name: str, **attributes: Any) -> Span:
+    return Span(name, attributes)
+
+
+def start_span(name: str, **attributes: Any) -> Span:
+    """Span that is ended from a different callback (e.g. before/after model); it does not become current."""
+    return Span(name, attributes, activate=False)
+
+
+def add_span_listener(listener: Callable[[str, float, Dict[str, Any], Optional[BaseException]], None]) -> None:
+    """Registers `listener(name, seconds, attributes, error)` for every finished span."""
+    _span_listeners.append(listener)
+
+
+def record_bigquery_job(stage: str, job: Any) -> None:
+    """Bytes processed/billed and slot time of a finished query job."""
+    if not TELEMETRY_ENABLED or job is None:
+        return
+    cache_hit = bool(getattr(job, "cache_hit", False))
+    BQ_JOBS.inc(stage=stage, cache_hit=str(cache_hit).lower())
+    BQ_BYTES.inc(float(getattr(job, "total_bytes_processed", None) or 0), stage=stage)
+    BQ_BILLED.inc(float(getattr(job, "total_bytes_billed", None) or 0), stage=stage)
+    BQ_SLOT_MS.inc(float(getattr(job, "slot_millis", None) or 0), stage=stage)
+
+
+def count_firestore(op: str, documents: int = 1) -> None:
+    """One Firestore call (`op` = get | query | update | set | listen) touching `documents` documents."""
+    FS_OPS.inc(op=op)
+    FS_DOCS.inc(documents, op=op)
+
+
+def payload_size(value: Any) -> int:
+    try:
+        return len(json.dumps(value, ensure_ascii=False, default=str, separators=(",", ":")))
+    except (TypeError, ValueError):
+        return len(str(value))
+
+
+def observe_payload(tool: str, direction: str, value: Any) -> int:
+    if not TELEMETRY_ENABLED:
+        return 0
+    size = payload_size(value)
+    PAYLOAD_BYTES.observe(size, tool=tool, direction=direction)
+    return size
+
+
+def register_stats(component: str, provider: Callable[[], Dict[str, Any]]) -> None:
+    """Exposes the numeric fields of `provider()` as `grestok_component_stat{component=..., stat=...}`."""
+    _stats_providers[component] = provider
+
+
+def _render_stats() -> List[str]:
+    lines = [
+        "# HELP grestok_component_stat Point-in-time counters reported by caches and stores.",
+        "# TYPE grestok_component_stat gauge",
+    ]
+    for component, provider in sorted(_stats_providers.items()):
+        try:
+            stats = provider() or {}
+        except Exception:
+            logger.exception("Stats provider failed | component=%s", component)
+            continue
+        for key, value in _flatten(stats):
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or math.isnan(value):
+                continue
+            lines.append(f'grestok_component_stat{{component="{_escape(component)}",stat="{_escape(key)}"}} {value:g}')
+    return lines
+
+
+def _flatten(stats: Dict[str, Any], prefix: str = "") -> List[Tuple[str, Any]]:
+    items: List[Tuple[str, Any]] = []
+    for key, value in stats.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            items.extend(_flatten(value, prefix=f"{name}."))
+        else:
+            items.append((name, value))
+    return items
+
+
+def render_prometheus() -> str:
+    lines: List[str] = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    lines.extend(_render_stats())
+    return "\n".join(lines) + "\n"
@@ -1,19 +1,10 @@
-import os
-from typing import Any, Dict, List
-
-from google.cloud import firestore
+from typing import Any, Dict, List, Optional, Tuple
 
+from . import clients, profile_cache, profile_merge, recommendations, resume_store, telemetry
 from .config import get_logger
 from ..schema.user_profile import GrestokUser
 
-PROJECT_ID = (
-    os.environ.get("GOOGLE_CLOUD_PROJECT")
-    or os.environ.get("PROJECT_ID")
-    or "grestok-app-dev"
-)
-
 logger = get_logger("grestok.resume_profile")
-client = firestore.Client(project=PROJECT_ID)
 
 
 def _flatten_skill_dict(skills: Dict[str, Any]) -> List[str]:
@@ -35,6 +26,7 @@ def _normalize_user_payload(user_data: Dict[str, Any]) -> Dict[str, Any]:
 
     prefs = normalized.get("preferences")
     if isinstance(prefs, dict):
+        prefs = normalized["preferences"] = dict(prefs)
         field_of_study = prefs.get("fieldOfStudy")
         if isinstance(field_of_study, str):
             prefs["fieldOfStudy"] = {"focus": field_of_study}
@@ -43,6 +35,9 @@ def _normalize_user_payload(user_data: Dict[str, Any]) -> Dict[str, Any]:
 
     resume = normalized.get("resumeExtracted")
     if isinstance(resume, dict):
+        # The artifact reference and summary are maintained by resume_store, never taken from a patch.
+        resume = {key: value for key, value in resume.items() if key not in ("artifact", "summary")}
+        normalized["resumeExtracted"] = resume
         skills = resume.get("skills")
         if isinstance(skills, dict):
             resume["skills"] = _flatten_skill_dict(skills)
@@ -52,59 +47,17 @@ def _normalize_user_payload(user_data: Dict[str, Any]) -> Dict[str, Any]:
     return normalized
 
 
-def update_profile_from_resume(email: str, user_data: Dict[str, Any]) -> Dict[str, Any]:
+def _prepare_update(email: str, user_data: Dict[str, Any]) -> Tuple[str, GrestokUser]:
     normalized_payload = _normalize_user_payload(user_data)
     grestok_user = GrestokUser.model_validate(normalized_payload)
-    """
-    Update Firestore user profile based on the Dict object  provided.
-    Only fills in fields that are missing/empty in the existing document.
-    """
     normalized_email = (email or "").strip()
     if not normalized_email:
         raise ValueError("email is required")
+    return normalized_email, grestok_user
 
-    logger.info("Fetching Firestore user profile for email=%s", normalized_email)
-    #user_ref = client.collection("Users").document()
-    users_ref = client.collection("Users")
-    query = users_ref.where("email", "==", normalized_email).limit(1)
-    existing_docs = list(query.stream())
-
-    if not existing_docs:
-        logger.warning("No existing Firestore document found for email: %s", email)
-        return {"status": "error", "message": "User profile not found."}
-
-    existing_doc = existing_docs[0]
-    existing_data = existing_doc.to_dict() or {}
-    updated_fields: Dict[str, Any] = {}
-
-    # dump pydantic model to Firestore-shape (camelCase via alias), skip None
-    new_data = grestok_user.model_dump(by_alias=True, exclude_none=True)
-
-    def recursive_update(existing: Dict[str, Any], new: Dict[str, Any], path: str = ""):
-        for key, value in new.items():
-            current_path = f"{path}.{key}" if path else key
-
-            # if this is a nested object
-            if isinstance(value, dict):
-                if key not in existing or not isinstance(existing.get(key), dict):
-                    # whole nested object is missing, set it
-                    updated_fields[current_path] = value
-                else:
-                    # go deeper
-                    recursive_update(existing[key], value, current_path)
-
-            # for non-dicts (str, int, list, etc.)
-            else:
-                # update ONLY if field missing or "emptyish" in existing
-                if key not in existing or existing[key] in (None, "", [], {}):
-                    updated_fields[current_path] = value
-
-    recursive_update(existing_data, new_data)
 
+def _update_response(email: str, updated_fields: Dict[str, Any]) -> Dict[str, Any]:
     if updated_fields:
-        # Update the Firestore document with the new fields
-        user_ref = users_ref.document(existing_doc.id)
-        user_ref.update(updated_fields)
         logger.info(
             "Updated Firestore document for email: %s with fields: %s",
             email,
@@ -114,3 +67,80 @@ def update_profile_from_resume(email: str, user_data: Dict[str, Any]) -> Dict[st
 
     logger.info("No fields to update for email: %s", email)
     return {"status": "no_update", "message": "No fields were updated."}
+
+
+def _load_existing(
+    users_ref, normalized_email: str, field_paths: Optional[List[str]] = None
+) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Finds the user's (doc_id, data). A listener-backed cache entry is used as is; otherwise a cached
+    doc_id turns the email query into a point read, and only unknown users pay for the query. With
+    `field_paths` only those fields are read, and the partial document is not cached.
+    """
+    cached = profile_cache.get_profile(normalized_email)
+    if cached is not None and profile_cache.is_live(normalized_email):
+        return cached["doc_id"], cached["data"]
+
+    doc_id = profile_cache.get_doc_id(normalized_email)
+    if doc_id is not None:
+        with telemetry.span("firestore.profile_get"):
+            snapshot = users_ref.document(doc_id).get(field_paths=field_paths)
+        telemetry.count_firestore("get")
+        if snapshot.exists:
+            data = snapshot.to_dict() or {}
+            if field_paths is None:
+                profile_cache.remember(normalized_email, doc_id, data, snapshot.update_time)
+            return doc_id, data
+        profile_cache.invalidate(normalized_email, forget_doc_id=True)
+
+    query = users_ref.where("email", "==", normalized_email).limit(1)
+    if field_paths is not None:
+        query = query.select(field_paths)
+    with telemetry.span("firestore.profile_query"):
+        existing_docs = list(query.stream())
+    telemetry.count_firestore("query", len(existing_docs))
+    if not existing_docs:
+        return None
+    existing_doc = existing_docs[0]
+    data = existing_doc.to_dict() or {}
+    if field_paths is None:
+        profile_cache.remember(normalized_email, existing_doc.id, data, existing_doc.update_time)
+    else:
+        profile_cache.remember_doc_id(normalized_email, existing_doc.id)
+    return existing_doc.id, data
+
+
+def update_profile_from_resume(email: str, user_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Update Firestore user profile based on the Dict object  provided.
+    Only fills in fields that are missing/empty in the existing document; skills, education and work
+    experience entries are merged into the stored lists (see `profile_merge`).
+    """
+    normalized_email, grestok_user = _prepare_update(email, user_data)
+
+    logger.info("Fetching Firestore user profile for email=%s", normalized_email)
+    users_ref = clients.firestore().collection("Users")
+    mask = resume_store.read_mask(profile_merge.read_mask(grestok_user))
+    existing = _load_existing(users_ref, normalized_email, mask)
+
+    if existing is None:
+        logger.warning("No existing Firestore document found for email: %s", email)
+        return {"status": "error", "message": "User profile not found."}
+
+    doc_id, existing_data = existing
+    if resume_store.REF_PATH in mask:
+        existing_data = resume_store.hydrate(users_ref, doc_id, existing_data)
+    updated_fields = profile_merge.compute_update(existing_data, grestok_user)
+    writes, artifact = resume_store.plan_writes(existing_data, updated_fields)
+    if artifact is not None:
+        resume_store.save(users_ref, doc_id, artifact)
+
+    if writes:
+        # Update the Firestore document with the new fields
+        with telemetry.span("firestore.profile_update", fields=len(writes)):
+            write_result = users_ref.document(doc_id).update(writes)
+        telemetry.count_firestore("update")
+        profile_cache.apply_update(normalized_email, writes, write_result.update_time)
+        if recommendations.affected(list(writes)):
+            recommendations.schedule(normalized_email, doc_id)
+    return _update_response(email, updated_fields)
@@ -0,0 +1,83 @@
+"""
+ADK callbacks that feed `tools.telemetry`: one span per agent run, per LLM call and per tool call, plus
+LLM token usage and tool argument/response sizes. Spans are opened in a `before_*` callback and closed in the
+matching `after_*` one, keyed by invocation, agent and call id.
+"""
+
+from typing import Any, Dict, Optional
+
+from .tools import telemetry
+from .tools.cache import TTLCache
+
+# Open spans whose `after_*` callback never ran (errors, cancelled runs) age out instead of accumulating.
+_open_spans = TTLCache(4096, 600, name="open_spans")
+
+
+def _invocation(callback_context) -> str:
+    return getattr(callback_context, "invocation_id", "") or ""
+
+
+def before_agent(callback_context) -> None:
+    key = ("agent", _invocation(callback_context), callback_context.agent_name)
+    _open_spans.set(key, telemetry.start_span(f"agent.{callback_context.agent_name}"))
+    return None
+
+
+def after_agent(callback_context) -> None:
+    span = _open_spans.pop(("agent", _invocation(callback_context), callback_context.agent_name))
+    if span is not None:
+        span.end()
+    return None
+
+
+def before_model(callback_context, llm_request) -> None:
+    key = ("llm", _invocation(callback_context), callback_context.agent_name)
+    _open_spans.set(
+        key,
+        telemetry.start_span(
+            "llm.generate",
+            agent=callback_context.agent_name,
+            model=getattr(llm_request, "model", None),
+            contents=len(llm_request.contents or []),
+        ),
+    )
+    return None
+
+
+def after_model(callback_context, llm_response) -> None:
+    agent = callback_context.agent_name
+    if getattr(llm_response, "partial", False):
+        return None  # streamed chunk; the turn ends with the final (non-partial) response
+    span = _open_spans.pop(("llm", _invocation(callback_context), agent))
+    usage = getattr(llm_response, "usage_metadata", None)
+    if usage is not None:
+        prompt_tokens = getattr(usage, "prompt_token_count", None) or 0
+        output_tokens = getattr(usage, "candidates_token_count", None) or 0
+        telemetry.LLM_TOKENS.inc(prompt_tokens, agent=agent, kind="prompt")
+        telemetry.LLM_TOKENS.inc(output_tokens, agent=agent, kind="output")
+        if span is not None:
+            span.set("prompt_tokens", prompt_tokens)
+            span.set("output_tokens", output_tokens)
+    if span is not None:
+        span.end()
+    return None
+
+
+def _tool_key(tool, tool_context) -> tuple:
+    return ("tool", _invocation(tool_context), getattr(tool_context, "function_call_id", None), tool.name)
+
+
+def before_tool(tool, args: Dict[str, Any], tool_context) -> None:
+    size = telemetry.observe_payload(tool.name, "args", args)
+    _open_spans.set(_tool_key(tool, tool_context), telemetry.start_span(f"tool.{tool.name}", args_bytes=size))
+    return None
+
+
+def after_tool(tool, args: Dict[str, Any], tool_context, tool_response: Any) -> Optional[Dict[str, Any]]:
+    span = _open_spans.pop(_tool_key(tool, tool_context))
+    size = telemetry.observe_payload(tool.name, "response", tool_response)
+    if span is not None:
+        span.set("response_bytes", size)
+        span.end()
+    return None
+
@@ -1,16 +1,22 @@
 import asyncio
+import hashlib
+import importlib
 import json
 import logging
 import os
+import time
 from functools import wraps
-from typing import Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+_import_started = time.perf_counter()  # app import time (FastAPI, ADK, agents, tools) is reported on /metrics
 
 import firebase_admin
-from fastapi import FastAPI, HTTPException, Request, status
+from fastapi import FastAPI, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from firebase_admin import auth as firebase_auth, credentials
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
 from google.genai.types import Content, Part
 from pydantic import BaseModel, Field
 
@@ -18,6 +24,25 @@ import sys
 
 sys.path.append("../")
 from campus_connect.agent import root_agent as campus_connect_agent  # noqa: E402
+from campus_connect.history import compaction_stats  # noqa: E402
+from campus_connect.schema.user_profile import GrestokUser, ShortlistItem  # noqa: E402
+from campus_connect.tools import (  # noqa: E402
+    async_tools,
+    clients,
+    get_bq_courses,
+    profile_cache,
+    profile_format,
+    recommendations,
+    resume_extraction,
+    resume_store,
+    telemetry,
+)
+from campus_connect.tools.projection import parse_fields, project  # noqa: E402
+from campus_connect.tools.result_format import HIT_FIELDS, format_hits  # noqa: E402
+from campus_connect.tools.config import get_logger  # noqa: E402
+from campus_connect_runner.session_store import SessionLocks, StoredSessionService, build_session_service  # noqa: E402
+from campus_connect_runner.streaming import adk_event_to_messages, stream_agent_events  # noqa: E402
+from campus_connect_runner.token_cache import token_cache  # noqa: E402
 
 from dotenv import load_dotenv
 
@@ -30,6 +55,10 @@ EMAIL_INJECTION_PREFIX = os.getenv(
     "The authenticated user's email is",
 )
 CORS_ALLOWED_ORIGINS = os.getenv("CORS_ALLOWED_ORIGINS", "http://localhost:3000")
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "10"))
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "64"))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")  # when set, /metrics requires "Authorization: Bearer <token>"
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "1").strip().lower() not in ("0", "false", "no")
 
 app = FastAPI(title="Campus Connect Agent Runner")
 
@@ -48,19 +77,27 @@ if allowed_origins:
         allow_credentials=True,
     )
 
-# Setup module logging.
-logger = logging.getLogger("campus_connect_agent")
-logger.setLevel(logging.DEBUG)
-logger.propagate = False
-handler = logging.StreamHandler()
-formatter = logging.Formatter("%(levelname)s:%(name)s:%(message)s")
-handler.setFormatter(formatter)
-if not logger.handlers:
-    logger.addHandler(handler)
+# Setup module logging (shared off-loop queue with the grestok.* tool loggers; LOG_LEVEL=DEBUG for event dumps).
+logger = get_logger("campus_connect_agent")
+
+telemetry.register_stats("query_embeddings", get_bq_courses.embedding_cache_stats)
+telemetry.register_stats("result_windows", get_bq_courses.result_window_stats)
+telemetry.register_stats("search_totals", get_bq_courses.totals_cache_stats)
+telemetry.register_stats("profile_cache", profile_cache.stats)
+telemetry.register_stats("resume_extractions", resume_extraction.cache_stats)
+telemetry.register_stats("resume_artifacts", resume_store.cache_stats)
+telemetry.register_stats("recommendations", recommendations.stats)
+telemetry.register_stats("history_compaction", compaction_stats)
+telemetry.register_stats("startup", lambda: dict(startup_timings))
+if token_cache is not None:
+    telemetry.register_stats("verified_tokens", token_cache.stats)
 
 runner: Optional[Runner] = None
-session_service: Optional[InMemorySessionService] = None
-session_lock = asyncio.Lock()
+session_service: Optional[StoredSessionService] = None
+session_locks = SessionLocks()
+firebase_ready = False
+resume_workers_warmer: Optional[asyncio.Task] = None
+startup_timings: Dict[str, float] = {}
 
 
 class AuthenticatedUser(BaseModel):
@@ -81,9 +118,37 @@ class ChatResponse(BaseModel):
     response: str
 
 
+class ProfileResponse(BaseModel):
+    email: str
+    doc_id: str
+    updated_at: Optional[str] = None
+    profile: Dict[str, Any]
+
+
+class ShortlistResponse(BaseModel):
+    email: str
+    doc_id: str
+    items: List[Dict[str, Any]]
+
+
+class RecommendationsResponse(BaseModel):
+    email: str
+    doc_id: str
+    status: str
+    pending: bool
+    computed_at: Optional[str] = None
+    filters: Optional[Dict[str, Any]] = None
+    source: Optional[str] = None
+    items: List[Dict[str, Any]]
+
+
 def initialize_firebase_app() -> None:
     """Initializes the Firebase Admin SDK if it is not already initialized."""
+    global firebase_ready
+    if firebase_ready:
+        return
     if firebase_admin._apps:  # type: ignore[attr-defined]
+        firebase_ready = True
         return
 
     service_account_json = os.getenv("FIREBASE_SERVICE_ACCOUNT_JSON")
@@ -101,6 +166,7 @@ def initialize_firebase_app() -> None:
         firebase_admin.initialize_app()
     else:
         firebase_admin.initialize_app(cred)
+    firebase_ready = True
 
 
 def authorize(endpoint_function):
@@ -109,7 +175,8 @@ def authorize(endpoint_function):
     @wraps(endpoint_function)
     async def wrapper(*args, **kwargs):
         # Ensure Firebase is ready even if startup hook has not run yet.
-        initialize_firebase_app()
+        if not firebase_ready:
+            initialize_firebase_app()
 
         request: Optional[Request] = kwargs.get("request")
         if request is None:
@@ -138,7 +205,11 @@ def authorize(endpoint_function):
             )
 
         try:
-            decoded_token = firebase_auth.verify_id_token(token)
+            with telemetry.span("auth.verify"):
+                if token_cache is not None:
+                    decoded_token = await token_cache.verify(token)
+                else:
+                    decoded_token = await asyncio.to_thread(firebase_auth.verify_id_token, token)
         except firebase_auth.ExpiredIdTokenError as exc:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -188,7 +259,8 @@ async def ensure_runner_ready() -> None:
     if runner is not None and session_service is not None:
         return
 
-    session_service = InMemorySessionService()
+    session_service = build_session_service()
+    telemetry.register_stats("sessions", session_service.stats)
     runner = Runner(
         agent=campus_connect_agent,
         app_name=APP_NAME,
@@ -205,7 +277,18 @@ async def ensure_session(user_id: str, session_id: str) -> None:
             detail="Session service unavailable",
         )
 
-    async with session_lock:
+    with telemetry.span("session.ensure"):
+        await _ensure_session(user_id, session_id)
+
+
+async def _ensure_session(user_id: str, session_id: str) -> None:
+    if await session_service.has_session(app_name=APP_NAME, user_id=user_id, session_id=session_id):
+        return
+
+    # Only concurrent first turns of the same session serialize here; other sessions use other stripes.
+    async with session_locks.for_session(user_id, session_id):
+        if await session_service.has_session(app_name=APP_NAME, user_id=user_id, session_id=session_id):
+            return
         try:
             await session_service.create_session(
                 app_name=APP_NAME,
@@ -234,6 +317,10 @@ async def ensure_session(user_id: str, session_id: str) -> None:
 
 
 def pretty_print_event(event) -> None:
+    # Runs for every streamed event; skip all of it unless DEBUG is on. Payloads are sampled and
+    # serialized by the logging thread, not here.
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
     logger.debug("Event author=%s final=%s", event.author, event.is_final_response())
     if not event.content or not event.content.parts:
         return
@@ -243,17 +330,44 @@ def pretty_print_event(event) -> None:
         elif part.function_call:
             func_call = part.function_call
             logger.debug(
-                "  ==> func_call: %s args=%s", func_call.name, func_call.args
+                "  ==> func_call: %s", func_call.name, extra={"payload": func_call.args}
             )
         elif part.function_response:
             func_response = part.function_response
             logger.debug(
-                "  ==> func_response: %s response=%s",
+                "  ==> func_response: %s",
                 func_response.name,
-                func_response.response,
+                extra={"payload": func_response.response},
             )
 
 
+def build_user_content(user: AuthenticatedUser, message: str) -> Content:
+    return Content(
+        role="user",
+        parts=[
+            Part(
+                text=f"{message}\n\n{EMAIL_INJECTION_PREFIX} {user.email}",
+            )
+        ],
+    )
+
+
+def final_response_text(event) -> str:
+    """Text of a final ADK event (or the escalation notice when the agent escalated)."""
+    if event.content and event.content.parts:
+        return "".join(part.text or "" for part in event.content.parts).strip()
+    if event.actions and event.actions.escalate:
+        return f"Agent escalated: {event.error_message or 'No specific message.'}"
+    return ""
+
+
+async def _run_turn(user_id: str, session_id: str, **kwargs: Any):
+    """runner.run_async, with the session kept resident in memory until the turn ends."""
+    with session_service.in_use(APP_NAME, user_id, session_id):
+        async for event in runner.run_async(user_id=user_id, session_id=session_id, **kwargs):
+            yield event
+
+
 async def invoke_agent(
     user: AuthenticatedUser, session_id: str, message: str
 ) -> str:
@@ -265,33 +379,17 @@ async def invoke_agent(
 
     await ensure_session(user_id=user.uid, session_id=session_id)
 
-    content = Content(
-        role="user",
-        parts=[
-            Part(
-                text=f"{message}\n\n{EMAIL_INJECTION_PREFIX} {user.email}",
-            )
-        ],
-    )
+    content = build_user_content(user, message)
 
     response_text = ""
-    async for event in runner.run_async(
-        user_id=user.uid,
-        session_id=session_id,
-        new_message=content,
-    ):
-        pretty_print_event(event)
+    with telemetry.span("runner.turn"):
+        # Drain the run rather than breaking out at the final response, so ADK still runs its after-agent
+        # callbacks and closes its spans in this context.
+        async for event in _run_turn(user.uid, session_id, new_message=content):
+            pretty_print_event(event)
 
-        if event.is_final_response():
-            if event.content and event.content.parts:
-                response_text = "".join(
-                    part.text or "" for part in event.content.parts
-                ).strip()
-            elif event.actions and event.actions.escalate:
-                response_text = (
-                    f"Agent escalated: {event.error_message or 'No specific message.'}"
-                )
-            break
+            if event.is_final_response() and not response_text:
+                response_text = final_response_text(event)
 
     if not response_text:
         raise HTTPException(
@@ -302,11 +400,105 @@ async def invoke_agent(
     return response_text
 
 
+# ADK imports these on the first run_async call (agent routing, workflow nodes, auth preprocessing).
+# Importing them during warm-up keeps that cost off the first request; missing ones are skipped.
+_LAZY_ADK_MODULES = (
+    "google.adk.workflow._workflow",
+    "google.adk.workflow._dynamic_node_scheduler",
+    "google.adk.workflow._llm_agent_wrapper",
+    "google.adk.auth.auth_preprocessor",
+    "google.adk.auth.oauth2_credential_util",
+    "google.adk.a2a.agent",
+)
+
+
+def _import_lazy_adk_modules() -> None:
+    for module in _LAZY_ADK_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            logger.debug("Warm-up import skipped | module=%s", module)
+
+
+async def _warm_step(name: str, step: Awaitable[Any], required: bool = False) -> None:
+    started = time.perf_counter()
+    try:
+        await step
+    except Exception:
+        if required:
+            raise
+        logger.warning("Warm-up step failed | step=%s", name, exc_info=True)
+    finally:
+        startup_timings[f"warm_up.{name}_ms"] = round((time.perf_counter() - started) * 1000.0, 1)
+
+
+async def warm_up() -> None:
+    """
+    Primes Firebase, the shared GCP clients (credentials, token, gRPC channel), the ADK runner and ADK's
+    lazily imported modules in parallel so the first request does not pay for them. Client failures are
+    logged; the tools retry lazily.
+    """
+    started = time.perf_counter()
+    await asyncio.gather(
+        _warm_step("firebase", asyncio.to_thread(initialize_firebase_app), required=True),
+        _warm_step("runner", ensure_runner_ready(), required=True),
+        _warm_step("adk_imports", asyncio.to_thread(_import_lazy_adk_modules)),
+        _warm_step("bigquery", asyncio.to_thread(clients.warm_up, "bigquery")),
+        _warm_step("firestore", asyncio.to_thread(clients.warm_up, "firestore")),
+        _warm_step("firestore_async", asyncio.to_thread(clients.warm_up, "firestore_async")),
+    )
+    startup_timings["warm_up_ms"] = round((time.perf_counter() - started) * 1000.0, 1)
+
+
 @app.on_event("startup")
 async def on_startup() -> None:
-    initialize_firebase_app()
-    await ensure_runner_ready()
-    logger.info("Grestok Agent Runner ready")
+    global resume_workers_warmer
+    if STARTUP_WARMUP:
+        await warm_up()
+        # Each worker process imports the package (seconds), so they start without delaying readiness.
+        resume_workers_warmer = asyncio.create_task(
+            _warm_step("resume_workers", asyncio.to_thread(resume_extraction.warm_up))
+        )
+    else:
+        initialize_firebase_app()
+        await ensure_runner_ready()
+    logger.info(
+        "Grestok Agent Runner ready | import_ms=%.0f warm_up_ms=%.0f clients=%s",
+        startup_timings["import_ms"],
+        startup_timings.get("warm_up_ms", 0.0),
+        sorted(clients.created()),
+    )
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    if session_service is not None:
+        await session_service.close()
+    resume_extraction.shutdown()
+    recommendations.shutdown()
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        elapsed = time.perf_counter() - started
+        telemetry.HTTP_SECONDS.observe(elapsed, route=route, method=request.method, status=status_code)
+        if "first_request_ms" not in startup_timings and route != "/metrics":
+            startup_timings["first_request_ms"] = round(elapsed * 1000.0, 1)
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics(request: Request) -> PlainTextResponse:
+    if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
+    return PlainTextResponse(telemetry.render_prometheus(), media_type="text/plain; version=0.0.4")
 
 
 @app.post(
@@ -334,6 +526,228 @@ async def grestok_agent_endpoint(payload: ChatRequest, request: Request) -> Chat
     return ChatResponse(session_id=session_id, response=agent_response)
 
 
+@app.post(
+    "/grestok-agent/stream",
+    summary="Stream a chat turn from the Grestok Campus Connect root agent as server-sent events",
+)
+@authorize
+async def grestok_agent_stream_endpoint(payload: ChatRequest, request: Request) -> StreamingResponse:
+    """
+    Same turn as `/grestok-agent/`, streamed as SSE: `start`, then `delta` (partial text),
+    `tool_call` / `tool_result` progress, and one `final` (or `error`). Comment lines keep idle
+    connections alive; disconnecting cancels the agent run.
+    """
+    await ensure_runner_ready()
+
+    auth_user: Optional[AuthenticatedUser] = getattr(request.state, "user", None)
+    if auth_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Unauthorized",
+        )
+
+    session_id = payload.session_id or f"{DEFAULT_SESSION_PREFIX}-{auth_user.uid}"
+    await ensure_session(user_id=auth_user.uid, session_id=session_id)
+
+    events = _run_turn(
+        auth_user.uid,
+        session_id,
+        new_message=build_user_content(auth_user, payload.message),
+        run_config=RunConfig(streaming_mode=StreamingMode.SSE),
+    )
+
+    def to_messages(event):
+        pretty_print_event(event)
+        messages = adk_event_to_messages(event)
+        if event.is_final_response():
+            text = final_response_text(event)
+            if text:
+                messages.append({"type": "final", "session_id": session_id, "text": text})
+            else:
+                messages.append({"type": "error", "detail": "Agent returned an empty response"})
+        return messages
+
+    return StreamingResponse(
+        stream_agent_events(
+            request,
+            events,
+            to_messages,
+            heartbeat_seconds=STREAM_HEARTBEAT_SECONDS,
+            queue_size=STREAM_QUEUE_SIZE,
+            first_message={"type": "start", "session_id": session_id},
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+_PROFILE_FIELDS = {field.alias or name for name, field in GrestokUser.model_fields.items()}
+
+
+def _requested_fields(fields: Optional[str], allowed: Optional[set] = None) -> Optional[List[str]]:
+    paths = parse_fields(fields)
+    if paths and allowed is not None:
+        unknown = sorted({path.split(".", 1)[0] for path in paths} - allowed)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}",
+            )
+    return paths
+
+
+def _etag(*parts: Any) -> str:
+    digest = hashlib.blake2b("|".join(str(part) for part in parts).encode("utf-8"), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def _version(update_time: Any, data: Any) -> str:
+    """Document version for ETags: the Firestore update time, or a content hash when there is none."""
+    if update_time is not None:
+        return update_time.isoformat() if hasattr(update_time, "isoformat") else str(update_time)
+    return hashlib.blake2b(json.dumps(data, sort_keys=True, default=str).encode("utf-8"), digest_size=12).hexdigest()
+
+
+async def _conditional_json(request: Request, etag: str, build: Callable[[], Any]) -> Response:
+    """
+    304 when If-None-Match already names `etag` (nothing is loaded or serialized); otherwise the JSON body
+    from `build`, which may be a coroutine function.
+    """
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match:
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if etag in candidates or "*" in candidates:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    body = build()
+    if asyncio.iscoroutine(body):
+        body = await body
+    return JSONResponse(body, headers=headers)
+
+
+async def _load_user_document(user: AuthenticatedUser):
+    with telemetry.span("api.profile_load"):
+        document = await async_tools.load_user_document(user.email)
+    if document is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User profile not found",
+        )
+    return document
+
+
+@app.get(
+    "/profile",
+    response_model=ProfileResponse,
+    summary="The signed-in user's GrestokUser profile, read directly from Firestore",
+)
+@authorize
+async def profile_endpoint(request: Request, fields: Optional[str] = None, view: Optional[str] = None) -> Response:
+    """
+    `fields` is a comma-separated list of dotted profile paths (e.g. `preferences,academicProfile.cgpa`);
+    `view` names a preset projection instead ("full", the default, "standard" without the resume's raw
+    text, or "preferences_academics"). Responses carry an ETag derived from the document's update time;
+    send it back in If-None-Match to get a bodyless 304 while the profile is unchanged.
+    """
+    paths = _requested_fields(fields, _PROFILE_FIELDS)
+    try:
+        view = profile_format.resolve_view(view or "full")
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    user: AuthenticatedUser = request.state.user
+    doc_id, data, update_time = await _load_user_document(user)
+    version = _version(update_time, data)
+
+    async def build() -> Dict[str, Any]:
+        profile = data
+        if resume_store.wants_artifact(view, paths):
+            profile = await resume_store.hydrate_async(clients.firestore_async().collection("Users"), doc_id, data)
+        return {
+            "email": user.email,
+            "doc_id": doc_id,
+            "updated_at": version if update_time is not None else None,
+            "profile": profile_format.dump_profile(profile, view, paths, mode="json"),
+        }
+
+    return await _conditional_json(request, _etag("profile", doc_id, version, paths, view), build)
+
+
+@app.get(
+    "/profile/shortlist",
+    response_model=ShortlistResponse,
+    summary="Programs the signed-in user saved to their shortlist, newest first",
+)
+@authorize
+async def shortlist_endpoint(request: Request, fields: Optional[str] = None) -> Response:
+    """
+    `fields` projects each item (e.g. `name,schoolName,tuition`); `id` is always included. The ETag
+    changes whenever an item is added, removed or updated.
+    """
+    paths = _requested_fields(fields)
+    user: AuthenticatedUser = request.state.user
+    # Only the doc id is needed here; it is cached long-term, so usually this is a single query.
+    doc_id = profile_cache.get_doc_id(user.email) or (await _load_user_document(user))[0]
+    with telemetry.span("api.shortlist_load"):
+        items = await async_tools.load_shortlist(doc_id)
+    versions = sorted((item_id, _version(update_time, data)) for item_id, data, update_time in items)
+
+    def build() -> Dict[str, Any]:
+        shaped = []
+        for item_id, data, _ in items:
+            item = ShortlistItem.model_validate(data)
+            saved_at = item.saved_at.timestamp() if item.saved_at is not None else 0.0
+            body = project(item.model_dump(by_alias=True, exclude_none=True, mode="json"), paths)
+            shaped.append((saved_at, {"id": item_id, **body}))
+        shaped.sort(key=lambda pair: pair[0], reverse=True)
+        return {"email": user.email, "doc_id": doc_id, "items": [body for _, body in shaped]}
+
+    return await _conditional_json(request, _etag("shortlist", doc_id, versions, paths), build)
+
+
+@app.get(
+    "/profile/recommendations",
+    response_model=RecommendationsResponse,
+    summary="Programs precomputed for the signed-in user from their profile, best match first",
+)
+@authorize
+async def recommendations_endpoint(
+    request: Request, fields: Optional[str] = None, limit: Optional[int] = Query(None, ge=1)
+) -> Response:
+    """
+    `fields` projects each item onto search hit fields (e.g. `name,school_name,tuition`); `limit` caps
+    the number of items. `status` is "fresh", "stale" (the profile changed since they were computed) or
+    "missing"; stale or missing results queue a background refresh and `pending` reports it. The ETag
+    changes when the results are recomputed, go stale or stop being pending.
+    """
+    paths = _requested_fields(fields, set(HIT_FIELDS))
+    user: AuthenticatedUser = request.state.user
+    doc_id, data, _ = await _load_user_document(user)
+    with telemetry.span("api.recommendations_load"):
+        document = await recommendations.load_async(doc_id, recommendations.fingerprint(data))
+    # Described before the ETag check so a stale result is refreshed even when the client gets a 304.
+    described = recommendations.describe(user.email, doc_id, data, document)
+    version = (document or {}).get("fingerprint"), described["computed_at"]
+
+    def build() -> Dict[str, Any]:
+        items = described["items"][:limit] if limit is not None else described["items"]
+        return {
+            "email": user.email,
+            "doc_id": doc_id,
+            "status": described["status"],
+            "pending": described["pending"],
+            "computed_at": described["computed_at"],
+            "filters": described["filters"],
+            "source": described["source"],
+            "items": format_hits(items, "records", paths)["hits"],
+        }
+
+    etag = _etag("recommendations", doc_id, version, described["status"], described["pending"], paths, limit)
+    return await _conditional_json(request, etag, build)
+
+
+startup_timings["import_ms"] = round((time.perf_counter() - _import_started) * 1000.0, 1)
+
+
 if __name__ == "__main__":
     import uvicorn
 
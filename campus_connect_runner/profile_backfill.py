@@ -0,0 +1,344 @@
+"""
+Backfill job that brings every `/Users` document in line with the current GrestokUser schema and the
+`_normalize_user_payload` rules (skill flattening, fieldOfStudy coercion, type coercion), and with
+--migrate-resumes moves inline resume text, work experience and education into resume artifacts.
+
+    python -m campus_connect_runner.profile_backfill --dry-run --report backfill-report.json
+    python -m campus_connect_runner.profile_backfill --checkpoint backfill.json --max-ops-per-second 300
+    FIRESTORE_EMULATOR_HOST=localhost:8081 python -m campus_connect_runner.profile_backfill --project demo-grestok
+
+The collection is read in pages ordered by document id, with the next page fetched while a process pool
+normalizes and validates the current one. A changed document gets a single update holding only the field
+paths that differ, guarded by the update time it was read at: a profile edited during the run is skipped
+and counted as a conflict instead of being overwritten, and the next run picks it up. A resume artifact
+is written before the update that references it and deleted again when that update does not land. Writes
+go through a BulkWriter, which ramps up to --max-ops-per-second; --max-docs-per-second also paces the
+reads. Once a page is flushed the checkpoint file records the last document id and running totals, so an
+interrupted run resumes where it stopped (--restart ignores an existing checkpoint). --dry-run writes nothing and
+reports what would change: totals, how often each field path changes, sample diffs and invalid documents.
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.cloud.firestore import DELETE_FIELD
+from google.cloud.firestore_v1.bulk_writer import BulkWriterOptions
+from pydantic import ValidationError
+
+from campus_connect.schema.user_profile import GrestokUser
+from campus_connect.tools import clients, profile_merge, resume_store
+from campus_connect.tools.config import get_logger
+from campus_connect.tools.update_profile_from_resume import _normalize_user_payload
+
+BACKFILL_PAGE_SIZE = int(os.environ.get("BACKFILL_PAGE_SIZE", "500"))
+BACKFILL_MAX_ATTEMPTS = int(os.environ.get("BACKFILL_MAX_ATTEMPTS", "5"))   # per write, transient errors only
+SAMPLE_LIMIT = 20
+ERROR_LIMIT = 200
+PREVIEW_CHARS = 200
+
+# gRPC status codes of writes whose precondition no longer holds: the document changed or was deleted.
+_CONFLICT_CODES = {5, 9}   # NOT_FOUND, FAILED_PRECONDITION
+
+logger = get_logger("grestok.backfill")
+
+
+def normalize_document(data: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """(field path updates that normalize `data`, None) or (None, why it does not validate)."""
+    try:
+        user = GrestokUser.model_validate(_normalize_user_payload(data))
+    except (ValidationError, ValueError) as exc:
+        return None, str(exc)
+    return profile_merge.diff(data, profile_merge.dump(user)), None
+
+
+def _normalize_chunk(items: List[Tuple[str, Dict[str, Any]]]) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+    """Worker entry point: one result per (doc_id, data), in order."""
+    return [normalize_document(data) for _, data in items]
+
+
+def _preview(value: Any) -> str:
+    if value is DELETE_FIELD:
+        return "<delete>"
+    text = json.dumps(value, ensure_ascii=False, default=str)
+    return text if len(text) <= PREVIEW_CHARS else f"{text[:PREVIEW_CHARS]}..."
+
+
+class Backfill:
+    """One run over a collection; `state()` is both the checkpoint and the report."""
+
+    def __init__(self, client: Any, args: argparse.Namespace):
+        self.client = client
+        self.args = args
+        self.users_ref = client.collection(args.collection)
+        self.totals = dict.fromkeys(
+            ("scanned", "unchanged", "changed", "invalid", "written", "artifacts", "conflicts", "failed"), 0
+        )
+        self.field_paths: Dict[str, int] = {}
+        self.samples: List[Dict[str, Any]] = []
+        self.errors: List[Dict[str, str]] = []
+        self.last_doc_id: Optional[str] = None
+        self.pages = 0
+        self.done = False
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()   # BulkWriter callbacks run on its worker threads
+        self._artifact_refs: Dict[str, Any] = {}   # profile path -> artifact written for its pending update
+        self._orphans: List[Any] = []              # artifacts whose profile update did not land
+        self._deleting: set = set()                # paths of orphans being deleted
+
+    # ---- checkpoint / report ----
+
+    def _settings(self) -> Dict[str, Any]:
+        return {
+            "collection": self.args.collection,
+            "dry_run": self.args.dry_run,
+            "migrate_resumes": self.args.migrate_resumes,
+        }
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            **self._settings(),
+            "last_doc_id": self.last_doc_id,
+            "pages": self.pages,
+            "done": self.done,
+            "totals": dict(self.totals),
+            "field_paths": dict(sorted(self.field_paths.items(), key=lambda item: -item[1])),
+            "samples": self.samples,
+            "errors": self.errors,
+        }
+
+    def resume_from(self, state: Dict[str, Any]) -> None:
+        if {key: state.get(key) for key in self._settings()} != self._settings():
+            raise SystemExit(
+                f"checkpoint was written by a run with {({key: state.get(key) for key in self._settings()})}; "
+                "pass the same options or --restart"
+            )
+        self.last_doc_id = state.get("last_doc_id")
+        self.pages = state.get("pages", 0)
+        self.done = state.get("done", False)
+        self.totals.update(state.get("totals") or {})
+        self.field_paths = dict(state.get("field_paths") or {})
+        self.samples = list(state.get("samples") or [])
+        self.errors = list(state.get("errors") or [])
+
+    @staticmethod
+    def write_json(path: str, state: Dict[str, Any]) -> None:
+        # Written next to the target and renamed, so a crash never leaves a truncated checkpoint.
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(state, handle, ensure_ascii=False, indent=2, default=str)
+        os.replace(tmp_path, path)
+
+    def _error(self, doc_id: str, message: str) -> None:
+        if len(self.errors) < ERROR_LIMIT:
+            self.errors.append({"doc_id": doc_id, "error": message[:1000]})
+
+    # ---- BulkWriter callbacks ----
+
+    def _on_write_result(self, reference: Any, result: Any, writer: Any) -> None:
+        with self._lock:
+            if reference.path in self._deleting:
+                self._deleting.discard(reference.path)
+                self.totals["artifacts"] -= 1
+                return
+            self._artifact_refs.pop(reference.path, None)
+            artifact = resume_store.RESUME_COLLECTION in reference.path.split("/")[:-1]
+            self.totals["artifacts" if artifact else "written"] += 1
+
+    def _on_write_error(self, failure: Any, writer: Any) -> bool:
+        reference = failure.operation.reference
+        with self._lock:
+            if failure.code in _CONFLICT_CODES:
+                self.totals["conflicts"] += 1
+            elif failure.attempts < BACKFILL_MAX_ATTEMPTS:
+                return True
+            else:
+                self.totals["failed"] += 1
+                self._error(reference.id, f"write failed after {failure.attempts} attempts: {failure.message}")
+            artifact_ref = self._artifact_refs.pop(reference.path, None)
+            if artifact_ref is not None:
+                self._orphans.append(artifact_ref)
+            return False
+
+    # ---- the run ----
+
+    def _fetch(self, after: Optional[str]) -> List[Any]:
+        query = self.users_ref.order_by("__name__").limit(self.args.page_size)
+        if after is not None:
+            query = query.start_after({"__name__": after})
+        return list(query.stream())
+
+    def _normalize(self, items: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        if self._pool is None:
+            return _normalize_chunk(items)
+        size = math.ceil(len(items) / self.args.workers)
+        chunks = [items[start:start + size] for start in range(0, len(items), size)]
+        futures = [self._pool.submit(_normalize_chunk, chunk) for chunk in chunks]
+        results: List[Any] = []
+        for chunk, future in zip(chunks, futures):
+            try:
+                results.extend(future.result())
+            except BrokenProcessPool:
+                if self._pool is not None:
+                    logger.warning("Worker pool died; normalizing in-process from here on", exc_info=True)
+                    self._pool.shutdown(wait=False, cancel_futures=True)
+                    self._pool = None
+                results.extend(_normalize_chunk(chunk))
+            except Exception:
+                # e.g. a value that does not pickle (a DocumentReference field); normalize it here instead.
+                logger.warning("Worker could not normalize a chunk; retrying in-process", exc_info=True)
+                results.extend(_normalize_chunk(chunk))
+        return results
+
+    def _apply(self, snapshots: List[Any], items: List[Tuple[str, Dict[str, Any]]], results: List[Any], writer: Any) -> None:
+        artifacts = []
+        updates = []
+        for snapshot, (doc_id, data), (fields, error) in zip(snapshots, items, results):
+            self.totals["scanned"] += 1
+            if error is not None:
+                self.totals["invalid"] += 1
+                self._error(doc_id, error)
+                continue
+            artifact = None
+            if self.args.migrate_resumes:
+                fields, artifact = resume_store.plan_writes(data, fields, migrate=True)
+            if not fields:
+                self.totals["unchanged"] += 1
+                continue
+            self.totals["changed"] += 1
+            for path in fields:
+                self.field_paths[path] = self.field_paths.get(path, 0) + 1
+            if len(self.samples) < SAMPLE_LIMIT:
+                self.samples.append({"doc_id": doc_id, "updates": {path: _preview(v) for path, v in fields.items()}})
+            if artifact is not None:
+                artifacts.append((doc_id, artifact))
+            updates.append((snapshot, fields))
+
+        if writer is None:
+            return
+        if artifacts:
+            # Artifacts land before the references to them.
+            for doc_id, (artifact_id, document, _) in artifacts:
+                ref = self.users_ref.document(doc_id).collection(resume_store.RESUME_COLLECTION).document(artifact_id)
+                self._artifact_refs[self.users_ref.document(doc_id).path] = ref
+                writer.set(ref, document)
+            writer.flush()
+        for snapshot, fields in updates:
+            writer.update(snapshot.reference, fields, option=self.client.write_option(last_update_time=snapshot.update_time))
+        writer.flush()
+
+        # A conflicted or failed update leaves its artifact unreferenced; the next run writes a new one.
+        with self._lock:
+            orphans, self._orphans = self._orphans, []
+            self._artifact_refs.clear()
+            self._deleting.update(ref.path for ref in orphans)
+        if orphans:
+            for ref in orphans:
+                writer.delete(ref)
+            writer.flush()
+
+    def run(self) -> None:
+        if self.done:
+            logger.info("Checkpoint says this backfill already finished; pass --restart to run it again")
+            return
+        writer = None
+        if not self.args.dry_run:
+            writer = self.client.bulk_writer(options=BulkWriterOptions(
+                initial_ops_per_second=min(500, self.args.max_ops_per_second),
+                max_ops_per_second=self.args.max_ops_per_second,
+            ))
+            writer.on_write_result(self._on_write_result)
+            writer.on_write_error(self._on_write_error)
+        if self.args.workers > 1:
+            self._pool = ProcessPoolExecutor(max_workers=self.args.workers, mp_context=multiprocessing.get_context("spawn"))
+        reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="backfill-read")
+
+        started = time.monotonic()
+        scanned_at_start = self.totals["scanned"]
+        try:
+            page = self._fetch(self.last_doc_id)
+            while page:
+                upcoming = reader.submit(self._fetch, page[-1].id) if len(page) == self.args.page_size else None
+                items = [(snapshot.id, snapshot.to_dict() or {}) for snapshot in page]
+                self._apply(page, items, self._normalize(items), writer)
+                self.last_doc_id = page[-1].id
+                self.pages += 1
+                if self.args.checkpoint:
+                    self.write_json(self.args.checkpoint, self.state())
+
+                elapsed = time.monotonic() - started
+                scanned = self.totals["scanned"] - scanned_at_start
+                logger.info(
+                    "Backfill page %d | scanned=%d changed=%d written=%d conflicts=%d invalid=%d | %.0f docs/s",
+                    self.pages, self.totals["scanned"], self.totals["changed"], self.totals["written"],
+                    self.totals["conflicts"], self.totals["invalid"], scanned / elapsed if elapsed else 0.0,
+                )
+                if self.args.limit and scanned >= self.args.limit:
+                    break
+                if self.args.max_docs_per_second:
+                    time.sleep(max(0.0, scanned / self.args.max_docs_per_second - elapsed))
+                page = upcoming.result() if upcoming is not None else []
+            else:
+                self.done = True
+        finally:
+            reader.shutdown(wait=False, cancel_futures=True)
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+            if writer is not None:
+                writer.close()
+        if self.args.checkpoint:
+            self.write_json(self.args.checkpoint, self.state())
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--project", help="Firestore project (default: GOOGLE_CLOUD_PROJECT)")
+    parser.add_argument("--collection", default="Users")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    parser.add_argument("--migrate-resumes", action="store_true", help="also move inline resume fields into artifacts")
+    parser.add_argument("--page-size", type=int, default=BACKFILL_PAGE_SIZE)
+    parser.add_argument("--workers", type=int, default=min(8, os.cpu_count() or 1),
+                        help="normalizing processes; 1 normalizes in this process")
+    parser.add_argument("--max-ops-per-second", type=int, default=500, help="BulkWriter write ceiling")
+    parser.add_argument("--max-docs-per-second", type=float, default=0.0, help="read pacing; 0 means unpaced")
+    parser.add_argument("--limit", type=int, default=0, help="stop after about this many documents (0: all)")
+    parser.add_argument("--checkpoint", help="JSON file to resume from and to update after every page")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    parser.add_argument("--report", help="write the final report (totals, field paths, samples, errors) here")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.project:
+        from google.cloud import firestore
+
+        clients.override("firestore", firestore.Client(project=args.project))
+    job = Backfill(clients.firestore(), args)
+    if args.checkpoint and os.path.exists(args.checkpoint) and not args.restart:
+        with open(args.checkpoint, encoding="utf-8") as handle:
+            job.resume_from(json.load(handle))
+        logger.info("Resuming backfill after doc_id=%s (%d pages done)", job.last_doc_id, job.pages)
+
+    try:
+        job.run()
+    except KeyboardInterrupt:
+        logger.warning("Backfill interrupted after doc_id=%s; rerun with the same --checkpoint to resume", job.last_doc_id)
+    state = job.state()
+    if args.report:
+        job.write_json(args.report, state)
+    print(json.dumps({key: state[key] for key in ("dry_run", "done", "pages", "totals")}, indent=2))
+    return 1 if state["totals"]["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
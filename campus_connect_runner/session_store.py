@@ -0,0 +1,667 @@
+"""
+Session persistence for the runner.
+
+`build_session_service()` picks a backend from SESSION_BACKEND:
+
+* memory - process-local sessions (the previous behaviour), now bounded by count, idle time and an
+  approximate byte budget so long-lived instances stop growing.
+* sqlite - sessions survive restarts in a local SQLite file (SESSION_DB_PATH). One instance per file.
+* redis  - sessions live in a Redis-compatible server (SESSION_REDIS_URL) and are shared by every
+  Cloud Run instance. Needs the optional `redis` package. Any client exposing the `redis.asyncio`
+  get/set/delete/exists/scan_iter/rpush/lrange/hset/hgetall/expire calls can be injected, which is how
+  local stand-ins are used.
+
+Each (app, user, session) is a session document written once at creation plus an append-only list of
+events, so a turn costs one small append per event rather than a rewrite of the whole conversation, and
+two instances appending to the same session cannot drop each other's events. Session-scoped state is
+replayed from the events' state deltas; `app:` and `user:` scoped state live in per-key maps that are
+merged field by field, mirroring InMemorySessionService. Local backends keep a hot LRU of parsed sessions
+in front of the store; the shared backend always reads through so instances never serve each other stale
+turns.
+"""
+
+import abc
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import quote
+
+from google.adk.errors.already_exists_error import AlreadyExistsError
+from google.adk.errors.session_not_found_error import SessionNotFoundError
+from google.adk.events.event import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.state import State
+from pydantic_core import to_jsonable_python
+
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory").strip().lower()      # memory | sqlite | redis
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "sessions.sqlite3")
+SESSION_REDIS_URL = os.getenv("SESSION_REDIS_URL", "redis://localhost:6379/0")
+SESSION_REDIS_PREFIX = os.getenv("SESSION_REDIS_PREFIX", "grestok:sessions:")
+SESSION_REDIS_TTL = int(os.getenv("SESSION_REDIS_TTL", "604800"))             # seconds; 0 keeps sessions forever
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "5000"))          # hot sessions held in memory
+SESSION_IDLE_SECONDS = float(os.getenv("SESSION_IDLE_SECONDS", "3600"))        # evict after this long untouched
+SESSION_MEMORY_CAP_BYTES = int(os.getenv("SESSION_MEMORY_CAP_BYTES", str(256 * 1024 * 1024)))
+SESSION_LOCK_STRIPES = int(os.getenv("SESSION_LOCK_STRIPES", "64"))
+SESSION_BACKENDS = ("memory", "sqlite", "redis")
+
+logger = logging.getLogger("campus_connect_agent.sessions")
+
+
+class SessionLocks:
+    """Fixed pool of asyncio locks; a session always maps to the same stripe, unrelated sessions rarely share one."""
+
+    def __init__(self, stripes: int = SESSION_LOCK_STRIPES):
+        self._locks = [asyncio.Lock() for _ in range(max(1, stripes))]
+
+    def for_session(self, user_id: str, session_id: str) -> asyncio.Lock:
+        digest = hashlib.blake2b(f"{user_id}\x1f{session_id}".encode("utf-8"), digest_size=8).digest()
+        return self._locks[int.from_bytes(digest, "big") % len(self._locks)]
+
+
+class SessionStore(abc.ABC):
+    """
+    Minimal async contract the session service persists through: plain values, append-only lists and
+    field maps under string keys. `append` and `merge` must be atomic on shared stores.
+    """
+
+    shared = False  # True when other processes write to the same store
+
+    @abc.abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abc.abstractmethod
+    async def put(self, key: str, value: str) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def delete(self, key: str) -> None:
+        """Removes the value, list or map stored under `key`."""
+
+    async def exists(self, key: str) -> bool:
+        return await self.get(key) is not None
+
+    @abc.abstractmethod
+    async def keys(self, prefix: str) -> List[str]:
+        """Keys of plain values starting with `prefix`."""
+
+    @abc.abstractmethod
+    async def append(self, key: str, value: str) -> None:
+        """Adds `value` to the end of the list under `key`."""
+
+    @abc.abstractmethod
+    async def items(self, key: str) -> List[str]:
+        """The list under `key`, oldest first (empty when there is none)."""
+
+    @abc.abstractmethod
+    async def merge(self, key: str, fields: Dict[str, str]) -> None:
+        """Sets `fields` in the map under `key`, leaving its other fields as they are."""
+
+    @abc.abstractmethod
+    async def fields(self, key: str) -> Dict[str, str]:
+        ...
+
+    async def touch(self, *keys: str) -> None:
+        """Marks `keys` as recently used (extends their expiry where the store has one)."""
+
+    async def close(self) -> None:
+        pass
+
+
+class SqliteSessionStore(SessionStore):
+    def __init__(self, path: str = SESSION_DB_PATH):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS lists (seq INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL, value TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS lists_key ON lists (key, seq)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS maps (key TEXT NOT NULL, field TEXT NOT NULL, value TEXT NOT NULL,"
+            " PRIMARY KEY (key, field))"
+        )
+        self._lock = threading.Lock()
+
+    def _run(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _run_many(self, statements: List[tuple]) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for sql, params in statements:
+                    self._conn.execute(sql, params)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    async def get(self, key: str) -> Optional[str]:
+        rows = await asyncio.to_thread(self._run, "SELECT value FROM kv WHERE key = ?", (key,))
+        return rows[0][0] if rows else None
+
+    async def put(self, key: str, value: str) -> None:
+        await asyncio.to_thread(
+            self._run,
+            "INSERT INTO kv (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(
+            self._run_many,
+            [(f"DELETE FROM {table} WHERE key = ?", (key,)) for table in ("kv", "lists", "maps")],
+        )
+
+    async def exists(self, key: str) -> bool:
+        rows = await asyncio.to_thread(self._run, "SELECT 1 FROM kv WHERE key = ?", (key,))
+        return bool(rows)
+
+    async def keys(self, prefix: str) -> List[str]:
+        rows = await asyncio.to_thread(
+            self._run, "SELECT key FROM kv WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)
+        )
+        return [row[0] for row in rows]
+
+    async def append(self, key: str, value: str) -> None:
+        await asyncio.to_thread(self._run, "INSERT INTO lists (key, value) VALUES (?, ?)", (key, value))
+
+    async def items(self, key: str) -> List[str]:
+        rows = await asyncio.to_thread(self._run, "SELECT value FROM lists WHERE key = ? ORDER BY seq", (key,))
+        return [row[0] for row in rows]
+
+    async def merge(self, key: str, fields: Dict[str, str]) -> None:
+        sql = (
+            "INSERT INTO maps (key, field, value) VALUES (?, ?, ?)"
+            " ON CONFLICT(key, field) DO UPDATE SET value = excluded.value"
+        )
+        await asyncio.to_thread(self._run_many, [(sql, (key, field, value)) for field, value in fields.items()])
+
+    async def fields(self, key: str) -> Dict[str, str]:
+        rows = await asyncio.to_thread(self._run, "SELECT field, value FROM maps WHERE key = ?", (key,))
+        return dict(rows)
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RedisSessionStore(SessionStore):
+    shared = True
+
+    def __init__(self, client: Any = None, prefix: str = SESSION_REDIS_PREFIX, ttl_seconds: int = SESSION_REDIS_TTL):
+        if client is None:
+            try:
+                import redis.asyncio as redis_asyncio  # optional, only needed for this backend
+            except ImportError as exc:
+                raise RuntimeError("SESSION_BACKEND=redis needs the 'redis' package (pip install 'redis>=5.0')") from exc
+            client = redis_asyncio.from_url(SESSION_REDIS_URL, decode_responses=True)
+        self._client = client
+        self._prefix = prefix
+        self._ttl = ttl_seconds
+
+    @staticmethod
+    def _text(value: Any) -> Any:
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def _ttl_for(self, key: str) -> Optional[int]:
+        # Only sessions and their events expire; app/user scoped state outlives any one conversation.
+        return self._ttl if self._ttl > 0 and key.startswith(("session:", "events:")) else None
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._text(await self._client.get(self._prefix + key))
+
+    async def put(self, key: str, value: str) -> None:
+        await self._client.set(self._prefix + key, value, ex=self._ttl_for(key))
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(self._prefix + key)
+
+    async def exists(self, key: str) -> bool:
+        return bool(await self._client.exists(self._prefix + key))
+
+    async def keys(self, prefix: str) -> List[str]:
+        start = len(self._prefix)
+        keys = []
+        async for key in self._client.scan_iter(match=self._prefix + prefix + "*"):
+            key = key.decode("utf-8") if isinstance(key, bytes) else key
+            keys.append(key[start:])
+        return keys
+
+    async def append(self, key: str, value: str) -> None:
+        await self._client.rpush(self._prefix + key, value)
+
+    async def items(self, key: str) -> List[str]:
+        return [self._text(value) for value in await self._client.lrange(self._prefix + key, 0, -1)]
+
+    async def merge(self, key: str, fields: Dict[str, str]) -> None:
+        await self._client.hset(self._prefix + key, mapping=fields)
+
+    async def fields(self, key: str) -> Dict[str, str]:
+        values = await self._client.hgetall(self._prefix + key)
+        return {self._text(field): self._text(value) for field, value in values.items()}
+
+    async def touch(self, *keys: str) -> None:
+        for key in keys:
+            ttl = self._ttl_for(key)
+            if ttl:
+                await self._client.expire(self._prefix + key, ttl)
+
+    async def close(self) -> None:
+        close = getattr(self._client, "aclose", None) or getattr(self._client, "close", None)
+        if close is not None:
+            result = close()
+            if asyncio.iscoroutine(result):
+                await result
+
+
+class _HotSessions:
+    """
+    LRU of parsed sessions bounded by count, idle time and an approximate byte budget. Pinned sessions
+    (locked for a write, or in the middle of a turn) are never evicted, even when that overshoots a bound.
+    """
+
+    def __init__(self, max_sessions: int, idle_seconds: float, max_bytes: int):
+        self._entries: "OrderedDict[str, List[Any]]" = OrderedDict()  # key -> [session, size, last_used]
+        self._pins: Dict[str, int] = {}
+        self._max_sessions = max_sessions
+        self._idle_seconds = idle_seconds
+        self._max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Session]:
+        self._expire_idle()
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        entry[2] = time.monotonic()
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: str, session: Session, size: int) -> None:
+        self.pop(key)
+        self._entries[key] = [session, size, time.monotonic()]
+        self.bytes += size
+        self._shrink(keep=key)
+
+    def resize(self, key: str, size: int) -> None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        self.bytes += size - entry[1]
+        entry[1] = size
+        entry[2] = time.monotonic()
+        self._entries.move_to_end(key)
+        self._shrink(keep=key)
+
+    def pop(self, key: str) -> Optional[Session]:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self.bytes -= entry[1]
+        return entry[0]
+
+    @contextmanager
+    def pinned(self, key: str) -> Iterator[None]:
+        self._pins[key] = self._pins.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            if self._pins[key] > 1:
+                self._pins[key] -= 1
+            else:
+                del self._pins[key]
+
+    def _expire_idle(self) -> None:
+        if self._idle_seconds <= 0:
+            return
+        cutoff = time.monotonic() - self._idle_seconds
+        for key, entry in list(self._entries.items()):
+            if entry[2] > cutoff:
+                break
+            if key not in self._pins:
+                self._evict(key)
+
+    def _over_budget(self) -> bool:
+        return len(self._entries) > self._max_sessions or (self._max_bytes > 0 and self.bytes > self._max_bytes)
+
+    def _shrink(self, keep: str) -> None:
+        self._expire_idle()
+        if not self._over_budget():
+            return
+        for key in list(self._entries):
+            if key != keep and key not in self._pins:
+                self._evict(key)
+                if not self._over_budget():
+                    return
+
+    def _evict(self, key: str) -> None:
+        self.pop(key)
+        self.evictions += 1
+        logger.debug("Evicted session %s from memory", key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _light_copy(session: Session) -> Session:
+    copied = session.model_copy(deep=False)
+    copied.events = list(session.events)
+    copied.state = dict(session.state)
+    return copied
+
+
+def _replay(session: Session, event: Event) -> None:
+    """Applies a stored event to a session read back from its document."""
+    session.events.append(event)
+    if event.actions and event.actions.state_delta:
+        session.state.update(_split_state(event.actions.state_delta)["session"])
+    session.last_update_time = max(session.last_update_time, event.timestamp)
+
+
+def _split_state(state: Optional[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    deltas: Dict[str, Dict[str, Any]] = {"app": {}, "user": {}, "session": {}}
+    for key, value in (state or {}).items():
+        if key.startswith(State.APP_PREFIX):
+            deltas["app"][key[len(State.APP_PREFIX):]] = value
+        elif key.startswith(State.USER_PREFIX):
+            deltas["user"][key[len(State.USER_PREFIX):]] = value
+        elif not key.startswith(State.TEMP_PREFIX):
+            deltas["session"][key] = value
+    return deltas
+
+
+def _part(value: str) -> str:
+    return quote(value, safe="")
+
+
+class StoredSessionService(BaseSessionService):
+    """
+    BaseSessionService over a SessionStore (or memory only when `store` is None).
+
+    Writes for one session are serialized on a striped lock; different sessions never wait on each other.
+    Across instances nothing needs a lock: events are appended and scoped state is merged per key. With
+    the memory backend an evicted session is gone and the next turn starts a fresh one; wrap a turn in
+    `in_use` so that cannot happen halfway through it.
+    """
+
+    def __init__(
+        self,
+        store: Optional[SessionStore] = None,
+        max_sessions: int = SESSION_MAX_SESSIONS,
+        idle_seconds: float = SESSION_IDLE_SECONDS,
+        memory_cap_bytes: int = SESSION_MEMORY_CAP_BYTES,
+        lock_stripes: int = SESSION_LOCK_STRIPES,
+    ):
+        self.store = store
+        self._hot = _HotSessions(max_sessions, idle_seconds, memory_cap_bytes)
+        self._cache_sessions = store is None or not store.shared
+        self._locks = SessionLocks(lock_stripes)
+        self._app_state: Dict[str, Dict[str, Any]] = {}
+        self._user_state: Dict[str, Dict[str, Any]] = {}
+        self.store_reads = 0
+        self.store_writes = 0
+
+    # -- keys -------------------------------------------------------------------------------------
+
+    @staticmethod
+    def _session_key(app_name: str, user_id: str, session_id: str) -> str:
+        return f"session:{_part(app_name)}:{_part(user_id)}:{_part(session_id)}"
+
+    @staticmethod
+    def _events_key(session_key: str) -> str:
+        return f"events:{session_key}"
+
+    @staticmethod
+    def _app_state_key(app_name: str) -> str:
+        return f"app_state:{_part(app_name)}"
+
+    @staticmethod
+    def _user_state_key(app_name: str, user_id: str) -> str:
+        return f"user_state:{_part(app_name)}:{_part(user_id)}"
+
+    # -- storage helpers --------------------------------------------------------------------------
+
+    async def _load(self, key: str) -> Optional[Session]:
+        if self._cache_sessions:
+            session = self._hot.get(key)
+            if session is not None or self.store is None:
+                return session
+        raw = await self.store.get(key)
+        self.store_reads += 1
+        if raw is None:
+            return None
+        session = Session.model_validate_json(raw)
+        size = len(raw)
+        for raw_event in await self.store.items(self._events_key(key)):
+            _replay(session, Event.model_validate_json(raw_event))
+            size += len(raw_event)
+        self.store_reads += 1
+        if self._cache_sessions:
+            self._hot.put(key, session, size)
+        return session
+
+    def _size_of(self, key: str) -> int:
+        entry = self._hot._entries.get(key)
+        return entry[1] if entry is not None else 0
+
+    async def _scoped_state(self, cache: Dict[str, Dict[str, Any]], key: str) -> Dict[str, Any]:
+        if key in cache and (self.store is None or not self.store.shared):
+            return cache[key]
+        state: Dict[str, Any] = {}
+        if self.store is not None:
+            state = {field: json.loads(raw) for field, raw in (await self.store.fields(key)).items()}
+            self.store_reads += 1
+        cache[key] = state
+        return state
+
+    async def _update_scoped_state(self, cache: Dict[str, Dict[str, Any]], key: str, delta: Dict[str, Any]) -> None:
+        if not delta:
+            return
+        if self.store is not None:
+            # Only the changed keys are written, so concurrent writers of other keys are not overwritten.
+            await self.store.merge(key, {field: json.dumps(to_jsonable_python(value)) for field, value in delta.items()})
+            self.store_writes += 1
+        if key in cache or self.store is None:
+            cache[key] = {**cache.get(key, {}), **delta}
+
+    async def _merge_state(self, app_name: str, user_id: str, session: Session) -> Session:
+        app_state = await self._scoped_state(self._app_state, self._app_state_key(app_name))
+        user_state = await self._scoped_state(self._user_state, self._user_state_key(app_name, user_id))
+        for key, value in app_state.items():
+            session.state[State.APP_PREFIX + key] = copy.deepcopy(value)
+        for key, value in user_state.items():
+            session.state[State.USER_PREFIX + key] = copy.deepcopy(value)
+        return session
+
+    # -- BaseSessionService -----------------------------------------------------------------------
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session_id = (session_id or "").strip() or str(uuid.uuid4())
+        key = self._session_key(app_name, user_id, session_id)
+        async with self._locks.for_session(user_id, session_id):
+            if await self._load(key) is not None:
+                raise AlreadyExistsError(f"Session with id {session_id} already exists.")
+            deltas = _split_state(state)
+            await self._update_scoped_state(self._app_state, self._app_state_key(app_name), deltas["app"])
+            await self._update_scoped_state(
+                self._user_state, self._user_state_key(app_name, user_id), deltas["user"]
+            )
+            session = Session(
+                app_name=app_name,
+                user_id=user_id,
+                id=session_id,
+                state=deltas["session"],
+                last_update_time=time.time(),
+            )
+            raw = session.model_dump_json()
+            if self.store is not None:
+                await self.store.put(key, raw)
+                self.store_writes += 1
+            if self._cache_sessions:
+                self._hot.put(key, session, len(raw))
+        return await self._merge_state(app_name, user_id, _light_copy(session))
+
+    async def has_session(self, *, app_name: str, user_id: str, session_id: str) -> bool:
+        """Existence check without copying or parsing the session (the per-request fast path)."""
+        key = self._session_key(app_name, user_id, session_id)
+        if self._cache_sessions and self._hot.get(key) is not None:
+            return True
+        if self.store is None:
+            return False
+        return await self.store.exists(key)
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        stored = await self._load(self._session_key(app_name, user_id, session_id))
+        if stored is None:
+            return None
+        session = _light_copy(stored)
+        if config:
+            if config.num_recent_events is not None:
+                session.events = session.events[-config.num_recent_events:] if config.num_recent_events else []
+            if config.after_timestamp:
+                session.events = [event for event in session.events if event.timestamp >= config.after_timestamp]
+        return await self._merge_state(app_name, user_id, session)
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        prefix = f"session:{_part(app_name)}:" + (f"{_part(user_id)}:" if user_id is not None else "")
+        if self.store is not None:
+            keys = await self.store.keys(prefix)
+        else:
+            keys = [key for key in list(self._hot._entries) if key.startswith(prefix)]
+
+        sessions = []
+        for key in keys:
+            stored = await self._load(key)
+            if stored is None:
+                continue
+            listed = stored.model_copy(update={"events": [], "state": {}})
+            sessions.append(listed)
+        sessions.sort(key=lambda session: session.last_update_time)
+        return ListSessionsResponse(sessions=sessions)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        key = self._session_key(app_name, user_id, session_id)
+        async with self._locks.for_session(user_id, session_id):
+            self._hot.pop(key)
+            if self.store is not None:
+                await self.store.delete(key)
+                await self.store.delete(self._events_key(key))
+                self.store_writes += 1
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+
+        key = self._session_key(session.app_name, session.user_id, session.id)
+        async with self._locks.for_session(session.user_id, session.id):
+            with self._hot.pinned(key):
+                return await self._append_event(key, session, event)
+
+    async def _append_event(self, key: str, session: Session, event: Event) -> Event:
+        stored: Optional[Session] = None
+        if self._cache_sessions:
+            stored = await self._load(key)
+            if stored is None:
+                raise SessionNotFoundError(f"Session {session.id} not found.")
+            known = stored.events
+        else:
+            # Shared store: only existence is checked, the session itself is never re-read or rewritten.
+            if not await self.store.exists(key):
+                raise SessionNotFoundError(f"Session {session.id} not found.")
+            self.store_reads += 1
+            known = session.events
+        if any(existing == event for existing in known if existing.id == event.id):
+            return event
+
+        event = await super().append_event(session=session, event=event)
+        session.last_update_time = event.timestamp
+        raw = event.model_dump_json()
+
+        if self.store is not None:
+            events_key = self._events_key(key)
+            await self.store.append(events_key, raw)
+            await self.store.touch(key, events_key)
+            self.store_writes += 1
+
+        if event.actions and event.actions.state_delta:
+            deltas = _split_state(event.actions.state_delta)
+            await self._update_scoped_state(self._app_state, self._app_state_key(session.app_name), deltas["app"])
+            await self._update_scoped_state(
+                self._user_state, self._user_state_key(session.app_name, session.user_id), deltas["user"]
+            )
+            if stored is not None:
+                stored.state.update(deltas["session"])
+
+        if stored is not None:
+            if stored is not session:
+                stored.events.append(event)
+            stored.last_update_time = event.timestamp
+            self._hot.resize(key, self._size_of(key) + len(raw))
+        return event
+
+    @contextmanager
+    def in_use(self, app_name: str, user_id: str, session_id: str) -> Iterator[None]:
+        """Keeps the session resident in memory for the duration of a turn."""
+        with self._hot.pinned(self._session_key(app_name, user_id, session_id)):
+            yield
+
+    async def get_user_state(self, *, app_name: str, user_id: str) -> Dict[str, Any]:
+        return dict(await self._scoped_state(self._user_state, self._user_state_key(app_name, user_id)))
+
+    async def close(self) -> None:
+        if self.store is not None:
+            await self.store.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self.store).__name__ if self.store is not None else "memory",
+            "hot_sessions": len(self._hot),
+            "hot_bytes": self._hot.bytes,
+            "evictions": self._hot.evictions,
+            "store_reads": self.store_reads,
+            "store_writes": self.store_writes,
+        }
+
+
+def build_session_service(backend: str = SESSION_BACKEND, redis_client: Any = None) -> StoredSessionService:
+    """Session service for SESSION_BACKEND; pass `redis_client` to back the redis store with a stand-in."""
+    if backend not in SESSION_BACKENDS:
+        raise ValueError(f"SESSION_BACKEND must be one of {', '.join(SESSION_BACKENDS)}, got {backend!r}")
+    if backend == "sqlite":
+        store: Optional[SessionStore] = SqliteSessionStore(SESSION_DB_PATH)
+    elif backend == "redis":
+        store = RedisSessionStore(redis_client)
+    else:
+        store = None
+    logger.info("Session backend: %s", backend)
+    return StoredSessionService(store)
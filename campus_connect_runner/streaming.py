@@ -0,0 +1,87 @@
+"""Server-sent event plumbing for the streaming chat endpoint."""
+
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional
+
+from fastapi import Request
+
+logger = logging.getLogger("campus_connect_agent.streaming")
+
+_DONE = object()
+
+
+def sse_event(event_type: str, data: Dict[str, Any]) -> str:
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event_type}\ndata: {payload}\n\n"
+
+
+def adk_event_to_messages(event) -> List[Dict[str, Any]]:
+    """Maps one ADK event onto client-facing progress messages: partial text and tool calls/results."""
+    messages: List[Dict[str, Any]] = []
+    parts = event.content.parts if event.content and event.content.parts else []
+    for part in parts:
+        if part.text and event.partial:
+            messages.append({"type": "delta", "author": event.author, "text": part.text})
+        elif part.function_call:
+            messages.append({"type": "tool_call", "author": event.author, "name": part.function_call.name})
+        elif part.function_response:
+            messages.append({"type": "tool_result", "author": event.author, "name": part.function_response.name})
+    return messages
+
+
+async def stream_agent_events(
+    request: Request,
+    events: AsyncIterator[Any],
+    to_messages: Callable[[Any], Iterable[Dict[str, Any]]],
+    heartbeat_seconds: float,
+    queue_size: int,
+    first_message: Optional[Dict[str, Any]] = None,
+) -> AsyncIterator[str]:
+    """
+    Pumps `events` through a bounded queue into SSE frames.
+
+    The producer task blocks on a full queue, so a slow client throttles the agent run instead of
+    buffering unbounded output. Idle gaps emit heartbeat comments, and a client disconnect cancels the
+    producer (and with it the in-flight LLM/tool work).
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    async def produce() -> None:
+        try:
+            async for event in events:
+                for message in to_messages(event):
+                    await queue.put(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # surface agent failures to the client as a stream event
+            logger.exception("Streaming agent run failed")
+            await queue.put({"type": "error", "detail": str(exc) or exc.__class__.__name__})
+        await queue.put(_DONE)
+
+    producer = asyncio.create_task(produce())
+    try:
+        if first_message is not None:
+            yield sse_event(first_message["type"], first_message)
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=heartbeat_seconds)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    logger.info("Stream client disconnected; cancelling agent run")
+                    break
+                yield ": heartbeat\n\n"
+                continue
+            if message is _DONE:
+                break
+            yield sse_event(message["type"], message)
+            if message["type"] in ("final", "error"):
+                break
+    finally:
+        if not producer.done():
+            producer.cancel()
+            try:
+                await producer
+            except (asyncio.CancelledError, Exception):
+                pass
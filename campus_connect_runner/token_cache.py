@@ -0,0 +1,99 @@
+"""
+Cache of verified Firebase ID tokens for the `authorize` decorator.
+
+Chat clients resend the same ID token on every message until it expires (about an hour), so
+decoded claims are cached under a SHA-256 of the token until its `exp` claim. Misses are verified
+off the event loop and concurrent misses for one token share a single verification, and an optional
+periodic revocation check bounds how long a revoked token stays usable.
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from typing import Any, Dict, Optional
+
+from firebase_admin import auth as firebase_auth
+
+from campus_connect.tools.cache import TTLCache
+
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+AUTH_TOKEN_MAX_TTL = float(os.getenv("AUTH_TOKEN_MAX_TTL", "3600"))                  # seconds; Firebase tokens live 1h
+AUTH_EXPIRY_SKEW = float(os.getenv("AUTH_EXPIRY_SKEW", "30"))                        # drop entries this long before exp
+AUTH_REVOCATION_CHECK_SECONDS = float(os.getenv("AUTH_REVOCATION_CHECK_SECONDS", "0"))  # 0 disables
+
+
+class VerifiedTokenCache:
+    def __init__(
+        self,
+        maxsize: int = AUTH_TOKEN_CACHE_SIZE,
+        max_ttl: float = AUTH_TOKEN_MAX_TTL,
+        revocation_check_seconds: float = AUTH_REVOCATION_CHECK_SECONDS,
+    ):
+        self._cache = TTLCache(maxsize, max_ttl, name="verified_tokens")
+        self._max_ttl = max_ttl
+        self._revocation_check_seconds = revocation_check_seconds
+        self._inflight: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
+        self.revocation_checks = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    async def verify(self, token: str) -> Dict[str, Any]:
+        """Returns decoded claims, raising the same firebase_auth errors as verify_id_token."""
+        key = self._key(token)
+        entry = self._cache.get(key)
+        if entry is not None:
+            if self._revocation_due(entry):
+                return await self._verify_and_store(key, token, check_revoked=True)
+            return entry["claims"]
+
+        # The verification belongs to the cache rather than to the first caller, so a cancelled
+        # request does not cancel it for everyone else waiting on the same token.
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._verify_and_store(key, token, check_revoked=self._revocation_check_seconds > 0)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: "asyncio.Task[Dict[str, Any]]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved when every waiter was cancelled
+
+    def _revocation_due(self, entry: Dict[str, Any]) -> bool:
+        return (
+            self._revocation_check_seconds > 0
+            and time.monotonic() - entry["checked_at"] >= self._revocation_check_seconds
+        )
+
+    async def _verify_and_store(self, key: str, token: str, check_revoked: bool) -> Dict[str, Any]:
+        try:
+            claims = await asyncio.to_thread(firebase_auth.verify_id_token, token, check_revoked=check_revoked)
+        except Exception:
+            self._cache.pop(key)
+            raise
+        if check_revoked:
+            self.revocation_checks += 1
+
+        ttl = min(self._max_ttl, float(claims.get("exp", 0)) - time.time() - AUTH_EXPIRY_SKEW)
+        if ttl > 0:
+            self._cache.set(key, {"claims": claims, "checked_at": time.monotonic()}, ttl_seconds=ttl)
+        return claims
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._cache.stats()
+        stats["revocation_checks"] = self.revocation_checks
+        stats["coalesced_misses"] = self.coalesced
+        return stats
+
+
+token_cache: Optional[VerifiedTokenCache] = VerifiedTokenCache() if AUTH_TOKEN_CACHE_SIZE > 0 else None